@@ -1,9 +1,12 @@
 import os
-import folder_paths
-import random
-from PIL import Image, ImageOps, ImageSequence
+import hashlib
+from PIL import Image, ImageOps
 import torch
 import numpy as np
+from .node_timing import stage_timer
+
+# Frames needing a resize are batched into groups of this size for a single interpolate call
+RESIZE_GROUP = 16
 
 class GalleryImagePicker:
     INPUT_TYPES = classmethod(lambda cls: {
@@ -14,7 +17,12 @@ class GalleryImagePicker:
             "image_path": ("STRING", {"default": "", "multiline": False, "hidden": True}), # Stores the selected image path(s)
             "exclude": ("STRING", {"default": "", "multiline": False}), # Comma separated
             "show_preview": ("BOOLEAN", {"default": True, "label_on": "Show Preview", "label_off": "Hide Preview"}),
-        }
+            "frame_start": ("INT", {"default": 0, "min": 0, "max": 0xffffffff, "tooltip": "First frame to load from animated images"}),
+            "frame_count": ("INT", {"default": 0, "min": 0, "max": 0xffffffff, "tooltip": "Frames to load per animated image (0 = all)"}),
+            "frame_stride": ("INT", {"default": 1, "min": 1, "max": 1000, "tooltip": "Load every Nth frame"}),
+            "max_memory_mb": ("INT", {"default": 0, "min": 0, "max": 1048576, "tooltip": "Optional cap on the output tensor size; frames past it are dropped with a warning (0 = no cap, load every frame)"}),
+        },
+        "hidden": {"unique_id": "UNIQUE_ID"},
     })
 
     RETURN_TYPES = ("IMAGE", "MASK", "STRING")
@@ -22,7 +30,38 @@ class GalleryImagePicker:
     FUNCTION = "load_image"
     CATEGORY = "Web Gallery"
 
-    def load_image(self, path, exclude, image_path, show_preview):
+    @classmethod
+    def IS_CHANGED(cls, path="", exclude="", image_path="", show_preview=True, **kwargs):
+        # Fingerprint the selection by path, mtime and size so an unchanged selection
+        # hits ComfyUI's cache instead of decoding every file again
+        h = hashlib.sha256()
+        for p in (image_path or "").split('\n'):
+            p = p.strip()
+            if not p:
+                continue
+            h.update(p.encode("utf-8"))
+            try:
+                stat = os.stat(p)
+                h.update(f"|{stat.st_mtime_ns}|{stat.st_size}\n".encode("utf-8"))
+            except OSError:
+                h.update(b"|missing\n")
+        return h.hexdigest()
+
+    def flush_resize_group(self, group, output_image, output_mask):
+        # Resize same-sized frames with one interpolate call instead of one per frame
+        target_h, target_w = output_image.shape[1], output_image.shape[2]
+        slots = [entry[0] for entry in group]
+        images = torch.stack([entry[1] for entry in group]).permute(0, 3, 1, 2).to(torch.float32).div_(255.0)
+        images = torch.nn.functional.interpolate(images, size=(target_h, target_w), mode="bilinear", align_corners=False)
+        output_image[slots] = images.permute(0, 2, 3, 1)
+
+        masked = [entry for entry in group if entry[2] is not None]
+        if masked:
+            masks = torch.stack([entry[2] for entry in masked]).unsqueeze(1)
+            masks = torch.nn.functional.interpolate(masks, size=(target_h, target_w), mode="nearest")
+            output_mask[[entry[0] for entry in masked]] = masks.squeeze(1)
+
+    def load_image(self, path, exclude, image_path, show_preview, frame_start=0, frame_count=0, frame_stride=1, max_memory_mb=0, unique_id=None):
         if not image_path:
             raise ValueError("No image selected. Please select an image using the picker.")
         
@@ -32,78 +71,108 @@ class GalleryImagePicker:
         if not paths:
              raise ValueError("No valid image paths found.")
 
-        all_images = []
-        all_masks = []
-        
+        timer = stage_timer("GalleryImagePicker", unique_id)
+        timer.count("files_scanned", len(paths))
+
+        # 1. Plan which frames to read from every file (without decoding them)
+        frame_stride = max(1, frame_stride)
+        plans = []
         for p in paths:
             if not os.path.exists(p):
                 print(f"Warning: Selected image not found: {p}")
+                timer.count("rejected")
                 continue
-                
-            img = Image.open(p)
-            
-            for i in ImageSequence.Iterator(img):
-                i = ImageOps.exif_transpose(i)
-                if i.mode == 'I':
-                    i = i.point(lambda i: i * (1 / 255))
-                image = i.convert("RGB")
-                image = np.array(image).astype(np.float32) / 255.0
-                image = torch.from_numpy(image)[None,]
-                if 'A' in i.getbands():
-                    mask = np.array(i.getchannel('A')).astype(np.float32) / 255.0
-                    mask = 1. - torch.from_numpy(mask)
-                else:
-                    mask = torch.zeros((image.shape[1], image.shape[2]), dtype=torch.float32, device="cpu")
-                all_images.append(image)
-                all_masks.append(mask.unsqueeze(0))
-
-        if not all_images:
+            try:
+                with timer.stage("plan"), Image.open(p) as img:
+                    n_frames = getattr(img, "n_frames", 1)
+            except Exception as e:
+                print(f"Warning: Could not open {p}: {e}")
+                timer.count("rejected")
+                continue
+            if timer.enabled:
+                timer.count("bytes_read", os.path.getsize(p))
+            # Stills (and animations shorter than frame_start) still contribute their last frame
+            indices = list(range(min(frame_start, n_frames - 1), n_frames, frame_stride))
+            if frame_count > 0:
+                indices = indices[:frame_count]
+            plans.append((p, indices))
+
+        total_frames = sum(len(indices) for _, indices in plans)
+        if total_frames == 0:
              raise ValueError("Failed to load any images from the selection.")
 
-        # If multiple images are loaded, they must have same dimensions for batching in a single tensor
-        # If dimensions differ, we might need to resize or error out. 
-        # Standard ComfyUI behavior is usually to error or user ensures same size.
-        # But let's try to be safe: check dimensions of first image and resize others if needed?
-        # Or just cat and let torch throw error if mismatch.
-        # Let's check dimensions.
-        first_shape = all_images[0].shape
-        for i in range(1, len(all_images)):
-             if all_images[i].shape != first_shape:
-                 # Resize to match first image
-                 # Permute to BCHW for resize
-                 img_t = all_images[i].permute(0, 3, 1, 2)
-                 target_h, target_w = first_shape[1], first_shape[2]
-                 img_t = torch.nn.functional.interpolate(img_t, size=(target_h, target_w), mode="bilinear", align_corners=False)
-                 all_images[i] = img_t.permute(0, 2, 3, 1)
-                 
-                 # Resize mask too
-                 mask_t = all_masks[i].unsqueeze(1) # B, C, H, W
-                 mask_t = torch.nn.functional.interpolate(mask_t, size=(target_h, target_w), mode="nearest")
-                 all_masks[i] = mask_t.squeeze(1)
-
-        output_image = torch.cat(all_images, dim=0)
-        output_mask = torch.cat(all_masks, dim=0)
-
-        # Generate previews (Save to temp)
-        output_dir = folder_paths.get_temp_directory()
-        filename_prefix = "GalleryPicker_temp_" + ''.join(random.choice("abcdefghijklmnopqrstupvxyz") for x in range(5))
-        
+        output_image = None
+        output_mask = None
+        # Frames whose size differs from the batch, grouped by size and resized together
+        pending = {}
+        slot = 0
+
+        # 2. Stream every selected frame into its slot of the preallocated output
+        for p, indices in plans:
+            if slot >= total_frames:
+                break
+            with Image.open(p) as img:
+                for frame_index in indices:
+                    if slot >= total_frames:
+                        break
+                    with timer.stage("decode"):
+                        img.seek(frame_index)
+                        i = ImageOps.exif_transpose(img)
+                        if i.mode == 'I':
+                            i = i.point(lambda i: i * (1 / 255))
+                        image = torch.from_numpy(np.array(i.convert("RGB")))
+                        mask = None
+                        if 'A' in i.getbands():
+                            mask = 1. - torch.from_numpy(np.array(i.getchannel('A')).astype(np.float32) / 255.0)
+                    timer.count("decoded")
+
+                    if output_image is None:
+                        # The first frame decides the batch size; cap the frame count by memory
+                        target_h, target_w = image.shape[0], image.shape[1]
+                        frame_bytes = target_h * target_w * 4 * 4  # float32 RGB + float32 mask
+                        if max_memory_mb > 0 and total_frames * frame_bytes > max_memory_mb * 2**20:
+                            capped = max(1, (max_memory_mb * 2**20) // frame_bytes)
+                            print(f"Warning: {total_frames} frames at {target_w}x{target_h} exceed {max_memory_mb} MB, loading only the first {capped}")
+                            total_frames = capped
+                        output_image = torch.empty((total_frames, target_h, target_w, 3), dtype=torch.float32)
+                        output_mask = torch.zeros((total_frames, target_h, target_w), dtype=torch.float32)
+
+                    with timer.stage("tensor"):
+                        if image.shape[0] == target_h and image.shape[1] == target_w:
+                            output_image[slot].copy_(image)
+                            output_image[slot].div_(255.0)
+                            if mask is not None:
+                                output_mask[slot].copy_(mask)
+                        else:
+                            group = pending.setdefault((image.shape[0], image.shape[1]), [])
+                            group.append((slot, image, mask))
+                            if len(group) >= RESIZE_GROUP:
+                                self.flush_resize_group(group, output_image, output_mask)
+                                group.clear()
+                    slot += 1
+
+        with timer.stage("resize"):
+            for group in pending.values():
+                if group:
+                    self.flush_resize_group(group, output_image, output_mask)
+
+        output_image = output_image[:slot]
+        output_mask = output_mask[:slot]
+
+        # Previews point at the gallery thumbnail endpoint (cached, generated on demand)
+        # instead of re-encoding every frame to a temp PNG on each run
         results = []
-        for i, img_tensor in enumerate(output_image):
-            # Convert tensor back to uint8 numpy array
-            # img_tensor is (H, W, C)
-            i_np = 255. * img_tensor.cpu().numpy()
-            img = Image.fromarray(np.clip(i_np, 0, 255).astype(np.uint8))
-            
-            file = f"{filename_prefix}_{i:05}.png"
-            img.save(os.path.join(output_dir, file), compress_level=1)
+        for p in paths:
+            if not os.path.exists(p):
+                continue
             results.append({
-                "filename": file,
-                "subfolder": "",
-                "type": "temp"
+                "filename": os.path.basename(p),
+                "path": os.path.dirname(p),
+                "type": "gallery"
             })
 
+        timer.finish()
         return {
-            "ui": {"images": results},
+            "ui": {"gallery_previews": results},
             "result": (output_image, output_mask, image_path)
         }
@@ -1,9 +1,11 @@
 import os
+import time
 import shutil
 import random
-import torch
-import numpy as np
-from PIL import Image, ImageOps
+from .image_batch import to_list_tensor
+from .decoded_store import DecodedImageStore, load_rgb_array
+from .pose_manifest import PoseManifest, PosePrefixIndex, classify_in_pool, is_openpose_array
+from .node_timing import stage_timer
 
 class PoseImageManager:
     @classmethod
@@ -18,55 +20,50 @@ class PoseImageManager:
             },
             "optional": {
                 "names_to_skip": ("STRING", {"default": "preview, previews, sample, samples, example, examples, thumb", "multiline": True, "placeholder": "Comma separated names to skip renaming (e.g. preview)"}),
-            }
+                "use_decoded_cache": ("BOOLEAN", {"default": False, "tooltip": "Keep decoded pixels in a memory-mapped on-disk store so repeated runs skip PNG/JPEG decoding"}),
+                "output_pairs": ("BOOLEAN", {"default": False, "tooltip": "Output aligned (skeleton, example) pairs from the persisted pairing index"}),
+                "workers": ("INT", {"default": 0, "min": 0, "max": 64, "tooltip": "Parallel workers for classifying new files (0 = one per CPU)"}),
+            },
+            "hidden": {"unique_id": "UNIQUE_ID"},
         }
 
-    RETURN_TYPES = ("IMAGE", "STRING", "IMAGE", "STRING", "STRING")
-    RETURN_NAMES = ("example_images", "example_paths", "openpose_images", "openpose_paths", "result_text")
-    OUTPUT_IS_LIST = (True, True, True, True, False)
+    RETURN_TYPES = ("IMAGE", "STRING", "IMAGE", "STRING", "STRING", "IMAGE", "IMAGE", "STRING", "STRING")
+    RETURN_NAMES = ("example_images", "example_paths", "openpose_images", "openpose_paths", "result_text",
+                    "pair_openpose_images", "pair_example_images", "pair_openpose_paths", "pair_example_paths")
+    OUTPUT_IS_LIST = (True, True, True, True, False, True, True, True, True)
     FUNCTION = "process_images"
     CATEGORY = "Web Gallery Tools"
 
     def is_openpose(self, img_array):
         # OpenPose images typically have a black background and colored limbs
-        # Simple heuristic: Check if background is dominant black
-        # This is a basic check; robust OpenPose detection is complex
-        # Assumption: OpenPose images are mostly black (>50%) with some color
-        
-        # Convert to grayscale to check for black background
-        # OpenPose background is (0,0,0)
-        
-        # Check if majority of pixels are black (or close to black)
-        # Using a threshold for "black" to account for compression artifacts
-        threshold = 30
-        black_pixels = np.all(img_array < threshold, axis=-1)
-        black_ratio = np.mean(black_pixels)
-        
-        # OpenPose skeletons are thin, so background should be very dominant
-        # e.g., > 80% black
-        return black_ratio > 0.8
+        # (shared with the classification workers, see pose_manifest.is_openpose_array)
+        return is_openpose_array(img_array)
+
+    def track_move(self, manifest, decoded, old_path, new_path):
+        # Keep the manifest entry and any already decoded pixels with a renamed/moved file
+        manifest.move(old_path, new_path)
+        if old_path in decoded:
+            decoded[new_path] = decoded.pop(old_path)
     
-    def load_image(self, path):
+    def load_image(self, path, store=None, image_np=None):
         try:
+            if image_np is not None:
+                # Already decoded during classification
+                return to_list_tensor(image_np)
             if not os.path.exists(path):
                 return None
-            i = Image.open(path)
-            i = ImageOps.exif_transpose(i)
-            if i.mode == 'I':
-                i = i.point(lambda i: i * (1 / 255))
-            image = i.convert("RGB")
-            image = np.array(image).astype(np.float32) / 255.0
-            image = torch.from_numpy(image)[None,]
-            return image
+            return to_list_tensor(load_rgb_array(path, store))
         except Exception as e:
             print(f"Error loading {path}: {e}")
             return None
 
-    def process_images(self, image_dir, rename_non_openpose, move_to_examples, load_openpose_images, load_example_images, names_to_skip=""):
+    def process_images(self, image_dir, rename_non_openpose, move_to_examples, load_openpose_images, load_example_images, names_to_skip="", use_decoded_cache=False, workers=0, output_pairs=False, unique_id=None):
         if not os.path.isdir(image_dir):
-            return ([], [], [], [], f"Directory '{image_dir}' not found.")
+            return ([], [], [], [], f"Directory '{image_dir}' not found.", [], [], [], [])
+        timer = stage_timer("PoseImageManager", unique_id)
             
         valid_extensions = ['.jpg', '.jpeg', '.png', '.webp']
+        store = DecodedImageStore.for_directory(image_dir) if use_decoded_cache else None
         
         # Prepare skip list (names of folders or files to skip during recursive scan, AND for renaming logic)
         skip_names = []
@@ -75,6 +72,7 @@ class PoseImageManager:
         
         # Recursive Scan
         all_files = []
+        scan_start = time.perf_counter()
         for root, dirs, files in os.walk(image_dir):
             # Check if current directory should be skipped
             # (e.g. if 'examples' is in skip list, or 'preview')
@@ -117,31 +115,71 @@ class PoseImageManager:
                         all_files.append(os.path.join(root, file))
 
         all_paths = all_files
+        timer.add("scan", time.perf_counter() - scan_start)
+        timer.count("files_scanned", len(all_paths))
         
         openpose_files = []
         other_files = []
         
         # 1. Classification
+        # Files already in the manifest with the same mtime/size keep their class. Every
+        # other file is classified on a worker pool, in scan order; the decode of each one
+        # that falls within its class's load quota is kept for the outputs.
+        max_load = 64
+        manifest = PoseManifest(image_dir)
+        decoded = {}
+        classes = {}
+        stats = {}
+        deferred = []
+        
         for path in all_paths:
             try:
-                if not os.path.exists(path):
-                    continue
-                    
-                i = Image.open(path)
-                i = ImageOps.exif_transpose(i)
-                if i.mode == 'I':
-                    i = i.point(lambda i: i * (1 / 255))
-                image_pil = i.convert("RGB")
-                image_np = np.array(image_pil)
-                
-                if self.is_openpose(image_np):
-                    openpose_files.append(path)
-                else:
-                    other_files.append(path)
-            except Exception as e:
-                print(f"Error processing {path}: {e}")
-                # Treat as other or skip? Let's skip if we can't read it.
+                stat = os.stat(path)
+            except OSError:
                 continue
+            stats[path] = stat
+            
+            is_openpose = manifest.lookup(path, stat)
+            if is_openpose is None:
+                deferred.append(path)
+            else:
+                classes[path] = is_openpose
+        
+        if deferred:
+            # Files of each class ahead of the pool's current result, in scan order
+            candidates = list(stats)
+            cursor = 0
+            ahead = {True: 0, False: 0}
+            loading = {True: load_openpose_images, False: load_example_images}
+
+            def keep_decode(path, is_openpose, image_np):
+                nonlocal cursor
+                if is_openpose is None:
+                    timer.count("rejected")
+                    return
+                manifest.record(path, stats[path], is_openpose)
+                classes[path] = is_openpose
+                while candidates[cursor] != path:
+                    earlier = classes.get(candidates[cursor])
+                    if earlier is not None:
+                        ahead[earlier] += 1
+                    cursor += 1
+                if loading[is_openpose] and ahead[is_openpose] < max_load:
+                    decoded[path] = image_np
+
+            with timer.stage("classify_pool"):
+                classify_in_pool(deferred, workers, on_result=keep_decode, store=store)
+            timer.count("decoded", len(deferred))
+            if timer.enabled:
+                timer.count("bytes_read", sum(stats[path].st_size for path in deferred))
+        
+        classified_count = len(deferred)
+        timer.count("from_manifest", len(stats) - classified_count)
+        manifest.prune(stats.keys())
+        
+        # Keep scan order
+        openpose_files = [p for p in all_paths if classes.get(p) is True]
+        other_files = [p for p in all_paths if classes.get(p) is False]
 
         # Helper to get base name without extension
         def get_base_name(p):
@@ -150,12 +188,13 @@ class PoseImageManager:
         # Map openpose base names for quick lookup
         op_bases = {get_base_name(p): p for p in openpose_files}
         
-        # Sort op_bases by length (descending) to ensure longest prefix match
-        sorted_op_bases = sorted(op_bases.keys(), key=len, reverse=True)
+        # Prefix index over the OpenPose base names: longest-prefix matching in O(len(name))
+        op_index = PosePrefixIndex(op_bases.keys())
         
         final_other_paths = []
         renamed_count = 0
         moved_count = 0
+        organize_start = time.perf_counter()
         
         # 2. Rename and Move Logic
         for path in other_files:
@@ -163,6 +202,8 @@ class PoseImageManager:
             filename = os.path.basename(current_path)
             base_name = get_base_name(current_path)
             ext = os.path.splitext(filename)[1]
+            # The OpenPose skeleton this image is an example of (if any)
+            matched_op_base = op_index.match(base_name)
             
             # --- Rename Logic ---
             if rename_non_openpose:
@@ -176,17 +217,6 @@ class PoseImageManager:
                         break
                 
                 if not should_skip_rename:
-                    matched_op_base = None
-                    for op_base in sorted_op_bases:
-                        if base_name.startswith(op_base):
-                            suffix = base_name[len(op_base):]
-                            if suffix == "":
-                                matched_op_base = op_base
-                                break
-                            elif not suffix[0].isdigit():
-                                matched_op_base = op_base
-                                break
-                    
                     if matched_op_base:
                         new_name = f"{matched_op_base}_sample{ext}"
                         new_full_path = os.path.join(os.path.dirname(current_path), new_name)
@@ -195,6 +225,7 @@ class PoseImageManager:
                             try:
                                 os.rename(current_path, new_full_path)
                                 print(f"Renamed: {filename} -> {new_name}")
+                                self.track_move(manifest, decoded, current_path, new_full_path)
                                 current_path = new_full_path
                                 filename = new_name 
                                 renamed_count += 1
@@ -218,6 +249,7 @@ class PoseImageManager:
                     try:
                         shutil.move(current_path, new_full_path)
                         print(f"Moved: {filename} -> examples/{filename}")
+                        self.track_move(manifest, decoded, current_path, new_full_path)
                         current_path = new_full_path
                         moved_count += 1
                     except OSError as e:
@@ -225,10 +257,19 @@ class PoseImageManager:
                 else:
                     print(f"Move skipped: {filename} already exists in examples/")
             
+            if matched_op_base:
+                # Persist the pair under the final path, so it survives the move out of the scan
+                manifest.set_pair(current_path, op_bases[matched_op_base])
+            
             final_other_paths.append(current_path)
 
+        timer.add("organize", time.perf_counter() - organize_start)
+
         # 3. Load Images for Output
-        max_load = 64
+        load_start = time.perf_counter()
+        # Tensors already loaded for the outputs, reused by the pair outputs
+        # (keyed like manifest.get_pairs() paths)
+        loaded_tensors = {}
         
         # Load OpenPose images
         loaded_openpose_images = []
@@ -243,9 +284,10 @@ class PoseImageManager:
             for path in openpose_files:
                 if op_loaded_count >= max_load:
                     break
-                img = self.load_image(path)
+                img = self.load_image(path, store, decoded.pop(path, None))
                 if img is not None:
                     loaded_openpose_images.append(img)
+                    loaded_tensors[os.path.normpath(os.path.abspath(path))] = img
                     op_loaded_count += 1
 
         # Load Other/Example images
@@ -261,13 +303,46 @@ class PoseImageManager:
             for path in final_other_paths:
                 if other_loaded_count >= max_load:
                     break
-                img = self.load_image(path)
+                img = self.load_image(path, store, decoded.pop(path, None))
                 if img is not None:
                     loaded_other_images.append(img)
+                    loaded_tensors[os.path.normpath(os.path.abspath(path))] = img
                     other_loaded_count += 1
 
+        # 4. Aligned (skeleton, example) pairs straight from the pairing index
+        pair_openpose_images = []
+        pair_example_images = []
+        pair_openpose_paths = []
+        pair_example_paths = []
+        pairs = manifest.get_pairs()
+        if output_pairs:
+            for openpose_path, example_path in pairs[:max_load]:
+                op_img = loaded_tensors.get(openpose_path)
+                if op_img is None:
+                    op_img = loaded_tensors[openpose_path] = self.load_image(openpose_path, store)
+                ex_img = loaded_tensors.get(example_path)
+                if ex_img is None:
+                    ex_img = loaded_tensors[example_path] = self.load_image(example_path, store)
+                if op_img is None or ex_img is None:
+                    continue
+                pair_openpose_images.append(op_img)
+                pair_example_images.append(ex_img)
+                pair_openpose_paths.append(openpose_path)
+                pair_example_paths.append(example_path)
+
+        timer.add("load", time.perf_counter() - load_start)
+        timer.count("loaded", len(loaded_tensors))
+
+        manifest.save()
+        if store is not None:
+            store.flush()
+
         # Generate Result Text
         result_text = f"Found {len(openpose_files)} OpenPose images and {len(other_files)} other images.\n"
+        result_text += f"Paired {len(pairs)} example images with OpenPose skeletons.\n"
+        if output_pairs and len(pairs) > max_load:
+            result_text += f"WARNING: Too many pairs found. Output only {max_load} of {len(pairs)}.\n"
+        result_text += f"Classified {classified_count} new or changed files ({len(all_paths) - classified_count} from manifest).\n"
         
         if load_openpose_images and len(openpose_files) > max_load:
             result_text += f"WARNING: Too many OpenPose images found. Loaded only {max_load} of {len(openpose_files)}.\n"
@@ -299,4 +374,6 @@ class PoseImageManager:
             else:
                  result_text += "No 'other' images found to process.\n"
 
-        return (loaded_other_images, final_other_paths_valid, loaded_openpose_images, final_openpose_paths, result_text)
+        timer.finish()
+        return (loaded_other_images, final_other_paths_valid, loaded_openpose_images, final_openpose_paths, result_text,
+                pair_openpose_images, pair_example_images, pair_openpose_paths, pair_example_paths)
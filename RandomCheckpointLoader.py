@@ -1,31 +1,26 @@
-import os
 import random
-from folder_paths import get_filename_list
+import folder_paths
 from server import PromptServer
+from .checkpoint_catalog import CATALOG
+from .safetensors_index import INDEX, ARCHITECTURES
+from .checkpoint_prefetch import PREFETCHER, PREFETCH_MODES
 
 class RandomCheckpointLoader:
     @classmethod
     def INPUT_TYPES(s):
-        # Get all checkpoint filenames to extract folders
-        ckpt_list = get_filename_list("checkpoints")
-        folders = set()
-        folders.add("All")
-        folders.add("Root")
-        for ckpt in ckpt_list:
-            dirname = os.path.dirname(ckpt)
-            if dirname:
-                folders.add(dirname)
-        
-        sorted_folders = sorted(list(folders))
-        
+        # Folder suggestions and checkpoint lists are served lazily by
+        # /web/gallery/checkpoints* instead of being embedded in every /object_info payload
         return {
             "required": {
-                "folder": ("STRING", {"default": "All", "multiline": True, "placeholder": "Folder names to include (comma separated, e.g. All, Root, SDXL, v1.5)", "folder_suggestions": sorted_folders, "all_checkpoints": ckpt_list}),
+                "folder": ("STRING", {"default": "All", "multiline": True, "placeholder": "Folder names to include (comma separated, e.g. All, Root, SDXL, v1.5)"}),
                 "seed": ("INT", {"default": 0, "min": 0, "max": 0xffffffffffffffff}),
             },
             "optional": {
                 "exclude_names": ("STRING", {"default": "", "multiline": True, "placeholder": "Checkpoints or subfolders to exclude (comma separated)"}),
                 "force_checkpoint": ("STRING", {"default": "", "multiline": False, "placeholder": "Force specific checkpoint (leave empty for random)"}),
+                "architecture": (ARCHITECTURES, {"default": "Any", "tooltip": "Only pick checkpoints of this architecture (read from safetensors headers)"}),
+                "prefetch": (PREFETCH_MODES, {"default": "off", "tooltip": "Warm the page cache for the selected checkpoint in the background and report cold/warm read times (fadvise: kernel readahead in the background, timing only a small sample; read-ahead: read and time the whole file)"}),
+                "prefetch_next": ("BOOLEAN", {"default": False, "tooltip": "Also warm the checkpoint seed + 1 would pick"}),
             },
             "hidden": {"unique_id": "UNIQUE_ID"},
         }
@@ -36,51 +31,22 @@ class RandomCheckpointLoader:
     FUNCTION = "get_checkpoints"
     CATEGORY = "Web Gallery Tools"
 
-    def get_checkpoints(self, folder, seed, exclude_names="", force_checkpoint="", unique_id=None):
+    def get_checkpoints(self, folder, seed, exclude_names="", force_checkpoint="", architecture="Any", prefetch="off", prefetch_next=False, unique_id=None):
         # Check force_checkpoint first
         if force_checkpoint and force_checkpoint.strip():
             selected = force_checkpoint.strip()
             # Notify UI of forced selection too
-            if unique_id:
-                PromptServer.instance.send_sync("web_gallery.random_checkpoint.update", {"node_id": unique_id, "checkpoint": selected, "mode": "fixed"})
+            self.notify(unique_id, selected, "fixed")
+            self.warm(selected, prefetch, unique_id, "fixed")
             return (selected,)
 
-        all_checkpoints = get_filename_list("checkpoints")
-        candidates = []
-        
-        # Filter by folder(s)
-        folders = [f.strip() for f in folder.replace('\n', ',').split(',') if f.strip()]
-        if not folders:
-            folders = ["All"]
-            
-        for f in folders:
-            if f == "All":
-                candidates.extend(all_checkpoints)
-            elif f == "Root":
-                candidates.extend([c for c in all_checkpoints if not os.path.dirname(c)])
-            else:
-                # Match exact folder or subfolders of that folder
-                candidates.extend([c for c in all_checkpoints if os.path.dirname(c) == f or os.path.dirname(c).startswith(f + os.sep) or os.path.dirname(c).startswith(f + "/")])
-        
-        # Remove duplicates
-        candidates = list(set(candidates))
-            
-        # Exclude
-        if exclude_names:
-            excludes = [e.strip() for e in exclude_names.replace('\n', ',').split(',') if e.strip()]
-            filtered = []
-            for ckpt in candidates:
-                should_exclude = False
-                for exc in excludes:
-                    if exc in ckpt:
-                        should_exclude = True
-                        break
-                if not should_exclude:
-                    filtered.append(ckpt)
-            candidates = filtered
+        # Cached, precompiled folder/exclude filtering (sorted, so a seed always picks the same file)
+        candidates = CATALOG.select(folder, exclude_names)
+        if architecture and architecture != "Any":
+            candidates = [c for c in candidates if INDEX.architecture(c) == architecture]
             
         if not candidates:
-            print(f"Warning: No checkpoints found in folders '{folder}' after exclusion.")
+            print(f"Warning: No checkpoints found in folders '{folder}' after exclusion (architecture: {architecture}).")
             return ("",)
             
         rng = random.Random(seed)
@@ -89,7 +55,32 @@ class RandomCheckpointLoader:
         selected = rng.choice(candidates)
         
         # Notify UI
-        if unique_id:
-            PromptServer.instance.send_sync("web_gallery.random_checkpoint.update", {"node_id": unique_id, "checkpoint": selected, "mode": "random"})
+        self.notify(unique_id, selected, "random")
+        self.warm(selected, prefetch, unique_id, "random")
+        if prefetch_next:
+            # Queued after the current pick, so it never competes with it for bandwidth
+            self.warm(random.Random(seed + 1).choice(candidates), prefetch)
             
         return (selected,)
+
+    def notify(self, unique_id, selected, mode, prefetch_stats=None):
+        if not unique_id:
+            return
+        data = {"node_id": unique_id, "checkpoint": selected, "mode": mode}
+        if prefetch_stats is not None:
+            data["prefetch"] = prefetch_stats
+        PromptServer.instance.send_sync("web_gallery.random_checkpoint.update", data)
+
+    def warm(self, name, prefetch, unique_id=None, mode=None):
+        if prefetch == "off" or not name:
+            return
+        full_path = folder_paths.get_full_path("checkpoints", name)
+        if not full_path:
+            return
+
+        on_done = None
+        if unique_id:
+            # Report cold/warm read timings to the node once the warmup finishes
+            def on_done(stats):
+                self.notify(unique_id, name, mode, stats)
+        PREFETCHER.prefetch(full_path, prefetch, on_done)
@@ -1,8 +1,9 @@
 import os
 import random
-import torch
 import numpy as np
-from PIL import Image, ImageOps
+from .image_batch import OUTPUT_MODES, RESIZE_POLICIES, TensorBatch, batch_report, to_list_tensor
+from .decoded_store import DecodedImageStore, load_rgb_array
+from .node_timing import stage_timer
 
 class RandomImageBatcher:
     @classmethod
@@ -18,7 +19,13 @@ class RandomImageBatcher:
             },
             "optional": {
                 "names_to_skip": ("STRING", {"default": "preview, previews, sample, samples, example, linart, lineart", "multiline": True, "placeholder": "Comma separated folder/file names to skip (e.g. preview, previews)"}),
-            }
+                "output_mode": (OUTPUT_MODES, {"default": "list", "tooltip": "list: one tensor per image. batch: a single [B,H,W,3] tensor filled in place"}),
+                "batch_width": ("INT", {"default": 0, "min": 0, "max": 16384, "step": 8, "tooltip": "Batch mode target width (0 = width of the first image)"}),
+                "batch_height": ("INT", {"default": 0, "min": 0, "max": 16384, "step": 8, "tooltip": "Batch mode target height (0 = height of the first image)"}),
+                "resize_policy": (RESIZE_POLICIES, {"default": "resize", "tooltip": "How batch mode fits images of a different size: resize (stretch), crop (cover + center crop) or pad (fit + black borders)"}),
+                "use_decoded_cache": ("BOOLEAN", {"default": False, "tooltip": "Keep decoded pixels in a memory-mapped on-disk store so repeated runs skip PNG/JPEG decoding"}),
+            },
+            "hidden": {"unique_id": "UNIQUE_ID"},
         }
 
     RETURN_TYPES = ("IMAGE", "STRING", "INT")
@@ -46,7 +53,7 @@ class RandomImageBatcher:
         black_ratio = np.mean(black_pixels)
         return black_ratio > 0.8
 
-    def get_random_batch(self, image_paths, seed, batch_size, load_images, check_openpose, check_canny, names_to_skip=""):
+    def get_random_batch(self, image_paths, seed, batch_size, load_images, check_openpose, check_canny, names_to_skip="", output_mode="list", batch_width=0, batch_height=0, resize_policy="resize", use_decoded_cache=False, unique_id=None):
         # image_paths comes in as a list of strings
         # Since INPUT_IS_LIST = True, all inputs are lists.
         # But for seed, batch_size, load_images, we usually want the first value if they are single values but wrapped in list
@@ -72,6 +79,14 @@ class RandomImageBatcher:
         should_load = load_images[0] if isinstance(load_images, list) else load_images
         do_openpose = check_openpose[0] if isinstance(check_openpose, list) else check_openpose
         do_canny = check_canny[0] if isinstance(check_canny, list) else check_canny
+        current_output_mode = output_mode[0] if isinstance(output_mode, list) else output_mode
+        current_width = batch_width[0] if isinstance(batch_width, list) else batch_width
+        current_height = batch_height[0] if isinstance(batch_height, list) else batch_height
+        current_policy = resize_policy[0] if isinstance(resize_policy, list) else resize_policy
+        use_store = use_decoded_cache[0] if isinstance(use_decoded_cache, list) else use_decoded_cache
+        node_id = unique_id[0] if isinstance(unique_id, list) else unique_id
+        timer = stage_timer("RandomImageBatcher", node_id)
+        timer.count("files_scanned", len(paths))
         
         # Handle names_to_skip
         skip_names_str = names_to_skip[0] if isinstance(names_to_skip, list) else names_to_skip
@@ -84,19 +99,21 @@ class RandomImageBatcher:
              
         # Filter paths based on names_to_skip
         if skip_names:
-            filtered_paths = []
-            for path in paths:
-                path_lower = path.lower().replace('\\', '/')
-                
-                # Check if any skip name is in the path
-                should_skip = False
-                for skip in skip_names:
-                    if skip in path_lower:
-                        should_skip = True
-                        break
-                
-                if not should_skip:
-                    filtered_paths.append(path)
+            with timer.stage("filter"):
+                filtered_paths = []
+                for path in paths:
+                    path_lower = path.lower().replace('\\', '/')
+                    
+                    # Check if any skip name is in the path
+                    should_skip = False
+                    for skip in skip_names:
+                        if skip in path_lower:
+                            should_skip = True
+                            break
+                    
+                    if not should_skip:
+                        filtered_paths.append(path)
+            timer.count("skipped_by_name", len(paths) - len(filtered_paths))
             paths = filtered_paths
             
         if not paths:
@@ -106,8 +123,23 @@ class RandomImageBatcher:
         # Use local random instance
         rng = random.Random(current_seed)
         
+        batch_mode = current_output_mode == "batch" and should_load
+        batch = TensorBatch(current_batch_size, current_width, current_height, current_policy) if batch_mode else None
+        report = batch_report("RandomImageBatcher", "batch" if batch_mode else "list")
+        
+        store = None
+        if use_store:
+            # Paths can come from anywhere, so the store is keyed on their common directory
+            try:
+                store = DecodedImageStore.for_directory(os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in paths]))
+            except ValueError:
+                # Paths on different drives have no common directory
+                store = None
+        
         loaded_images = []
         final_paths = []
+        # Index of each accepted path in loaded_images / the batch buffer, so reused picks don't reload
+        loaded_slots = {}
         
         # Create a copy of files to pick from
         available_files = list(paths)
@@ -118,49 +150,37 @@ class RandomImageBatcher:
             path = available_files.pop(0)
             
             try:
-                # We MUST load the image to check content if validation is enabled
-                if do_openpose or do_canny:
-                    if not os.path.exists(path):
-                        continue
-                        
-                    i = Image.open(path)
-                    i = ImageOps.exif_transpose(i)
-                    if i.mode == 'I':
-                        i = i.point(lambda i: i * (1 / 255))
-                    image_pil = i.convert("RGB")
-                    image_np = np.array(image_pil)
+                if not (do_openpose or do_canny or should_load):
+                    # Nothing to validate or load, the path is enough
+                    final_paths.append(path)
+                    continue
                     
-                    # Validate
-                    is_valid = True
-                    if do_openpose and not self.is_openpose(image_np):
-                        is_valid = False
-                    if do_canny and not self.is_canny(image_np):
-                        is_valid = False
-                        
-                    if not is_valid:
-                        continue # Skip this image, try next
-                        
-                    # If valid, process for output
-                    image_tensor = image_np.astype(np.float32) / 255.0
-                    image_tensor = torch.from_numpy(image_tensor)[None,]
+                if not os.path.exists(path):
+                    continue
+                
+                # Decode once (or map from the decoded store), used for both validation and output
+                with timer.stage("decode"):
+                    image_np = load_rgb_array(path, store)
+                timer.count("decoded")
+                if timer.enabled:
+                    timer.count("bytes_read", os.path.getsize(path))
+                
+                # We MUST look at the content if validation is enabled
+                with timer.stage("validate"):
+                    rejected = (do_openpose and not self.is_openpose(image_np)) or (do_canny and not self.is_canny(image_np))
+                if rejected:
+                    timer.count("rejected")
+                    continue # Skip this image, try next
                     
-                    if should_load:
-                        loaded_images.append(image_tensor)
-                    final_paths.append(path)
-                else:
-                    # No validation needed
-                    final_paths.append(path)
-                    if should_load:
-                        if not os.path.exists(path):
-                            continue
-                        i = Image.open(path)
-                        i = ImageOps.exif_transpose(i)
-                        if i.mode == 'I':
-                            i = i.point(lambda i: i * (1 / 255))
-                        image = i.convert("RGB")
-                        image = np.array(image).astype(np.float32) / 255.0
-                        image = torch.from_numpy(image)[None,]
-                        loaded_images.append(image)
+                if should_load:
+                    with timer.stage("tensor"):
+                        if batch_mode:
+                            loaded_slots[path] = batch.add(image_np)
+                        else:
+                            loaded_slots[path] = len(loaded_images)
+                            loaded_images.append(to_list_tensor(image_np))
+                    report.record(image_np.shape[0], image_np.shape[1])
+                final_paths.append(path)
 
             except Exception as e:
                 print(f"Error processing {path}: {e}")
@@ -174,15 +194,22 @@ class RandomImageBatcher:
             extras = rng.choices(final_paths, k=needed)
             for path in extras:
                  final_paths.append(path)
-                 if should_load:
-                     try:
-                        i = Image.open(path)
-                        i = ImageOps.exif_transpose(i)
-                        image = i.convert("RGB")
-                        image = np.array(image).astype(np.float32) / 255.0
-                        image = torch.from_numpy(image)[None,]
-                        loaded_images.append(image)
-                     except:
-                        pass
+                 if should_load and path in loaded_slots:
+                     # Reuse the already decoded image instead of reloading it
+                     if batch_mode:
+                         batch.repeat(loaded_slots[path])
+                     else:
+                         loaded_images.append(loaded_images[loaded_slots[path]].clone())
+
+        if store is not None:
+            store.flush()
+
+        if batch_mode:
+            output = batch.result()
+            loaded_images = [output] if output is not None else []
+            report.log(output.numel() * output.element_size() if output is not None else None)
+        else:
+            report.log()
+        timer.finish()
              
         return (loaded_images, final_paths, len(final_paths))
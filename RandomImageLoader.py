@@ -1,8 +1,10 @@
 import os
 import random
-import torch
 import numpy as np
-from PIL import Image, ImageOps
+from .image_batch import OUTPUT_MODES, RESIZE_POLICIES, TensorBatch, batch_report, to_list_tensor
+from .decoded_store import DecodedImageStore, load_rgb_array
+from .image_scan import iter_image_paths, reservoir_sample
+from .node_timing import stage_timer
 
 class RandomImageLoader:
     @classmethod
@@ -19,7 +21,14 @@ class RandomImageLoader:
             },
             "optional": {
                 "names_to_skip": ("STRING", {"default": "preview, previews, sample, samples, example, linart, lineart", "multiline": True, "placeholder": "Comma separated folder/file names to skip (e.g. preview, previews)"}),
-            }
+                "output_mode": (OUTPUT_MODES, {"default": "list", "tooltip": "list: one tensor per image. batch: a single [B,H,W,3] tensor filled in place"}),
+                "batch_width": ("INT", {"default": 0, "min": 0, "max": 16384, "step": 8, "tooltip": "Batch mode target width (0 = width of the first image)"}),
+                "batch_height": ("INT", {"default": 0, "min": 0, "max": 16384, "step": 8, "tooltip": "Batch mode target height (0 = height of the first image)"}),
+                "resize_policy": (RESIZE_POLICIES, {"default": "resize", "tooltip": "How batch mode fits images of a different size: resize (stretch), crop (cover + center crop) or pad (fit + black borders)"}),
+                "use_decoded_cache": ("BOOLEAN", {"default": False, "tooltip": "Keep decoded pixels in a memory-mapped on-disk store so repeated runs skip PNG/JPEG decoding"}),
+                "sampling": (["shuffle", "reservoir"], {"default": "shuffle", "tooltip": "shuffle: list and shuffle every file. reservoir: sample while scanning, memory proportional to batch size"}),
+            },
+            "hidden": {"unique_id": "UNIQUE_ID"},
         }
 
     RETURN_TYPES = ("IMAGE", "STRING", "INT")
@@ -67,122 +76,121 @@ class RandomImageLoader:
         # Canny edges are thin, so background is dominant
         return black_ratio > 0.8
 
-    def load_random_images(self, image_dir, subfolders, seed, batch_size, load_images, check_openpose, check_canny, names_to_skip=""):
+    def load_random_images(self, image_dir, subfolders, seed, batch_size, load_images, check_openpose, check_canny, names_to_skip="", output_mode="list", batch_width=0, batch_height=0, resize_policy="resize", use_decoded_cache=False, sampling="shuffle", unique_id=None):
         if not os.path.isdir(image_dir):
             raise FileNotFoundError(f"Directory '{image_dir}' cannot be found.")
+        timer = stage_timer("RandomImageLoader", unique_id)
             
-        valid_extensions = ['.jpg', '.jpeg', '.png', '.webp']
-        image_files = []
-        
-        # 1. Recursive Scan
-        if subfolders:
-            for root, dirs, files in os.walk(image_dir):
-                for file in files:
-                    if any(file.lower().endswith(ext) for ext in valid_extensions):
-                        image_files.append(os.path.join(root, file))
-        else:
-            image_files = [os.path.join(image_dir, f) for f in os.listdir(image_dir) if any(f.lower().endswith(ext) for ext in valid_extensions)]
-        
-        if not image_files:
-            raise FileNotFoundError(f"No valid images found in '{image_dir}'.")
-            
-        total_found = len(image_files)
-        
-        # 2. Filter Skip Names
+        # Skip list applies to the whole path (folders and file names)
         skip_names = []
         if names_to_skip:
             skip_names = [f.strip().lower() for f in names_to_skip.split(',') if f.strip()]
             
-        filtered_files = []
-        if skip_names:
-            for path in image_files:
-                path_lower = path.lower().replace('\\', '/')
-                
-                should_skip = False
-                for skip in skip_names:
-                    if skip in path_lower:
-                        should_skip = True
-                        break
+        def is_not_skipped(path):
+            path_lower = path.lower().replace('\\', '/')
+            return not any(skip in path_lower for skip in skip_names)
+
+        rng = random.Random(seed)
+
+        if sampling == "reservoir":
+            # 1+2. Sample straight from the directory stream, filtering on the fly
+            # Validation can reject picks, so draw a few spares when it is enabled
+            pool_size = batch_size * 4 if (check_openpose or check_canny) else batch_size
+            with timer.stage("scan"):
+                sample, total_found, accepted = reservoir_sample(iter_image_paths(image_dir, subfolders), pool_size, random.Random(seed), is_not_skipped)
+            timer.count("files_scanned", total_found)
+            timer.count("skipped_by_name", total_found - accepted)
+            if total_found == 0:
+                raise FileNotFoundError(f"No valid images found in '{image_dir}'.")
+            if accepted == 0:
+                return ([], [], total_found)
+            candidates = self.reservoir_candidates(image_dir, subfolders, seed, is_not_skipped, sample, pool_size, accepted)
+        else:
+            valid_extensions = ['.jpg', '.jpeg', '.png', '.webp']
+            image_files = []
+            
+            # 1. Recursive Scan
+            with timer.stage("scan"):
+                if subfolders:
+                    for root, dirs, files in os.walk(image_dir):
+                        for file in files:
+                            if any(file.lower().endswith(ext) for ext in valid_extensions):
+                                image_files.append(os.path.join(root, file))
+                else:
+                    image_files = [os.path.join(image_dir, f) for f in os.listdir(image_dir) if any(f.lower().endswith(ext) for ext in valid_extensions)]
+            timer.count("files_scanned", len(image_files))
+            
+            if not image_files:
+                raise FileNotFoundError(f"No valid images found in '{image_dir}'.")
                 
-                if not should_skip:
-                    filtered_files.append(path)
-            image_files = filtered_files
-        
-        if not image_files:
-             return ([], [], total_found)
+            total_found = len(image_files)
+            
+            # 2. Filter Skip Names
+            if skip_names:
+                with timer.stage("filter"):
+                    image_files = [path for path in image_files if is_not_skipped(path)]
+                timer.count("skipped_by_name", total_found - len(image_files))
+            
+            if not image_files:
+                 return ([], [], total_found)
+
+            # Shuffle initially to ensure random pick order
+            rng.shuffle(image_files)
+            candidates = iter(image_files)
 
         # 3. Random Selection with Validation
-        rng = random.Random(seed)
+        batch_mode = output_mode == "batch" and load_images
+        batch = TensorBatch(batch_size, batch_width, batch_height, resize_policy) if batch_mode else None
+        report = batch_report("RandomImageLoader", "batch" if batch_mode else "list")
+        store = DecodedImageStore.for_directory(image_dir) if use_decoded_cache else None
         
         loaded_images = []
         final_paths = []
+        # Index of each accepted path in loaded_images / the batch buffer, so reused picks don't reload
+        loaded_slots = {}
         
-        # Create a copy of files to pick from
-        available_files = list(image_files)
-        # Shuffle initially to ensure random pick order
-        rng.shuffle(available_files)
-        
-        attempts = 0
-        max_attempts = len(available_files) * 2 # Safety break
-        
-        while len(final_paths) < batch_size and available_files:
-            if not available_files:
-                break
-                
+        for path in candidates:
             # Pick a file
-            # If we need random selection with replacement (when batch_size > available), 
-            # we might need different logic. But for "validation" logic, usually we want unique valid images first.
             # If batch_size > available valid images, we can't fulfill it without duplicates.
             # Let's try to find unique valid images first.
             
-            path = available_files.pop(0)
-            
             try:
-                # We MUST load the image to check content if validation is enabled
-                if check_openpose or check_canny:
-                    if not os.path.exists(path):
-                        continue
-                        
-                    i = Image.open(path)
-                    i = ImageOps.exif_transpose(i)
-                    if i.mode == 'I':
-                        i = i.point(lambda i: i * (1 / 255))
-                    image_pil = i.convert("RGB")
-                    image_np = np.array(image_pil)
+                if not (check_openpose or check_canny or load_images):
+                    # Nothing to validate or load, the path is enough
+                    final_paths.append(path)
+                    if len(final_paths) >= batch_size:
+                        break
+                    continue
                     
-                    # Validate
-                    is_valid = True
-                    if check_openpose and not self.is_openpose(image_np):
-                        is_valid = False
-                    if check_canny and not self.is_canny(image_np):
-                        is_valid = False
-                        
-                    if not is_valid:
-                        continue # Skip this image, try next
-                        
-                    # If valid, process for output
-                    image_tensor = image_np.astype(np.float32) / 255.0
-                    image_tensor = torch.from_numpy(image_tensor)[None,]
+                if not os.path.exists(path):
+                    continue
+                
+                # Decode once (or map from the decoded store), used for both validation and output
+                with timer.stage("decode"):
+                    image_np = load_rgb_array(path, store)
+                timer.count("decoded")
+                if timer.enabled:
+                    timer.count("bytes_read", os.path.getsize(path))
+                
+                # We MUST look at the content if validation is enabled
+                with timer.stage("validate"):
+                    rejected = (check_openpose and not self.is_openpose(image_np)) or (check_canny and not self.is_canny(image_np))
+                if rejected:
+                    timer.count("rejected")
+                    continue # Skip this image, try next
                     
-                    if load_images:
-                        loaded_images.append(image_tensor)
-                    final_paths.append(path)
-                else:
-                    # No validation needed
-                    final_paths.append(path)
-                    if load_images:
-                        # Load image logic duplicated here or we can structure differently
-                        # For efficiency, if validation not needed, we shouldn't have loaded it above
-                        if not os.path.exists(path):
-                            continue
-                        i = Image.open(path)
-                        i = ImageOps.exif_transpose(i)
-                        if i.mode == 'I':
-                            i = i.point(lambda i: i * (1 / 255))
-                        image = i.convert("RGB")
-                        image = np.array(image).astype(np.float32) / 255.0
-                        image = torch.from_numpy(image)[None,]
-                        loaded_images.append(image)
+                if load_images:
+                    with timer.stage("tensor"):
+                        if batch_mode:
+                            loaded_slots[path] = batch.add(image_np)
+                        else:
+                            loaded_slots[path] = len(loaded_images)
+                            loaded_images.append(to_list_tensor(image_np))
+                    report.record(image_np.shape[0], image_np.shape[1])
+                final_paths.append(path)
+                # Stop before pulling another candidate (a reservoir refill rescans the tree)
+                if len(final_paths) >= batch_size:
+                    break
 
             except Exception as e:
                 print(f"Error processing {path}: {e}")
@@ -196,19 +204,37 @@ class RandomImageLoader:
             extras = rng.choices(final_paths, k=needed)
             for path in extras:
                  final_paths.append(path)
-                 if load_images:
-                     # We need to find the matching loaded image or reload
-                     # Since we might not have kept mapping, reloading is safer but slower.
-                     # Or we can just duplicate the tensor if we have it.
-                     # Simplest is to reload or copy.
-                     try:
-                        i = Image.open(path)
-                        i = ImageOps.exif_transpose(i)
-                        image = i.convert("RGB")
-                        image = np.array(image).astype(np.float32) / 255.0
-                        image = torch.from_numpy(image)[None,]
-                        loaded_images.append(image)
-                     except:
-                        pass
+                 if load_images and path in loaded_slots:
+                     # Reuse the already decoded image instead of reloading it
+                     if batch_mode:
+                         batch.repeat(loaded_slots[path])
+                     else:
+                         loaded_images.append(loaded_images[loaded_slots[path]].clone())
+
+        if store is not None:
+            store.flush()
+
+        if batch_mode:
+            output = batch.result()
+            loaded_images = [output] if output is not None else []
+            report.log(output.numel() * output.element_size() if output is not None else None)
+        else:
+            report.log()
+        timer.finish()
 
         return (loaded_images, final_paths, total_found)
+
+    def reservoir_candidates(self, image_dir, subfolders, seed, accept, sample, pool_size, accepted):
+        # Yield reservoir picks in key order. If validation rejects the whole pool,
+        # rescan with a pool twice as large: the same seed draws the same keys,
+        # so the larger sample extends the sequence and tried paths are just skipped.
+        tried = set()
+        while True:
+            for path in sample:
+                if path not in tried:
+                    tried.add(path)
+                    yield path
+            if pool_size >= accepted:
+                return
+            pool_size *= 2
+            sample, _, accepted = reservoir_sample(iter_image_paths(image_dir, subfolders), pool_size, random.Random(seed), accept)
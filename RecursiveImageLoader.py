@@ -1,4 +1,6 @@
 import os
+import random
+from .path_manifest import PathManifest
 
 class RecursiveImageLoader:
     @classmethod
@@ -11,7 +13,10 @@ class RecursiveImageLoader:
             "optional": {
                 "batch_size": ("INT", {"default": 0, "min": 0, "step": 1, "tooltip": "Number of images to load (0 = all images)"}),
                 "start_from": ("INT", {"default": 1, "min": 1, "step": 1, "tooltip": "Start from Nth image (1 = first image)"}),
-                "sort_method": (["sequential", "reverse", "random"], {"default": "sequential", "tooltip": "Image loading order: sequential/reverse/random"})
+                "sort_method": (["sequential", "reverse", "random"], {"default": "sequential", "tooltip": "Image loading order: sequential/reverse/random"}),
+                "streaming": ("BOOLEAN", {"default": False, "tooltip": "Read batches from a persisted, sorted manifest and advance a named cursor on every run instead of rescanning the directory"}),
+                "cursor_name": ("STRING", {"default": "default", "multiline": False, "tooltip": "Streaming cursor to advance (separate names iterate independently)"}),
+                "rebuild_manifest": ("BOOLEAN", {"default": False, "tooltip": "Force a rebuild of the streaming manifest (it is rebuilt automatically when a file is added to or removed from any scanned directory, detected by each directory's mtime)"}),
             }
         }
 
@@ -25,11 +30,18 @@ class RecursiveImageLoader:
     def IS_CHANGED(cls, **kwargs):
         if 'sort_method' in kwargs and kwargs['sort_method'] == "random":
             return float("NaN")
+        if kwargs.get('streaming'):
+            # The cursor moves on every run
+            return float("NaN")
         return hash(frozenset(kwargs))
 
-    def get_image_paths(self, image_dir: str, subfolders: bool = False, batch_size: int = 0, start_from: int = 1, sort_method: str = "sequential"):
+    def get_image_paths(self, image_dir: str, subfolders: bool = False, batch_size: int = 0, start_from: int = 1, sort_method: str = "sequential",
+                        streaming: bool = False, cursor_name: str = "default", rebuild_manifest: bool = False):
         if not os.path.isdir(image_dir):
             raise FileNotFoundError(f"Directory '{image_dir}' cannot be found.")
+
+        if streaming:
+            return self.stream_image_paths(image_dir, subfolders, batch_size, start_from, sort_method, cursor_name, rebuild_manifest)
             
         valid_extensions = ['.jpg', '.jpeg', '.png', '.webp']
         image_files = []
@@ -50,7 +62,6 @@ class RecursiveImageLoader:
         elif sort_method == "reverse":
             image_files.sort(reverse=True)
         elif sort_method == "random":
-            import random
             random.shuffle(image_files)
 
         start_index = min(start_from - 1, len(image_files) - 1)
@@ -62,3 +73,30 @@ class RecursiveImageLoader:
             image_files = image_files[:batch_size]
         
         return (image_files, len(image_files))
+
+    def stream_image_paths(self, image_dir, subfolders, batch_size, start_from, sort_method, cursor_name, rebuild_manifest):
+        manifest = PathManifest(image_dir, subfolders)
+        manifest.ensure(rebuild=rebuild_manifest)
+
+        total = manifest.count()
+        if total == 0:
+            raise FileNotFoundError(f"No valid images found in '{image_dir}'.")
+
+        if sort_method == "random":
+            # No cursor needed, sample positions straight from the manifest
+            count = batch_size if batch_size > 0 else total
+            positions = random.sample(range(total), min(count, total))
+            image_files = manifest.read(positions)
+            return (image_files, len(image_files))
+
+        name = (cursor_name or "default").strip() or "default"
+        position, step = manifest.advance(f"{sort_method}:{name}", max(start_from - 1, 0), batch_size)
+        if sort_method == "reverse":
+            # Position counts from the end of the sorted manifest
+            end = total - position
+            image_files = manifest.read_range(max(end - step, 0), min(step, end))
+            image_files.reverse()
+        else:
+            image_files = manifest.read_range(position, step)
+
+        return (image_files, len(image_files))
@@ -0,0 +1,78 @@
+"""Compare time and measured peak memory of the loaders' list and batch output modes.
+
+Writes synthetic PNGs to a temporary directory, then builds the output both ways the
+random loaders do (list: one [1,H,W,3] tensor per image, then the torch.cat most
+downstream nodes do; batch: one preallocated [B,H,W,3] buffer). Each mode runs in its own
+process so one mode's freed memory can't hide the other's peak.
+
+    python benchmarks/image_batch.py --count 32 --width 1024 --height 1024
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import torch  # noqa: E402
+from PIL import Image  # noqa: E402
+from image_batch import TensorBatch, PeakMemory, open_rgb, to_list_tensor  # noqa: E402
+
+
+def run_mode(mode, paths):
+    # (seconds, measured peak bytes) of building the output in one mode
+    memory = PeakMemory()
+    start = time.perf_counter()
+    if mode == "list":
+        images = [to_list_tensor(np.array(open_rgb(path))) for path in paths]
+        output = torch.cat(images, dim=0)
+        tensor_bytes = sum(t.numel() * t.element_size() for t in images) + output.numel() * output.element_size()
+    else:
+        batch = TensorBatch(len(paths))
+        for path in paths:
+            batch.add(np.array(open_rgb(path)))
+        output = batch.result()
+        tensor_bytes = output.numel() * output.element_size()
+    elapsed = time.perf_counter() - start
+    return elapsed, memory.stop(tensor_bytes), memory.source
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=16, help="images per batch")
+    parser.add_argument("--width", type=int, default=1024)
+    parser.add_argument("--height", type=int, default=1024)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mode", choices=("list", "batch"), help=argparse.SUPPRESS)
+    parser.add_argument("--dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        # Child process: measure one mode and print "seconds peak_bytes source"
+        paths = sorted(os.path.join(args.dir, name) for name in os.listdir(args.dir))
+        elapsed, peak, source = run_mode(args.mode, paths)
+        print(f"{elapsed} {peak} {source}")
+        return
+
+    rng = np.random.default_rng(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(args.count):
+            pixels = rng.integers(0, 256, (args.height, args.width, 3), dtype=np.uint8)
+            Image.fromarray(pixels).save(os.path.join(tmp, f"{i:04d}.png"), compress_level=1)
+        output_mb = args.count * args.height * args.width * 3 * 4 / 2**20
+        print(f"{args.count} images of {args.width}x{args.height}, float32 output {output_mb:.1f} MB")
+        print(f"{'mode':<6} {'ms':>9} {'ms/image':>9} {'peak MB':>9}  measured by")
+        for mode in ("list", "batch"):
+            result = subprocess.run([sys.executable, os.path.abspath(__file__), "--mode", mode, "--dir", tmp],
+                                    capture_output=True, text=True, check=True)
+            elapsed, peak, source = result.stdout.split(" ", 2)
+            elapsed, peak = float(elapsed), int(peak)
+            print(f"{mode:<6} {elapsed * 1000:>9.1f} {elapsed * 1000 / args.count:>9.1f} "
+                  f"{peak / 2**20:>9.1f}  {source.strip()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Compare thumbnail lookup latency of the per-file cache and the SQLite blob store.
+
+Fills both stores with the same synthetic thumbnails in a temporary directory, then
+times random hits (lookup plus reading the JPEG bytes) and misses.
+
+    python benchmarks/thumbnail_store.py --count 50000 --lookups 20000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gallery_thumbnails import FileThumbnailStore, SqliteThumbnailStore  # noqa: E402
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+def read_hit(cached):
+    if isinstance(cached, bytes):
+        return cached
+    with open(cached, "rb") as f:
+        return f.read()
+
+
+def bench(store, sources, lookups, seed):
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    for path, data in sources:
+        store.put_ladder(path, 0.0, {400: data})
+    fill = time.perf_counter() - start
+
+    hits = []
+    for path, _ in rng.choices(sources, k=lookups):
+        t = time.perf_counter()
+        read_hit(store.get(path, 400, 0.0))
+        hits.append(time.perf_counter() - t)
+
+    misses = []
+    for i in range(lookups):
+        t = time.perf_counter()
+        store.get(f"/missing/{i}.png", 400, 0.0)
+        misses.append(time.perf_counter() - t)
+
+    return fill, hits, misses
+
+
+def disk_usage(path):
+    if os.path.isfile(path):
+        return sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p)), 1
+    total = count = 0
+    for entry in os.scandir(path):
+        total += entry.stat().st_size
+        count += 1
+    return total, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=20000, help="thumbnails in each store")
+    parser.add_argument("--size", type=int, default=24 * 1024, help="bytes per thumbnail")
+    parser.add_argument("--lookups", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    sources = [(f"/gallery/{i // 1000:04d}/ComfyUI_{i:07d}.png", rng.randbytes(args.size)) for i in range(args.count)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        stores = [
+            (FileThumbnailStore(os.path.join(tmp, "thumbnails")), os.path.join(tmp, "thumbnails")),
+            (SqliteThumbnailStore(os.path.join(tmp, "thumbnails.sqlite")), os.path.join(tmp, "thumbnails.sqlite")),
+        ]
+        print(f"{args.count} thumbnails of {args.size} bytes, {args.lookups} lookups")
+        print(f"{'store':<8} {'fill s':>8} {'hit p50 us':>11} {'hit p95 us':>11} {'hit p99 us':>11} "
+              f"{'miss p50 us':>12} {'files':>8} {'MB':>8}")
+        for store, location in stores:
+            fill, hits, misses = bench(store, sources, args.lookups, args.seed)
+            size, files = disk_usage(location)
+            print(f"{store.name:<8} {fill:>8.2f} {percentile(hits, 0.5) * 1e6:>11.1f} "
+                  f"{percentile(hits, 0.95) * 1e6:>11.1f} {percentile(hits, 0.99) * 1e6:>11.1f} "
+                  f"{percentile(misses, 0.5) * 1e6:>12.1f} {files:>8} {size / 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import os
+import re
+import time
+import threading
+from functools import lru_cache
+import folder_paths
+
+# Cached view of the checkpoint list for RandomCheckpointLoader and its query endpoints.
+# The list, the folder tree and filtered candidate lists are rebuilt only when a
+# directory under the checkpoint roots changes (checked at most every REFRESH_INTERVAL).
+
+REFRESH_INTERVAL = 2.0
+MAX_CACHED_SELECTIONS = 256
+
+
+def normalize_dir(name):
+    return os.path.dirname(name).replace("\\", "/")
+
+
+def split_list(value):
+    # "a, b\nc" -> ["a", "b", "c"]
+    return [v.strip() for v in (value or "").replace('\n', ',').split(',') if v.strip()]
+
+
+@lru_cache(maxsize=MAX_CACHED_SELECTIONS)
+def compile_filter(folder, exclude_names):
+    # Turn the folder/exclude widget strings into a predicate over (name, normalized dir)
+    folders = split_list(folder) or ["All"]
+    include_all = "All" in folders
+    include_root = "Root" in folders
+    prefixes = tuple(f.replace("\\", "/").rstrip("/") for f in folders if f not in ("All", "Root"))
+    excludes = split_list(exclude_names)
+    exclude_re = re.compile("|".join(re.escape(e) for e in excludes)) if excludes else None
+
+    def matches(name, directory):
+        if exclude_re is not None and exclude_re.search(name):
+            return False
+        if include_all:
+            return True
+        if include_root and not directory:
+            return True
+        # Exact folder or any subfolder of it
+        return any(directory == p or directory.startswith(p + "/") for p in prefixes)
+
+    return matches
+
+
+class CheckpointCatalog:
+    def __init__(self, folder_name="checkpoints"):
+        self.folder_name = folder_name
+        # lock guards the snapshot below; refresh_lock serializes the directory walks so
+        # readers never wait on the filesystem
+        self.lock = threading.Lock()
+        self.refresh_lock = threading.Lock()
+        self.worker = None
+        self.version = 0
+        self.signature = None
+        self.checked_at = 0.0
+        self.checkpoints = []
+        self.directories = {}
+        self.folders = []
+        self.tree = {}
+        self.selections = {}
+        # Called with the new checkpoint list whenever the catalog is rebuilt
+        self.listeners = []
+
+    def _signature(self):
+        # mtimes of every directory under the checkpoint roots; adding, removing or
+        # renaming a checkpoint changes the mtime of the directory holding it
+        signature = []
+        for root in folder_paths.get_folder_paths(self.folder_name):
+            stack = [root]
+            while stack:
+                current = stack.pop()
+                try:
+                    signature.append((current, os.stat(current).st_mtime_ns))
+                    with os.scandir(current) as it:
+                        for entry in it:
+                            if entry.is_dir():
+                                stack.append(entry.path)
+                except OSError:
+                    continue
+        return tuple(sorted(signature))
+
+    def refresh(self, force=False):
+        with self.refresh_lock:
+            now = time.monotonic()
+            if not force and self.signature is not None and now - self.checked_at < REFRESH_INTERVAL:
+                return
+            self.checked_at = now
+            signature = self._signature()
+            if not force and signature == self.signature:
+                return
+
+            checkpoints = sorted(folder_paths.get_filename_list(self.folder_name))
+            directories = {c: normalize_dir(c) for c in checkpoints}
+            folders = {"All", "Root"}
+            tree = {}
+            for directory in set(directories.values()):
+                if not directory:
+                    continue
+                node = tree
+                parts = directory.split("/")
+                for i, part in enumerate(parts):
+                    folders.add("/".join(parts[:i + 1]))
+                    node = node.setdefault(part, {})
+
+            with self.lock:
+                self.checkpoints = checkpoints
+                self.directories = directories
+                self.folders = sorted(folders)
+                self.tree = tree
+                self.selections = {}
+                self.signature = signature
+                self.version += 1
+
+        for listener in self.listeners:
+            try:
+                listener(checkpoints)
+            except Exception as e:
+                print(f"[CheckpointCatalog] Listener failed: {e}")
+
+    @property
+    def loaded(self):
+        return self.signature is not None
+
+    def refresh_in_background(self):
+        # Re-check the checkpoint roots on a worker thread; callers keep serving the
+        # current snapshot until the rebuilt one is swapped in
+        if time.monotonic() - self.checked_at < REFRESH_INTERVAL:
+            return
+        with self.lock:
+            if self.worker is not None:
+                return
+            self.worker = threading.Thread(target=self._run, name="CheckpointCatalog", daemon=True)
+            self.worker.start()
+
+    def _run(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            print(f"[CheckpointCatalog] Refresh failed: {e}")
+        finally:
+            with self.lock:
+                self.worker = None
+
+    def select(self, folder="All", exclude_names="", refresh=True):
+        # Sorted candidates for a folder/exclude combination, cached until the catalog changes.
+        # refresh=False serves the current snapshot without touching the filesystem.
+        if refresh:
+            self.refresh()
+        key = (folder or "", exclude_names or "")
+        with self.lock:
+            checkpoints, directories, selections = self.checkpoints, self.directories, self.selections
+            candidates = selections.get(key)
+        if candidates is None:
+            matches = compile_filter(*key)
+            candidates = [c for c in checkpoints if matches(c, directories[c])]
+            with self.lock:
+                # Only cache into the snapshot the candidates were computed from
+                if selections is self.selections:
+                    if len(selections) >= MAX_CACHED_SELECTIONS:
+                        selections.clear()
+                    selections[key] = candidates
+        return candidates
+
+    def get_folders(self, query="", refresh=True):
+        if refresh:
+            self.refresh()
+        query = (query or "").lower()
+        with self.lock:
+            folders = self.folders
+        if not query:
+            return folders
+        return [f for f in folders if query in f.lower()]
+
+
+CATALOG = CheckpointCatalog()
@@ -0,0 +1,140 @@
+import os
+import time
+import queue
+import threading
+
+# Opt-in page-cache warmup for the checkpoint RandomCheckpointLoader picks, so the
+# downstream loader doesn't pay a cold read from slow (network) storage.
+#   fadvise:    ask the kernel to start readahead (posix_fadvise WILLNEED) and return; the
+#               kernel reads the file in the background. Only the first FADVISE_SAMPLE bytes
+#               are read and timed, so the cost of the warmup itself stays small.
+#   read-ahead: read the whole file sequentially on a background thread and time it
+# Reports carry cold_seconds (the first timed read) and warm_seconds (a re-read from the
+# page cache) for what was read; already_cached is set when the first read ran at page
+# cache speed, i.e. the file was warm before the prefetch. Warmups run one at a time on a
+# single worker so they don't compete for bandwidth.
+
+PREFETCH_MODES = ["off", "fadvise", "read-ahead"]
+
+READ_CHUNK = 16 * 2**20
+# Bytes re-read after a read-ahead to time the warm (page cache) load. Files larger than
+# this get an extrapolated warm_seconds, flagged with warm_estimated.
+WARM_SAMPLE = 256 * 2**20
+# Bytes read and timed after posix_fadvise
+FADVISE_SAMPLE = 16 * 2**20
+# A first read within this factor of the page-cache re-read counts as already cached
+CACHED_RATIO = 2.0
+
+
+def fadvise_willneed(full_path):
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    fd = os.open(full_path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    finally:
+        os.close(fd)
+    return True
+
+
+def timed_read(full_path, limit=None):
+    # Sequential read into one reusable buffer; returns (bytes read, seconds)
+    buffer = bytearray(READ_CHUNK)
+    view = memoryview(buffer)
+    total = 0
+    start = time.perf_counter()
+    with open(full_path, "rb", buffering=0) as f:
+        while limit is None or total < limit:
+            n = f.readinto(view)
+            if not n:
+                break
+            total += n
+    return total, time.perf_counter() - start
+
+
+def read_ahead(full_path, limit=None):
+    # Timed read of the file (or its first limit bytes), then a timed page-cache re-read
+    size, cold_seconds = timed_read(full_path, limit)
+    stats = {
+        "bytes": size,
+        "cold_seconds": round(cold_seconds, 3),
+        "cold_mb_per_s": round(size / 2**20 / cold_seconds, 1) if cold_seconds > 0 else None,
+    }
+    if size:
+        # Re-read (up to WARM_SAMPLE of) it straight from the page cache; a partial sample
+        # is scaled to the whole read and marked as an estimate
+        sample, sample_seconds = timed_read(full_path, min(WARM_SAMPLE, size))
+        if sample:
+            warm_seconds = sample_seconds * size / sample
+            stats["warm_seconds"] = round(warm_seconds, 3)
+            stats["warm_estimated"] = sample < size
+            stats["warm_mb_per_s"] = round(sample / 2**20 / sample_seconds, 1) if sample_seconds > 0 else None
+            stats["already_cached"] = cold_seconds <= warm_seconds * CACHED_RATIO
+    return stats
+
+
+def advise(full_path):
+    # fadvise mode: start kernel readahead and time only a small sample of the file.
+    # None when posix_fadvise isn't available.
+    if not fadvise_willneed(full_path):
+        return None
+    stats = {"advised": True, "size": os.path.getsize(full_path)}
+    stats.update(read_ahead(full_path, FADVISE_SAMPLE))
+    return stats
+
+
+class CheckpointPrefetcher:
+    def __init__(self):
+        self.jobs = queue.Queue()
+        self.lock = threading.Lock()
+        # path -> on_done callbacks of every request for it while it is queued or running
+        self.queued = {}
+        self.worker = None
+
+    def prefetch(self, full_path, mode, on_done=None):
+        # Queue a warmup; on_done(stats) is called from the worker thread when it finishes.
+        # A request for a path already queued joins that warmup (and gets its stats).
+        if mode not in ("fadvise", "read-ahead") or not full_path:
+            return
+        with self.lock:
+            callbacks = self.queued.get(full_path)
+            if callbacks is not None:
+                if on_done is not None:
+                    callbacks.append(on_done)
+                return
+            self.queued[full_path] = [on_done] if on_done is not None else []
+            if self.worker is None or not self.worker.is_alive():
+                self.worker = threading.Thread(target=self._run, name="CheckpointPrefetcher", daemon=True)
+                self.worker.start()
+        self.jobs.put((full_path, mode))
+
+    def _run(self):
+        while True:
+            full_path, mode = self.jobs.get()
+            stats = {"mode": mode}
+            try:
+                advised = advise(full_path) if mode == "fadvise" else None
+                if advised is not None:
+                    stats.update(advised)
+                    stats["status"] = "advised"
+                else:
+                    # Without posix_fadvise (e.g. Windows) fadvise falls back to a plain read-ahead
+                    stats["mode"] = "read-ahead"
+                    stats["advised"] = False
+                    stats.update(read_ahead(full_path))
+                    stats["status"] = "warm"
+            except OSError as e:
+                stats["status"] = "error"
+                stats["error"] = str(e)
+                print(f"[RandomCheckpointLoader] Prefetch failed for {full_path}: {e}")
+            finally:
+                with self.lock:
+                    callbacks = self.queued.pop(full_path, [])
+            for on_done in callbacks:
+                try:
+                    on_done(dict(stats))
+                except Exception as e:
+                    print(f"[RandomCheckpointLoader] Prefetch callback failed: {e}")
+
+
+PREFETCHER = CheckpointPrefetcher()
@@ -0,0 +1,195 @@
+import os
+import json
+import hashlib
+import threading
+import numpy as np
+from .image_batch import open_rgb
+
+# Opt-in on-disk store of decoded RGB pixels, one store per dataset directory.
+# Pixels live in a single append-only pack file and are handed out as np.memmap views,
+# so a cache hit costs no PNG/JPEG decode and no copy until the caller converts to float.
+#
+# Layout (under DECODED_CACHE_DIR/<sha1 of directory>/):
+#   pixels.bin, pixels-<generation>.bin
+#                raw HxWx3 uint8 arrays back to back; compaction writes the next generation
+#   index.json   {"directory": ..., "generation": n,
+#                 "entries": {relpath: [offset, height, width, mtime_ns, size]}}
+# The index names the pack its offsets point into, and replacing index.json is the only
+# switch to a new pack, so a crash at any point of a compaction leaves a matching pair.
+# Packs the index doesn't name are leftovers and are removed when the store is opened.
+
+DECODED_CACHE_DIR = os.path.join(os.path.dirname(__file__), "decoded_cache")
+
+# Rewrite the pack file once more than this share of it belongs to replaced entries
+COMPACT_RATIO = 0.5
+COMPACT_MIN_BYTES = 256 * 2**20
+
+
+class DecodedImageStore:
+    _stores = {}
+    _stores_lock = threading.Lock()
+
+    @classmethod
+    def for_directory(cls, directory):
+        directory = os.path.abspath(directory)
+        with cls._stores_lock:
+            store = cls._stores.get(directory)
+            if store is None:
+                store = cls(directory)
+                cls._stores[directory] = store
+            return store
+
+    def __init__(self, directory):
+        self.directory = os.path.abspath(directory)
+        key = hashlib.sha1(self.directory.encode("utf-8")).hexdigest()[:16]
+        self.store_dir = os.path.join(DECODED_CACHE_DIR, key)
+        self.generation = 0
+        self.pack_path = self._pack_path(0)
+        self.index_path = os.path.join(self.store_dir, "index.json")
+        self.lock = threading.RLock()
+        self.entries = {}
+        self.dirty = False
+        self.hits = 0
+        self.misses = 0
+        self._map = None
+        self._map_size = 0
+        os.makedirs(self.store_dir, exist_ok=True)
+        self._load_index()
+        self._remove_stale_packs()
+
+    def _pack_path(self, generation):
+        name = "pixels.bin" if generation == 0 else f"pixels-{generation}.bin"
+        return os.path.join(self.store_dir, name)
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.generation = int(data.get("generation", 0))
+            self.pack_path = self._pack_path(self.generation)
+            if not os.path.exists(self.pack_path):
+                return
+            pack_size = os.path.getsize(self.pack_path)
+            for rel, entry in data.get("entries", {}).items():
+                offset, height, width = entry[0], entry[1], entry[2]
+                # Drop entries a crash left pointing past the end of the pack
+                if offset + height * width * 3 <= pack_size:
+                    self.entries[rel] = entry
+        except (OSError, ValueError) as e:
+            print(f"[DecodedImageStore] Ignoring unreadable index for '{self.directory}': {e}")
+            self.entries = {}
+
+    def _remove_stale_packs(self):
+        # Packs of other generations: a compaction interrupted before or after its switch
+        for name in os.listdir(self.store_dir):
+            path = os.path.join(self.store_dir, name)
+            if name.startswith("pixels") and path != self.pack_path:
+                try:
+                    os.remove(path)
+                except OSError:
+                    # Windows: still mapped by another process; retried on the next open
+                    pass
+
+    def _view(self, entry):
+        offset, height, width = entry[0], entry[1], entry[2]
+        end = offset + height * width * 3
+        if self._map is None or end > self._map_size:
+            # The pack grew since it was mapped; remap the whole file.
+            # Copy-on-write keeps views writable for torch.from_numpy without touching the file.
+            self._map_size = os.path.getsize(self.pack_path)
+            self._map = np.memmap(self.pack_path, dtype=np.uint8, mode="c", shape=(self._map_size,))
+        return self._map[offset:end].reshape(height, width, 3)
+
+    def _relpath(self, path):
+        rel = os.path.relpath(os.path.abspath(path), self.directory)
+        if rel.startswith(".."):
+            return None
+        return rel.replace("\\", "/")
+
+    def load(self, path):
+        # HxWx3 uint8 array for path: a memmap view on a hit, a fresh decode (appended to the pack) otherwise
+        rel = self._relpath(path)
+        if rel is None:
+            return np.array(open_rgb(path))
+
+        stat = os.stat(path)
+        with self.lock:
+            entry = self.entries.get(rel)
+            if entry is not None and entry[3] == stat.st_mtime_ns and entry[4] == stat.st_size:
+                self.hits += 1
+                return self._view(entry)
+
+        # Miss or stale: decode outside the lock
+        image_np = np.ascontiguousarray(np.array(open_rgb(path)), dtype=np.uint8)
+        with self.lock:
+            self.misses += 1
+            with open(self.pack_path, "ab") as f:
+                offset = f.tell()
+                f.write(image_np.tobytes())
+            self.entries[rel] = [offset, image_np.shape[0], image_np.shape[1], stat.st_mtime_ns, stat.st_size]
+            self.dirty = True
+        return image_np
+
+    def flush(self):
+        # Persist the index (and compact the pack if it is mostly dead space)
+        with self.lock:
+            if not self.dirty:
+                return
+            self._maybe_compact()
+            self._write_index()
+            self.dirty = False
+            if self.hits or self.misses:
+                print(f"[DecodedImageStore] {self.directory}: {self.hits} hits, {self.misses} decoded, {len(self.entries)} entries")
+            self.hits = 0
+            self.misses = 0
+
+    def _write_index(self):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"directory": self.directory, "generation": self.generation, "entries": self.entries}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.index_path)
+
+    def _maybe_compact(self):
+        try:
+            pack_size = os.path.getsize(self.pack_path)
+        except OSError:
+            return
+        live = sum(e[1] * e[2] * 3 for e in self.entries.values())
+        if pack_size < COMPACT_MIN_BYTES or pack_size - live < pack_size * COMPACT_RATIO:
+            return
+
+        # The live arrays go to the next generation's pack; the current pair stays untouched
+        generation = self.generation + 1
+        new_pack_path = self._pack_path(generation)
+        new_entries = {}
+        with open(self.pack_path, "rb") as src, open(new_pack_path, "wb") as dst:
+            for rel, entry in self.entries.items():
+                length = entry[1] * entry[2] * 3
+                src.seek(entry[0])
+                new_entries[rel] = [dst.tell()] + entry[1:]
+                dst.write(src.read(length))
+            dst.flush()
+            os.fsync(dst.fileno())
+        old_pack_path = self.pack_path
+        self.generation, self.pack_path, self.entries = generation, new_pack_path, new_entries
+        self._map = None
+        self._map_size = 0
+        # The switch: the index now names the new pack
+        self._write_index()
+        try:
+            os.remove(old_pack_path)
+        except OSError:
+            # Windows refuses while older views are still mapped; removed on the next open
+            pass
+        print(f"[DecodedImageStore] Compacted {self.directory}: {pack_size / 2**20:.1f} MB -> {live / 2**20:.1f} MB")
+
+
+def load_rgb_array(path, store=None):
+    # HxWx3 uint8 pixels for path, through the decoded store when one is given
+    if store is not None:
+        return store.load(path)
+    return np.array(open_rgb(path))
@@ -5,6 +5,23 @@ import { X, Download, Image as ImageIcon, Film, Folder, FolderOpen, Layers, Grid
 import { TransformWrapper, TransformComponent } from "react-zoom-pan-pinch";
 import PhotoAlbum from "react-photo-album";
 
+// Expand a /web/gallery/list?format=compact "files" object (one array per key,
+// subfolders as indexes into a string table, shared values in "constants") back into rows
+const expandCompactFiles = (files) => {
+    if (!files || files.encoding !== 'columnar') return files || [];
+    const rows = new Array(files.count);
+    const keys = Object.keys(files.columns);
+    for (let i = 0; i < files.count; i++) {
+        const row = { ...files.constants };
+        for (const key of keys) {
+            const value = files.columns[key][i];
+            row[key] = key === 'subfolder' ? files.subfolders[value] : value;
+        }
+        rows[i] = row;
+    }
+    return rows;
+};
+
 const FolderTree = ({ folders, activeFolder, onFolderSelect }) => {
     const [expandedFolders, setExpandedFolders] = useState({});
 
@@ -149,13 +166,14 @@ function App() {
         abortControllerRef.current = controller;
 
         try {
-            const url = `/web/gallery/list?skip=${skip}&limit=${limit}&folder=${encodeURIComponent(folder)}`;
+            const url = `/web/gallery/list?skip=${skip}&limit=${limit}&folder=${encodeURIComponent(folder)}&format=compact`;
             const response = await fetch(url, { signal: controller.signal });
 
             if (!response.ok) {
                 throw new Error('Failed to fetch files');
             }
             const data = await response.json();
+            data.files = expandCompactFiles(data.files);
             return data;
         } catch (error) {
             if (error.name === 'AbortError') {
@@ -251,6 +269,85 @@ function App() {
         };
     }, [activeFolder]);
 
+    // Live updates: the server pushes added/modified/removed rows for the current view
+    // over ComfyUI's websocket (registered via /web/gallery/subscribe), so new outputs are
+    // patched into the grid instead of re-listing
+    const clientIdRef = useRef(`gallery-${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`);
+    const activeFolderRef = useRef(activeFolder);
+    const filesRef = useRef(files);
+    const [socketReady, setSocketReady] = useState(false);
+
+    useEffect(() => {
+        activeFolderRef.current = activeFolder;
+    }, [activeFolder]);
+
+    useEffect(() => {
+        filesRef.current = files;
+    }, [files]);
+
+    const applyChanges = useCallback((changes) => {
+        // Ignore events still in flight for a folder we navigated away from
+        if (!changes || changes.folder !== activeFolderRef.current) return;
+        const key = (f) => `${f.subfolder}/${f.filename}`;
+        const removed = new Set(changes.removed.map(key));
+        const modified = new Map(changes.modified.map(f => [key(f), f]));
+        // Only rows that aren't listed yet grow the total; a repeated "added" for a file
+        // we already have just replaces it
+        const listed = new Set(filesRef.current.map(key));
+        const inserted = new Set(changes.added.map(key).filter(k => !listed.has(k) || removed.has(k))).size;
+        setFiles(prev => {
+            const kept = prev.filter(f => !removed.has(key(f))).map(f => modified.get(key(f)) || f);
+            const known = new Set(kept.map(key));
+            // New outputs are the newest files, so they go on top like in a date-sorted listing
+            const added = changes.added.filter(f => !known.has(key(f))).sort((a, b) => b.date - a.date);
+            return [...added, ...kept];
+        });
+        setTotalFiles(prev => Math.max(0, prev + inserted - changes.removed.length));
+    }, []);
+
+    useEffect(() => {
+        let socket = null;
+        let closed = false;
+        let retryTimer = null;
+
+        const connect = () => {
+            const protocol = window.location.protocol === 'https:' ? 'wss' : 'ws';
+            socket = new WebSocket(`${protocol}://${window.location.host}/ws?clientId=${clientIdRef.current}`);
+            socket.onopen = () => setSocketReady(true);
+            socket.onclose = () => {
+                setSocketReady(false);
+                if (!closed) retryTimer = setTimeout(connect, 3000);
+            };
+            socket.onmessage = (event) => {
+                // Binary frames are ComfyUI previews
+                if (typeof event.data !== 'string') return;
+                try {
+                    const message = JSON.parse(event.data);
+                    if (message.type === 'web_gallery.changes') applyChanges(message.data);
+                } catch (e) {
+                    console.error("Bad websocket message:", e);
+                }
+            };
+        };
+
+        connect();
+        return () => {
+            closed = true;
+            clearTimeout(retryTimer);
+            if (socket) socket.close();
+        };
+    }, [applyChanges]);
+
+    useEffect(() => {
+        // (Re)subscribe whenever the socket reconnects or the view changes
+        if (!socketReady) return;
+        fetch('/web/gallery/subscribe', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ client_id: clientIdRef.current, folder: activeFolder })
+        }).catch(console.error);
+    }, [socketReady, activeFolder]);
+
     // Fetch folders
     useEffect(() => {
         fetch('/web/gallery/folders')
@@ -277,6 +374,11 @@ function App() {
         return `/view?${params.toString()}`;
     };
 
+    // Thumbnail ladder rungs for srcset; the server renders them all from one decode
+    const getThumbnailSrcSet = (file) => [200, 400, 800]
+        .map(w => `${getFileUrl(file, 'thumbnail')}&w=${w} ${w}w`)
+        .join(', ');
+
     const handleDownload = (e, file) => {
         e.stopPropagation();
         const link = document.createElement('a');
@@ -325,7 +427,7 @@ function App() {
     };
 
     // Image with skeleton for masonry grid
-    const GridImage = ({ src, alt, aspectRatio, onClick, maxHeight }) => {
+    const GridImage = ({ src, srcSet, sizes, alt, aspectRatio, onClick, maxHeight, placeholder, color }) => {
         const [loaded, setLoaded] = useState(false);
 
         return (
@@ -333,15 +435,26 @@ function App() {
                 className="relative w-full overflow-hidden bg-gray-900 cursor-pointer group"
                 style={{
                     aspectRatio: `${1 / aspectRatio}`,
-                    maxHeight: maxHeight !== 'none' ? maxHeight : undefined
+                    maxHeight: maxHeight !== 'none' ? maxHeight : undefined,
+                    backgroundColor: color || undefined
                 }}
                 onClick={onClick}
             >
-                {!loaded && (
+                {/* The list row's inline placeholder paints at once; the shimmer is for rows without one yet */}
+                {!loaded && (placeholder ? (
+                    <img
+                        src={placeholder}
+                        alt=""
+                        aria-hidden="true"
+                        className="absolute inset-0 w-full h-full object-cover blur-md scale-110"
+                    />
+                ) : (
                     <div className="absolute inset-0 bg-gray-800 animate-shimmer" />
-                )}
+                ))}
                 <img
                     src={src}
+                    srcSet={srcSet}
+                    sizes={sizes}
                     alt={alt}
                     className={`absolute inset-0 w-full h-full object-cover transition-opacity duration-500 ${loaded ? 'opacity-100' : 'opacity-0'}`}
                     loading="lazy"
@@ -512,6 +625,21 @@ function App() {
         return () => window.removeEventListener('keydown', handleKeyDown);
     }, [selectedFile, handleNext, handlePrev]);
 
+    // Warm the server's previews of the neighbours at prefetch priority, so arrow-key
+    // navigation finds them rendered without delaying the tiles on screen
+    useEffect(() => {
+        if (!selectedFile) return;
+        const currentIndex = files.findIndex(f => f.filename === selectedFile.filename && f.subfolder === selectedFile.subfolder);
+        const prefetches = [files[currentIndex + 1], files[currentIndex - 1]]
+            .filter(f => f && ['png', 'jpg', 'jpeg', 'webp', 'gif'].includes((f.format || '').toLowerCase()))
+            .map(f => {
+                const img = new Image();
+                img.src = `${getFileUrl(f, 'preview')}&priority=prefetch`;
+                return img;
+            });
+        return () => prefetches.forEach(img => { img.src = ''; });
+    }, [selectedFile, files]);
+
     // List Skeleton
     const ListSkeleton = useCallback(() => {
         return (
@@ -714,7 +842,11 @@ function App() {
                                                 <GridImage
                                                     key={`${file.filename}-${itemIndex}`}
                                                     src={getFileUrl(file, 'thumbnail')}
+                                                    srcSet={getThumbnailSrcSet(file)}
+                                                    sizes={`${Math.ceil(100 / columnCount)}vw`}
                                                     alt={file.filename}
+                                                    placeholder={file.placeholder}
+                                                    color={file.color}
                                                     aspectRatio={aspectRatio}
                                                     onClick={() => setSelectedFile(file)}
                                                     maxHeight={maxImageHeight}
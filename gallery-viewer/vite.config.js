@@ -20,6 +20,8 @@ export default defineConfig({
       '/web/gallery/list': 'http://localhost:8082',
       '/web/gallery/folders': 'http://localhost:8082',
       '/web/gallery/thumbnail': 'http://localhost:8082',
+      '/web/gallery/subscribe': 'http://localhost:8082',
+      '/ws': { target: 'ws://localhost:8082', ws: true },
       '/view': 'http://localhost:8082',
     }
   }
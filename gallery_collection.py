@@ -0,0 +1,74 @@
+import json
+import heapq
+import base64
+import binascii
+from .gallery_index import normalize_root
+
+# Virtual collections: one newest-first listing over several gallery roots (e.g. outputs
+# spread across disks). Each root is a date-sorted keyset stream out of the gallery index;
+# the streams are k-way merged with a heap, so a page costs O(limit log k) rows read
+# instead of listing every root in full. Rows are totally ordered by
+# (date DESC, root position, subfolder, filename), which makes the last row of a page a
+# global cursor: it alone tells every root where to resume.
+
+# Rows fetched from a root per refill of its stream
+STREAM_BATCH = 64
+
+
+def encode_cursor(row, root_index):
+    key = [row["date"], root_index, row["subfolder"], row["filename"]]
+    return base64.urlsafe_b64encode(json.dumps(key).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    # (date, root index, subfolder, filename); ValueError if malformed
+    try:
+        date, root_index, subfolder, filename = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (binascii.Error, UnicodeError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    return float(date), int(root_index), str(subfolder), str(filename)
+
+
+def root_stream(index, root, root_index, filters, cursor, batch=STREAM_BATCH):
+    # Newest-first rows of one root that come after the global cursor
+    kwargs = {}
+    if cursor is not None:
+        date, cursor_root, subfolder, filename = cursor
+        if root_index == cursor_root:
+            kwargs = {"after": (date, subfolder, filename)}
+        else:
+            # Roots ordered before the cursor's root already emitted everything at its date
+            kwargs = {"before_date": date, "include_date": root_index > cursor_root}
+    while True:
+        rows = index.query_after(root, *filters, limit=batch, **kwargs)
+        for row in rows:
+            yield (-row["date"], root_index, row["subfolder"], row["filename"]), row
+        if len(rows) < batch:
+            return
+        last = rows[-1]
+        kwargs = {"after": (last["date"], last["subfolder"], last["filename"])}
+
+
+def merged_page(index, roots, root_paths, folder="", recursive=False, search="", excludes=(), cursor=None, limit=50,
+                constraints=None):
+    # (rows, next cursor or None) for roots already synced; rows carry "root_path" and
+    # "root" (position in roots) so clients can address thumbnails per root
+    roots = [normalize_root(root) for root in roots]
+    filters = (folder, recursive, search, excludes, constraints)
+    streams = [root_stream(index, root, i, filters, cursor, batch=min(limit, STREAM_BATCH) + 1)
+               for i, root in enumerate(roots)]
+    merged = heapq.merge(*streams, key=lambda item: item[0])
+    files = []
+    for key, row in merged:
+        files.append(dict(row, root=key[1], root_path=root_paths[key[1]]))
+        if len(files) == limit:
+            break
+    # Only hand out a cursor when another row actually follows
+    if len(files) < limit or next(merged, None) is None:
+        return files, None
+    last = files[-1]
+    return files, encode_cursor(last, last["root"])
+
+
+def total_count(index, roots, folder="", recursive=False, search="", excludes=(), constraints=None):
+    return sum(index.count(normalize_root(root), folder, recursive, search, excludes, constraints) for root in roots)
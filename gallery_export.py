@@ -0,0 +1,129 @@
+import shutil
+import asyncio
+import zipfile
+import threading
+from aiohttp import web
+
+# Streaming ZIP export.
+# The archive is written by zipfile on a dedicated thread. Full chunks are handed to the
+# event loop with call_soon_threadsafe into an asyncio.Queue that the handler awaits and
+# copies into a chunked aiohttp response. A semaphore caps the chunks in flight, so memory
+# stays at a few chunks whatever the archive size and nothing is staged on disk. When the
+# client goes away the handler cancels the stream, which wakes the writer at once.
+# Gallery media (PNG, JPEG, WebP, GIF, MP4) is already compressed, so entries are stored,
+# not deflated. ZIP64 records are written for entries and archives past the 4 GB limits.
+
+CHUNK_SIZE = 1024 * 1024
+# Chunks buffered between the zip writer and the response
+QUEUE_CHUNKS = 8
+
+
+class ZipStream:
+    # Write-only, unseekable file object for zipfile; full chunks go to the event loop.
+    # zipfile falls back to data descriptors when it can't seek back to patch headers.
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue()
+        # One slot per chunk handed over and not yet written to the response
+        self.slots = threading.Semaphore(QUEUE_CHUNKS)
+        self.buffer = bytearray()
+        self.cancelled = threading.Event()
+
+    def write(self, data):
+        if self.cancelled.is_set():
+            raise ConnectionAbortedError("Client closed the download")
+        self.buffer += data
+        if len(self.buffer) >= CHUNK_SIZE:
+            self._put(bytes(self.buffer))
+            self.buffer.clear()
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def _put(self, chunk):
+        # Blocks while QUEUE_CHUNKS chunks are waiting for the response; cancel() wakes it
+        self.slots.acquire()
+        if self.cancelled.is_set():
+            raise ConnectionAbortedError("Client closed the download")
+        self._send(chunk)
+
+    def _send(self, item):
+        try:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, item)
+        except RuntimeError:
+            # Event loop closed: nobody is reading any more
+            self.cancelled.set()
+
+    def consumed(self):
+        # Called on the event loop after a chunk has been written to the response
+        self.slots.release()
+
+    def cancel(self):
+        self.cancelled.set()
+        self.slots.release()
+
+    def finish(self):
+        # End of archive (or failure): hand over the tail, then the None sentinel
+        try:
+            if self.buffer and not self.cancelled.is_set():
+                self._put(bytes(self.buffer))
+        except ConnectionAbortedError:
+            pass
+        finally:
+            self.buffer.clear()
+            self._send(None)
+
+
+def write_zip(stream, entries):
+    # entries: iterable of (arcname, full_path), consumed on this thread; files that
+    # vanished or can't be read are left out
+    skipped = 0
+    try:
+        with zipfile.ZipFile(stream, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as zf:
+            for arcname, full_path in entries:
+                try:
+                    zinfo = zipfile.ZipInfo.from_file(full_path, arcname)
+                    zinfo.compress_type = zipfile.ZIP_STORED
+                    with open(full_path, "rb") as src, zf.open(zinfo, "w") as dest:
+                        shutil.copyfileobj(src, dest, CHUNK_SIZE)
+                except ConnectionAbortedError:
+                    raise
+                except (OSError, ValueError):
+                    skipped += 1
+    except ConnectionAbortedError:
+        pass
+    except Exception as e:
+        print(f"[Gallery] ZIP export failed: {e}")
+    finally:
+        stream.finish()
+    if skipped:
+        print(f"[Gallery] ZIP export skipped {skipped} unreadable files")
+
+
+async def zip_response(request, entries, archive_name):
+    # Stream entries (an iterable of (arcname, full_path), read on the writer thread) as an
+    # attachment named archive_name
+    response = web.StreamResponse(headers={
+        "Content-Type": "application/zip",
+        "Content-Disposition": f'attachment; filename="{archive_name}"',
+    })
+    await response.prepare(request)
+
+    stream = ZipStream(asyncio.get_running_loop())
+    writer = threading.Thread(target=write_zip, args=(stream, entries), name="GalleryZipWriter", daemon=True)
+    writer.start()
+    try:
+        while True:
+            chunk = await stream.queue.get()
+            if chunk is None:
+                break
+            await response.write(chunk)
+            stream.consumed()
+    except BaseException:
+        # Client disconnected (the write failed or the handler was cancelled): stop the writer
+        stream.cancel()
+        raise
+    await response.write_eof()
+    return response
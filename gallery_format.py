@@ -0,0 +1,100 @@
+import json
+from aiohttp import web
+
+# Response encoding for /web/gallery/list.
+# ?format=compact turns the "files" rows into columns: one array per key, subfolders
+# replaced by indexes into a shared string table and keys with the same value on every
+# row (e.g. "type") hoisted into "constants". Bodies are JSON (orjson when installed)
+# or MessagePack when the client sends Accept: application/x-msgpack, and are
+# compressed with whatever the client's Accept-Encoding allows (gzip, deflate, br).
+
+# Try to import the faster serializers, handle failure
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import msgpack
+    HAS_MSGPACK = True
+except ImportError:
+    HAS_MSGPACK = False
+
+COMPACT_VERSION = 1
+MSGPACK_TYPES = ("application/x-msgpack", "application/msgpack", "application/vnd.msgpack")
+# Smaller bodies aren't worth compressing
+MIN_COMPRESS_BYTES = 1024
+
+
+def dumps(payload):
+    if HAS_ORJSON:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":"), check_circular=False).encode("utf-8")
+
+
+def to_columns(files):
+    # [{"filename": ..., "subfolder": ..., ...}, ...] -> columnar dict (see module comment)
+    keys = []
+    for row in files:
+        for key in row:
+            if key not in keys:
+                keys.append(key)
+
+    subfolders = []
+    subfolder_index = {}
+    columns = {}
+    constants = {}
+    for key in keys:
+        if key == "subfolder":
+            column = []
+            for row in files:
+                value = row.get(key, "")
+                index = subfolder_index.get(value)
+                if index is None:
+                    index = subfolder_index[value] = len(subfolders)
+                    subfolders.append(value)
+                column.append(index)
+            columns[key] = column
+            continue
+        column = [row.get(key) for row in files]
+        if files and column.count(column[0]) == len(column):
+            constants[key] = column[0]
+        else:
+            columns[key] = column
+
+    return {
+        "encoding": "columnar",
+        "version": COMPACT_VERSION,
+        "count": len(files),
+        "subfolders": subfolders,
+        "constants": constants,
+        "columns": columns,
+    }
+
+
+def wants_compact(request):
+    return request.query.get("format", "") == "compact"
+
+
+def wants_msgpack(request):
+    accept = request.headers.get("Accept", "")
+    return HAS_MSGPACK and any(t in accept for t in MSGPACK_TYPES)
+
+
+def list_response(request, payload):
+    # Encode a list payload in the format the client negotiated
+    if wants_compact(request):
+        payload = dict(payload, files=to_columns(payload.get("files", [])))
+    if wants_msgpack(request):
+        body = msgpack.packb(payload, use_bin_type=True)
+        content_type = MSGPACK_TYPES[0]
+    else:
+        body = dumps(payload)
+        content_type = "application/json"
+
+    response = web.Response(body=body, content_type=content_type)
+    if len(body) >= MIN_COMPRESS_BYTES:
+        # Picks gzip/deflate (or br when brotli is installed) from Accept-Encoding
+        response.enable_compression()
+    return response
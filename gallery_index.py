@@ -0,0 +1,630 @@
+import os
+import time
+import sqlite3
+import operator
+import datetime
+import threading
+from .gallery_metrics import CACHE_REQUESTS, WALK_DURATION, FILES_SCANNED
+
+# Try to import PIL, handle failure
+try:
+    from PIL import Image
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
+# SQLite index of the media files under each gallery root.
+# sync() walks a root with stat calls only, diffs it against the stored rows and reads
+# image headers just for new or changed files; the list endpoint pages straight out of
+# the index. Listeners get every non-empty diff (added/modified/removed rows), which is
+# what the websocket push in gallery_push.py forwards to subscribed clients.
+
+INDEX_DB_PATH = os.path.join(os.path.dirname(__file__), "gallery_index.sqlite")
+
+# Bump when the schema changes; the index is a cache and is rebuilt from disk
+SCHEMA_VERSION = 4
+
+MEDIA_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.mp4', '.gif')
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp')
+
+# A root is walked again at most this often (list requests in between page the index)
+SYNC_INTERVAL = 2.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    root TEXT NOT NULL,
+    subfolder TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    format TEXT NOT NULL,
+    date REAL NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    width INTEGER NOT NULL DEFAULT 0,
+    height INTEGER NOT NULL DEFAULT 0,
+    name_lower TEXT NOT NULL,
+    path_lower TEXT NOT NULL,
+    -- 64-bit perceptual hash (signed, as SQLite stores it); NULL if unreadable
+    phash INTEGER,
+    -- Tiny data-URI image and average "#rrggbb" color the grid paints before the thumbnail arrives
+    placeholder TEXT,
+    color TEXT,
+    -- 0 until the perceptual hasher has looked at the file (rewritten rows start over)
+    hashed INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (root, subfolder, filename)
+);
+CREATE INDEX IF NOT EXISTS files_date ON files (root, date DESC, subfolder, filename);
+CREATE INDEX IF NOT EXISTS files_hashed ON files (root, hashed);
+CREATE INDEX IF NOT EXISTS files_subfolder_date ON files (root, subfolder, date DESC, filename);
+{sort_indexes}CREATE TABLE IF NOT EXISTS dirs (
+    root TEXT NOT NULL,
+    subfolder TEXT NOT NULL,
+    PRIMARY KEY (root, subfolder)
+);
+"""
+
+FILE_COLUMNS = "filename, subfolder, format, date, width, height, placeholder, color"
+
+# sort= key -> indexed column or expression. Each has a root-wide index (recursive/search
+# views) and a per-folder index ending in (subfolder, filename), so a page in either
+# direction is a forward or backward index scan, never a sort. Images without dimensions
+# (videos, unreadable files) have a NULL aspect ratio and come first ascending.
+SORT_KEYS = {
+    "name": "name_lower",
+    "size": "size",
+    "width": "width",
+    "height": "height",
+    "pixels": "(width * height)",
+    "aspect": "(CAST(width AS REAL) / NULLIF(height, 0))",
+}
+SORT_ORDERS = ("date",) + tuple(SORT_KEYS)
+# Direction when the request doesn't give one
+DEFAULT_DIRECTIONS = {"date": "desc", "name": "asc"}
+
+SCHEMA = SCHEMA.format(sort_indexes="".join(
+    f"CREATE INDEX IF NOT EXISTS files_{name} ON files (root, {expr}, subfolder, filename);\n"
+    f"CREATE INDEX IF NOT EXISTS files_subfolder_{name} ON files (root, subfolder, {expr}, filename);\n"
+    for name, expr in SORT_KEYS.items()))
+
+
+def order_by(sort="date", direction=None):
+    # ORDER BY clause for a sort= key and "asc"/"desc" direction. Every term flips together,
+    # so descending pages are the same index read backwards.
+    direction = (direction or DEFAULT_DIRECTIONS.get(sort, "desc")).upper()
+    if sort == "date":
+        # The historical order: newest first, ties by path
+        if direction == "DESC":
+            return "date DESC, subfolder, filename"
+        return "date ASC, subfolder DESC, filename DESC"
+    expr = SORT_KEYS[sort]
+    return f"{expr} {direction}, subfolder {direction}, filename {direction}"
+
+
+# Attribute filters of the list endpoint (parsed by parse_constraints): name -> (filtered
+# value, comparison). Dimension and aspect bounds compare the same columns and expressions
+# as SORT_KEYS, so SQLite can answer them with a range scan of the matching sort index
+# (root-wide or per-folder); date bounds scan files_date.
+CONSTRAINT_BOUNDS = {
+    "min_width": ("width", ">="),
+    "max_width": ("width", "<="),
+    "min_height": ("height", ">="),
+    "max_height": ("height", "<="),
+    "min_aspect": ("aspect", ">="),
+    "max_aspect": ("aspect", "<="),
+    "date_from": ("date", ">="),
+    "date_to": ("date", "<="),
+}
+CONSTRAINT_VALUES = {"width": "width", "height": "height", "aspect": SORT_KEYS["aspect"], "date": "date"}
+# orientation= -> comparison of the aspect ratio with 1 (also an aspect index range)
+ORIENTATIONS = {"portrait": "<", "landscape": ">", "square": "="}
+COMPARISONS = {"<": operator.lt, "<=": operator.le, "=": operator.eq, ">=": operator.ge, ">": operator.gt}
+# aspect=2:3 matches ratios within this fraction of 2/3 (generators round sizes to multiples of 8/64)
+ASPECT_TOLERANCE = 0.01
+
+
+def parse_ratio(value):
+    # "2:3", "2/3" or "0.667" -> width / height
+    for sep in (":", "/"):
+        if sep in value:
+            width, height = (float(part) for part in value.split(sep, 1))
+            ratio = width / height if height else 0.0
+            break
+    else:
+        ratio = float(value)
+    if not ratio > 0 or ratio == float("inf"):
+        raise ValueError(f"Invalid aspect ratio '{value}'")
+    return ratio
+
+
+def parse_timestamp(value, end=False):
+    # Unix seconds, or an ISO 8601 date/datetime in server local time. A bare date covers
+    # the whole day: its start as a lower bound, its last instant as an upper bound.
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        if len(value) == 10:
+            day = datetime.date.fromisoformat(value)
+            return datetime.datetime.combine(day, datetime.time.max if end else datetime.time.min).timestamp()
+        return datetime.datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise ValueError(f"Invalid date '{value}' (use Unix seconds or YYYY-MM-DD[THH:MM:SS])")
+
+
+def parse_constraints(query):
+    # List attribute filters from request parameters (a query string or JSON body):
+    #   min_width, max_width, min_height, max_height: pixels
+    #   orientation: portrait|landscape|square
+    #   aspect (within ASPECT_TOLERANCE), min_aspect, max_aspect: "2:3", "2/3" or 0.667
+    #   extension: comma-separated file extensions, e.g. "png,webp" ("format" is taken by
+    #              the list endpoint's response format, ?format=compact)
+    #   date_from, date_to: inclusive, Unix seconds or ISO dates
+    # Returns {} when none are given; ValueError on invalid values.
+    def param(name):
+        value = query.get(name)
+        return None if value is None or str(value).strip() == "" else str(value).strip()
+
+    constraints = {}
+    for name in ("min_width", "max_width", "min_height", "max_height"):
+        value = param(name)
+        if value is not None:
+            try:
+                constraints[name] = int(value)
+            except ValueError:
+                raise ValueError(f"{name} must be an integer")
+            if constraints[name] < 0:
+                raise ValueError(f"{name} must not be negative")
+    for column in ("width", "height"):
+        # Files without dimensions (videos, unreadable images) are stored as 0x0 and never
+        # match a dimension filter
+        if f"max_{column}" in constraints:
+            constraints[f"min_{column}"] = max(1, constraints.get(f"min_{column}", 1))
+
+    for name in ("min_aspect", "max_aspect"):
+        value = param(name)
+        if value is not None:
+            constraints[name] = parse_ratio(value)
+    value = param("aspect")
+    if value is not None:
+        ratio = parse_ratio(value)
+        constraints["min_aspect"] = max(constraints.get("min_aspect", 0.0), ratio * (1 - ASPECT_TOLERANCE))
+        constraints["max_aspect"] = min(constraints.get("max_aspect", float("inf")), ratio * (1 + ASPECT_TOLERANCE))
+
+    value = param("orientation")
+    if value is not None:
+        if value.lower() not in ORIENTATIONS:
+            raise ValueError(f"orientation must be one of {', '.join(ORIENTATIONS)}")
+        constraints["orientation"] = value.lower()
+
+    value = param("extension")
+    if value is not None:
+        formats = tuple(sorted({f.strip().lower().lstrip(".") for f in value.split(",") if f.strip().lstrip(".")}))
+        if formats:
+            constraints["formats"] = formats
+
+    for name in ("date_from", "date_to"):
+        value = param(name)
+        if value is not None:
+            constraints[name] = parse_timestamp(value, end=name == "date_to")
+    return constraints
+
+
+def constraint_filter(constraints):
+    # (SQL clauses, params) for parse_constraints() output
+    clauses = []
+    params = []
+    for name, (value, op) in CONSTRAINT_BOUNDS.items():
+        if name in constraints:
+            clauses.append(f"{CONSTRAINT_VALUES[value]} {op} ?")
+            params.append(constraints[name])
+    if "orientation" in constraints:
+        clauses.append(f"{CONSTRAINT_VALUES['aspect']} {ORIENTATIONS[constraints['orientation']]} 1")
+    if "formats" in constraints:
+        clauses.append(f"lower(format) IN ({', '.join('?' for _ in constraints['formats'])})")
+        params.extend(constraints["formats"])
+    return clauses, params
+
+
+def row_satisfies(row, constraints):
+    # constraint_filter as a Python predicate over a list row
+    if not constraints:
+        return True
+    values = {
+        "width": row["width"],
+        "height": row["height"],
+        # NULL in SQL: fails every comparison
+        "aspect": row["width"] / row["height"] if row["height"] else None,
+        "date": row["date"],
+    }
+    for name, (value, op) in CONSTRAINT_BOUNDS.items():
+        if name in constraints and (values[value] is None or not COMPARISONS[op](values[value], constraints[name])):
+            return False
+    if "orientation" in constraints and (
+            values["aspect"] is None or not COMPARISONS[ORIENTATIONS[constraints["orientation"]]](values["aspect"], 1)):
+        return False
+    if "formats" in constraints and row["format"].lower() not in constraints["formats"]:
+        return False
+    return True
+
+
+def normalize_root(root):
+    # One index key per directory however the path was typed (trailing slash, "..", relative)
+    return os.path.abspath(root)
+
+
+def row_to_file(row):
+    # Same row schema /web/gallery/list has always returned
+    filename, subfolder, fmt, date, width, height, placeholder, color = row[:8]
+    return {
+        "filename": filename,
+        "subfolder": subfolder,
+        "type": "output",
+        "format": fmt,
+        "date": date,
+        "width": width,
+        "height": height,
+        # None until the background pass (gallery_phash.py) has decoded the image
+        "placeholder": placeholder,
+        "color": color,
+    }
+
+
+def read_dimensions(path):
+    if not HAS_PIL or not path.lower().endswith(IMAGE_EXTENSIONS):
+        return 0, 0
+    try:
+        # Only the header is read
+        with Image.open(path) as img:
+            return img.size
+    except Exception:
+        # If image is corrupt or cannot be read, just ignore dimensions
+        return 0, 0
+
+
+def walk_root(root):
+    # (subfolders, {(subfolder, filename): (full_path, stat)}) for every media file under root.
+    # Like os.walk, symlinked directories are not descended into.
+    dirs = set()
+    files = {}
+    stack = [("", root)]
+    while stack:
+        subfolder, current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    if not entry.is_symlink():
+                        child = f"{subfolder}/{entry.name}" if subfolder else entry.name
+                        dirs.add(child)
+                        stack.append((child, entry.path))
+                    continue
+                if not entry.name.lower().endswith(MEDIA_EXTENSIONS):
+                    continue
+                files[(subfolder, entry.name)] = (entry.path, entry.stat())
+            except OSError:
+                continue
+    return dirs, files
+
+
+def build_filter(root, folder="", recursive=False, search="", excludes=(), constraints=None):
+    # WHERE clause for the list endpoint's navigation rules:
+    #   search: every file under root whose name contains the query
+    #   recursive: files in folder and its subfolders, otherwise exactly folder
+    #   excludes: drop files whose full path contains any pattern
+    #   constraints: attribute filters from parse_constraints()
+    clauses = ["root = ?"]
+    params = [root]
+    if search:
+        clauses.append("instr(name_lower, ?) > 0")
+        params.append(search)
+    elif recursive:
+        if folder:
+            # "folder0" is the first string after every "folder/..." ('0' follows '/')
+            clauses.append("(subfolder = ? OR (subfolder >= ? AND subfolder < ?))")
+            params.extend([folder, folder + "/", folder + "0"])
+    else:
+        clauses.append("subfolder = ?")
+        params.append(folder)
+    for pattern in excludes:
+        clauses.append("instr(path_lower, ?) = 0")
+        params.append(pattern)
+    if constraints:
+        extra_clauses, extra_params = constraint_filter(constraints)
+        clauses.extend(extra_clauses)
+        params.extend(extra_params)
+    return " AND ".join(clauses), params
+
+
+def file_matches(root, subfolder, filename, folder="", recursive=False, search="", excludes=()):
+    # build_filter as a Python predicate, for rows that never hit the database (pushed changes)
+    if search:
+        if search not in filename.lower():
+            return False
+    elif recursive:
+        if folder and subfolder != folder and not subfolder.startswith(folder + "/"):
+            return False
+    elif subfolder != folder:
+        return False
+    if excludes:
+        path_lower = os.path.join(root, subfolder, filename).lower()
+        if any(pattern in path_lower for pattern in excludes):
+            return False
+    return True
+
+
+class GalleryIndex:
+    def __init__(self, path=INDEX_DB_PATH):
+        self.path = path
+        self.lock = threading.RLock()
+        self.root_locks = {}
+        self.synced_at = {}
+        # Bumped whenever a root's rows change, so derived structures know when to rebuild
+        self.versions = {}
+        # Called with {"root", "added", "modified", "removed"} after every sync that changed something
+        self.listeners = []
+        self.conn = self._connect()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            conn.execute("DROP TABLE IF EXISTS files")
+            conn.execute("DROP TABLE IF EXISTS dirs")
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.executescript(SCHEMA)
+        return conn
+
+    def _root_lock(self, root):
+        with self.lock:
+            return self.root_locks.setdefault(root, threading.Lock())
+
+    def sync(self, root, force=False):
+        # Bring the rows for root up to date with the disk; returns the diff, or None if
+        # the root was synced less than SYNC_INTERVAL ago
+        if not force and time.monotonic() - self.synced_at.get(root, float("-inf")) < SYNC_INTERVAL:
+            return None
+        with self._root_lock(root):
+            # Another thread may have synced while we waited for the lock
+            if not force and time.monotonic() - self.synced_at.get(root, float("-inf")) < SYNC_INTERVAL:
+                return None
+            start = time.perf_counter()
+            dirs, found = walk_root(root)
+
+            with self.lock:
+                existing = {(sub, name): (mtime_ns, size) for sub, name, mtime_ns, size in self.conn.execute(
+                    "SELECT subfolder, filename, mtime_ns, size FROM files WHERE root = ?", (root,))}
+
+            upserts = []
+            added = []
+            modified = []
+            for key, (full_path, stat) in found.items():
+                previous = existing.get(key)
+                if previous is not None and previous == (stat.st_mtime_ns, stat.st_size):
+                    continue
+                subfolder, filename = key
+                width, height = read_dimensions(full_path)
+                fmt = os.path.splitext(filename)[1][1:]
+                upserts.append((root, subfolder, filename, fmt, stat.st_mtime, stat.st_mtime_ns, stat.st_size,
+                                width, height, filename.lower(), full_path.lower()))
+                row = row_to_file((filename, subfolder, fmt, stat.st_mtime, width, height, None, None))
+                (added if previous is None else modified).append(row)
+            removed = [key for key in existing if key not in found]
+
+            with self.lock:
+                self.conn.execute("BEGIN")
+                try:
+                    self.conn.executemany(
+                        "INSERT OR REPLACE INTO files (root, subfolder, filename, format, date, mtime_ns, size, "
+                        "width, height, name_lower, path_lower) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", upserts)
+                    self.conn.executemany("DELETE FROM files WHERE root = ? AND subfolder = ? AND filename = ?",
+                                          [(root, sub, name) for sub, name in removed])
+                    known_dirs = {sub for (sub,) in self.conn.execute("SELECT subfolder FROM dirs WHERE root = ?", (root,))}
+                    if known_dirs != dirs:
+                        self.conn.execute("DELETE FROM dirs WHERE root = ?", (root,))
+                        self.conn.executemany("INSERT INTO dirs (root, subfolder) VALUES (?, ?)", [(root, d) for d in dirs])
+                    self.conn.execute("COMMIT")
+                except Exception:
+                    self.conn.execute("ROLLBACK")
+                    raise
+            self.synced_at[root] = time.monotonic()
+
+            WALK_DURATION.observe(time.perf_counter() - start, operation="sync")
+            FILES_SCANNED.inc(len(found), operation="sync")
+            # Unchanged files reuse the stored dimensions instead of opening the image again
+            CACHE_REQUESTS.inc(len(found) - len(upserts), cache="dimension", result="hit")
+            CACHE_REQUESTS.inc(len(upserts), cache="dimension", result="miss")
+
+        changes = {
+            "root": root,
+            "added": added,
+            "modified": modified,
+            "removed": [{"filename": name, "subfolder": sub} for sub, name in removed],
+        }
+        self._notify(changes)
+        return changes
+
+    def _notify(self, changes):
+        if not (changes["added"] or changes["modified"] or changes["removed"]):
+            return
+        root = changes["root"]
+        self.versions[root] = self.versions.get(root, 0) + 1
+        for listener in self.listeners:
+            try:
+                listener(changes)
+            except Exception as e:
+                print(f"[GalleryIndex] Listener failed: {e}")
+
+    def query(self, root, folder="", recursive=False, search="", excludes=(), skip=0, limit=50,
+              sort="date", direction=None, constraints=None):
+        # (page of rows in sort order, newest first by default, total matching rows)
+        where, params = build_filter(root, folder, recursive, search, excludes, constraints)
+        with self.lock:
+            total = self.conn.execute(f"SELECT COUNT(*) FROM files WHERE {where}", params).fetchone()[0]
+            rows = self.conn.execute(
+                f"SELECT {FILE_COLUMNS} FROM files WHERE {where} ORDER BY {order_by(sort, direction)} LIMIT ? OFFSET ?",
+                params + [limit, skip]).fetchall()
+        return [row_to_file(row) for row in rows], total
+
+    def count(self, root, folder="", recursive=False, search="", excludes=(), constraints=None):
+        where, params = build_filter(root, folder, recursive, search, excludes, constraints)
+        with self.lock:
+            return self.conn.execute(f"SELECT COUNT(*) FROM files WHERE {where}", params).fetchone()[0]
+
+    def query_after(self, root, folder="", recursive=False, search="", excludes=(), constraints=None,
+                    after=None, before_date=None, include_date=False, limit=50):
+        # Keyset page in list order (date DESC, subfolder, filename): rows strictly after the
+        # row key `after` (date, subfolder, filename), or rows dated before `before_date`
+        # (or at it, with include_date); from the newest row when neither is given
+        where, params = build_filter(root, folder, recursive, search, excludes, constraints)
+        if after is not None:
+            date, subfolder, filename = after
+            where += " AND (date < ? OR (date = ? AND (subfolder > ? OR (subfolder = ? AND filename > ?))))"
+            params = params + [date, date, subfolder, subfolder, filename]
+        elif before_date is not None:
+            where += " AND date <= ?" if include_date else " AND date < ?"
+            params = params + [before_date]
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT {FILE_COLUMNS} FROM files WHERE {where} ORDER BY date DESC, subfolder, filename LIMIT ?",
+                params + [limit]).fetchall()
+        return [row_to_file(row) for row in rows]
+
+    def iter_files(self, root, folder="", recursive=False, search="", excludes=(), constraints=None, batch=500):
+        # Every matching row in list order, read one keyset page at a time, so a caller can
+        # stream any number of rows without loading them all (or holding the index lock)
+        after = None
+        while True:
+            rows = self.query_after(root, folder, recursive, search, excludes, constraints, after=after, limit=batch)
+            yield from rows
+            if len(rows) < batch:
+                return
+            last = rows[-1]
+            after = (last["date"], last["subfolder"], last["filename"])
+
+    def rows_to_hash(self, root, extensions, limit):
+        # (subfolder, filename) of files the perceptual hasher hasn't seen yet
+        marks = ", ".join("?" for _ in extensions)
+        with self.lock:
+            return self.conn.execute(
+                f"SELECT subfolder, filename FROM files WHERE root = ? AND hashed = 0 AND lower(format) IN ({marks}) LIMIT ?",
+                [root, *extensions, limit]).fetchall()
+
+    def hash_progress(self, root, extensions):
+        # (files the perceptual hasher has processed, files it will process) for root
+        marks = ", ".join("?" for _ in extensions)
+        with self.lock:
+            return tuple(self.conn.execute(
+                f"SELECT COALESCE(SUM(hashed), 0), COUNT(*) FROM files WHERE root = ? AND lower(format) IN ({marks})",
+                [root, *extensions]).fetchone())
+
+    def set_image_digests(self, root, results):
+        # results: [(subfolder, filename, unsigned 64-bit hash, placeholder, color)], all but
+        # the names None for unreadable files
+        if not results:
+            return
+        params = [(h - (1 << 64) if h is not None and h >= 1 << 63 else h, placeholder, color, root, sub, name)
+                  for sub, name, h, placeholder, color in results]
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                self.conn.executemany(
+                    "UPDATE files SET phash = ?, placeholder = ?, color = ?, hashed = 1 "
+                    "WHERE root = ? AND subfolder = ? AND filename = ?", params)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.versions[root] = self.versions.get(root, 0) + 1
+
+    def hashed_rows(self, root):
+        # [(unsigned hash, list row)] for every file with a perceptual hash
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT {FILE_COLUMNS}, phash FROM files WHERE root = ? AND phash IS NOT NULL", (root,)).fetchall()
+        return [(row[8] & 0xFFFFFFFFFFFFFFFF, row_to_file(row)) for row in rows]
+
+    def apply_file_ops(self, root, written, removed, evict=None):
+        # Record files the bulk operations wrote or removed without re-walking root.
+        #   written: [(source (subfolder, filename) or None, subfolder, filename, full_path, stat)]
+        #            rows copied from an indexed source keep its dimensions, placeholder and hash
+        #   removed: [(subfolder, filename, full_path)]
+        # evict(full_path) runs for every written or removed file before the commit, so
+        # derived caches never outlive the rows they were built from.
+        added = []
+        modified = []
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                for source, subfolder, filename, full_path, stat in written:
+                    existed = self.conn.execute(
+                        "SELECT 1 FROM files WHERE root = ? AND subfolder = ? AND filename = ?",
+                        (root, subfolder, filename)).fetchone() is not None
+                    if evict is not None:
+                        # The target may have overwritten a file that was never indexed
+                        evict(full_path)
+                    copied = 0
+                    if source is not None:
+                        copied = self.conn.execute(
+                            "INSERT OR REPLACE INTO files (root, subfolder, filename, format, date, mtime_ns, size, "
+                            "width, height, name_lower, path_lower, placeholder, color, phash, hashed) "
+                            "SELECT root, ?, ?, format, ?, ?, ?, width, height, ?, ?, placeholder, color, phash, hashed FROM files "
+                            "WHERE root = ? AND subfolder = ? AND filename = ?",
+                            (subfolder, filename, stat.st_mtime, stat.st_mtime_ns, stat.st_size,
+                             filename.lower(), full_path.lower(), root, *source)).rowcount
+                    if not copied:
+                        width, height = read_dimensions(full_path)
+                        self.conn.execute(
+                            "INSERT OR REPLACE INTO files (root, subfolder, filename, format, date, mtime_ns, size, "
+                            "width, height, name_lower, path_lower) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                            (root, subfolder, filename, os.path.splitext(filename)[1][1:], stat.st_mtime,
+                             stat.st_mtime_ns, stat.st_size, width, height, filename.lower(), full_path.lower()))
+                    parts = subfolder.split("/") if subfolder else []
+                    self.conn.executemany("INSERT OR IGNORE INTO dirs (root, subfolder) VALUES (?, ?)",
+                                          [(root, "/".join(parts[:i])) for i in range(1, len(parts) + 1)])
+                    row = self.conn.execute(
+                        f"SELECT {FILE_COLUMNS} FROM files WHERE root = ? AND subfolder = ? AND filename = ?",
+                        (root, subfolder, filename)).fetchone()
+                    (modified if existed else added).append(row_to_file(row))
+                for subfolder, filename, full_path in removed:
+                    if evict is not None:
+                        evict(full_path)
+                self.conn.executemany("DELETE FROM files WHERE root = ? AND subfolder = ? AND filename = ?",
+                                      [(root, sub, name) for sub, name, _ in removed])
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+        changes = {
+            "root": root,
+            "added": added,
+            "modified": modified,
+            "removed": [{"filename": name, "subfolder": sub} for sub, name, _ in removed],
+        }
+        self._notify(changes)
+        return changes
+
+    def search_folders(self, root, search):
+        # Subfolders (anywhere under root) whose own name contains the search query
+        with self.lock:
+            subfolders = [sub for (sub,) in self.conn.execute(
+                "SELECT subfolder FROM dirs WHERE root = ? ORDER BY subfolder", (root,))]
+        return [sub for sub in subfolders if search in sub.rsplit("/", 1)[-1].lower()]
+
+    def list_files(self, root, folder="", recursive=False, search="", excludes=(), skip=0, limit=50,
+                   sort="date", direction=None, constraints=None):
+        # Everything the list endpoint needs: (page of rows, total, matching subfolders)
+        root = normalize_root(root)
+        self.sync(root)
+        files, total = self.query(root, folder, recursive, search, excludes, skip, limit, sort, direction, constraints)
+        subfolders = self.search_folders(root, search) if search else []
+        return files, total, subfolders
+
+
+GALLERY_INDEX = GalleryIndex()
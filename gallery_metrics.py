@@ -0,0 +1,214 @@
+import time
+import bisect
+import functools
+import threading
+from collections import OrderedDict
+
+# Minimal Prometheus-style metrics for the gallery server, rendered by /web/gallery/metrics
+# in the text exposition format. Updating a metric is a dict update under a lock, so
+# collection stays on in production.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def format_labels(labelnames, values):
+    if not labelnames:
+        return ""
+    pairs = []
+    for name, value in zip(labelnames, values):
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        return self.values.get(key, 0)
+
+    def render(self):
+        with self.lock:
+            items = sorted(self.values.items())
+        for key, value in items:
+            yield f"{self.name}{format_labels(self.labelnames, key)} {format_value(value)}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.lock = threading.Lock()
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self.values = {}
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def time(self, **labels):
+        return HistogramTimer(self, labels)
+
+    def render(self):
+        with self.lock:
+            items = sorted((key, (list(state[0]), state[1], state[2])) for key, state in self.values.items())
+        names = self.labelnames + ("le",)
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket{format_labels(names, key + (format_value(bound),))} {cumulative}"
+            labels = format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {format_value(total)}"
+            yield f"{self.name}_count{labels} {count}"
+
+
+class HistogramTimer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class CacheRatio:
+    # Gauge derived from CACHE_REQUESTS at render time
+    kind = "gauge"
+
+    def __init__(self, name, documentation, requests):
+        self.name = name
+        self.documentation = documentation
+        self.requests = requests
+
+    def render(self):
+        totals = {}
+        with self.requests.lock:
+            for (cache, result), value in self.requests.values.items():
+                hits, count = totals.get(cache, (0, 0))
+                totals[cache] = (hits + (value if result == "hit" else 0), count + value)
+        for cache, (hits, count) in sorted(totals.items()):
+            if count:
+                yield f'{self.name}{{cache="{cache}"}} {format_value(hits / count)}'
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+ROUTE_LATENCY = REGISTRY.register(Histogram(
+    "web_gallery_request_duration_seconds", "Gallery route latency", ("route",)))
+ROUTE_REQUESTS = REGISTRY.register(Counter(
+    "web_gallery_requests_total", "Gallery requests by route and status", ("route", "status")))
+WALK_DURATION = REGISTRY.register(Histogram(
+    "web_gallery_walk_duration_seconds", "Directory walk and scan duration", ("operation",)))
+FILES_SCANNED = REGISTRY.register(Counter(
+    "web_gallery_files_scanned_total", "Files examined by directory scans", ("operation",)))
+THUMBNAIL_DURATION = REGISTRY.register(Histogram(
+    "web_gallery_thumbnail_generation_seconds", "Thumbnail generation time by source format", ("format", "size")))
+THUMBNAIL_JOBS = REGISTRY.register(Counter(
+    "web_gallery_thumbnail_jobs_total", "Scheduled thumbnail jobs by priority and result", ("priority", "result")))
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    "web_gallery_cache_requests_total", "Cache lookups by cache and result (hit/miss)", ("cache", "result")))
+CACHE_HIT_RATIO = REGISTRY.register(CacheRatio(
+    "web_gallery_cache_hit_ratio", "Cache hit ratio since startup", CACHE_REQUESTS))
+
+
+def record_cache(cache, hit):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def timed_route(route):
+    # Wrap an aiohttp handler to record its latency and response status
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(request):
+            start = time.perf_counter()
+            status = 500
+            try:
+                response = await handler(request)
+                status = response.status
+                return response
+            finally:
+                ROUTE_LATENCY.observe(time.perf_counter() - start, route=route)
+                ROUTE_REQUESTS.inc(route=route, status=str(status))
+        return wrapper
+    return decorator
+
+
+class FileInfoCache:
+    # Bounded LRU of per-file values (dimensions, parsed metadata) keyed on path and
+    # validated against mtime and size; hits and misses are reported as cache metrics
+    def __init__(self, name, max_entries):
+        self.name = name
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get(self, path, stat):
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                self.entries.move_to_end(path)
+                record_cache(self.name, True)
+                return entry[2]
+        record_cache(self.name, False)
+        return None
+
+    def put(self, path, stat, value):
+        with self.lock:
+            self.entries[path] = (stat.st_mtime_ns, stat.st_size, value)
+            self.entries.move_to_end(path)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
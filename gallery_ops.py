@@ -0,0 +1,195 @@
+import os
+import time
+import uuid
+import shutil
+import threading
+import concurrent.futures
+from server import PromptServer
+from .gallery_index import GALLERY_INDEX, normalize_root
+from .gallery_thumbnails import evict_thumbnails
+
+# Bulk delete / move / copy of gallery files.
+# A job runs on a background thread that hands the file operations to a shared worker
+# pool in chunks. After each chunk the gallery index is updated in one transaction (with
+# the thumbnail cache entries of removed or overwritten files evicted inside it), so the
+# listing, websocket subscribers and thumbnails stay consistent without a rescan.
+# Progress is polled from /web/gallery/bulk/status or pushed as "web_gallery.bulk_progress"
+# events to the websocket client that started the job.
+
+BULK_OPERATIONS = ("delete", "move", "copy")
+CONFLICT_POLICIES = ("rename", "skip", "overwrite")
+PROGRESS_EVENT = "web_gallery.bulk_progress"
+
+BULK_WORKERS = 4
+# Files per index transaction / progress update
+BULK_CHUNK = 64
+# Only the first few errors are kept for the status response
+MAX_ERRORS = 50
+# Finished jobs are forgotten after this many seconds
+JOB_TTL = 600
+
+
+def inside_root(root, path):
+    # Whether path resolves to root itself or something below it (no "..", symlink escapes)
+    root = os.path.realpath(root)
+    return os.path.commonpath([root, os.path.realpath(path)]) == root
+
+
+def free_name(directory, filename, reserved=()):
+    # filename, or "name_1.ext", "name_2.ext"... if it's taken in directory (or reserved)
+    base, ext = os.path.splitext(filename)
+    candidate = filename
+    n = 1
+    while candidate in reserved or os.path.exists(os.path.join(directory, candidate)):
+        candidate = f"{base}_{n}{ext}"
+        n += 1
+    return candidate
+
+
+class BulkJob:
+    def __init__(self, operation, root, root_path, files, destination, conflict, client_id):
+        self.id = uuid.uuid4().hex
+        self.operation = operation
+        self.root = root
+        self.root_path = root_path
+        self.files = files
+        self.destination = destination
+        self.conflict = conflict
+        self.client_id = client_id
+        self.state = "queued"
+        self.done = 0
+        self.failed = 0
+        self.skipped = 0
+        self.errors = []
+        self.cancelled = threading.Event()
+        self.lock = threading.Lock()
+        # target directory -> names already handed out by this job
+        self.reserved = {}
+        self.finished_at = None
+
+    def status(self):
+        return {
+            "job_id": self.id,
+            "operation": self.operation,
+            "root_path": self.root_path,
+            "state": self.state,
+            "total": len(self.files),
+            "done": self.done,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "errors": self.errors,
+        }
+
+
+class BulkOperations:
+    def __init__(self, index):
+        self.index = index
+        self.lock = threading.Lock()
+        self.jobs = {}
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=BULK_WORKERS, thread_name_prefix="GalleryBulk")
+
+    def start(self, operation, root_path, files, destination="", conflict="rename", client_id=None):
+        # files: [(subfolder, filename)]; destination: subfolder of the same root (move/copy)
+        destination = destination.replace("\\", "/").strip("/")
+        job = BulkJob(operation, normalize_root(root_path), root_path, files, destination, conflict, client_id)
+        with self.lock:
+            now = time.monotonic()
+            for job_id in [j for j, old in self.jobs.items() if old.finished_at and now - old.finished_at > JOB_TTL]:
+                del self.jobs[job_id]
+            self.jobs[job.id] = job
+        threading.Thread(target=self._run, args=(job,), name="GalleryBulkJob", daemon=True).start()
+        return job
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is None:
+            return False
+        job.cancelled.set()
+        return True
+
+    def _apply(self, job, subfolder, filename):
+        # One file; returns ("written", source, subfolder, filename, full_path, stat, removed path or None),
+        # ("removed", subfolder, filename, full_path) or ("skipped",)
+        source = os.path.join(job.root, subfolder, filename)
+        if not inside_root(job.root, source) or not os.path.isfile(source):
+            raise FileNotFoundError(f"File not found: {subfolder + '/' if subfolder else ''}{filename}")
+        if job.operation == "delete":
+            os.remove(source)
+            return ("removed", subfolder, filename, source)
+
+        target_dir = os.path.join(job.root, job.destination)
+        if not inside_root(job.root, target_dir):
+            raise ValueError(f"Destination is outside the gallery root: {job.destination}")
+        os.makedirs(target_dir, exist_ok=True)
+        if os.path.samefile(os.path.dirname(source), target_dir) and (job.operation == "move" or job.conflict != "rename"):
+            return ("skipped",)
+        with job.lock:
+            # Names are picked under the job lock so two workers never choose the same one
+            target_name = filename
+            if os.path.exists(os.path.join(target_dir, filename)) or filename in job.reserved.get(target_dir, ()):
+                if job.conflict == "skip":
+                    return ("skipped",)
+                if job.conflict == "rename":
+                    target_name = free_name(target_dir, filename, job.reserved.get(target_dir, ()))
+            job.reserved.setdefault(target_dir, set()).add(target_name)
+        target = os.path.join(target_dir, target_name)
+        if job.operation == "move":
+            shutil.move(source, target)
+        else:
+            shutil.copy2(source, target)
+        return ("written", (subfolder, filename), job.destination, target_name, target, os.stat(target),
+                source if job.operation == "move" else None)
+
+    def _run(self, job):
+        job.state = "running"
+        self._progress(job)
+        try:
+            for start in range(0, len(job.files), BULK_CHUNK):
+                if job.cancelled.is_set():
+                    job.state = "cancelled"
+                    break
+                chunk = job.files[start:start + BULK_CHUNK]
+                futures = [self.pool.submit(self._apply, job, sub, name) for sub, name in chunk]
+                written = []
+                removed = []
+                for (sub, name), future in zip(chunk, futures):
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        job.failed += 1
+                        if len(job.errors) < MAX_ERRORS:
+                            job.errors.append({"subfolder": sub, "filename": name, "error": str(e)})
+                        continue
+                    if result[0] == "skipped":
+                        job.skipped += 1
+                        continue
+                    job.done += 1
+                    if result[0] == "removed":
+                        removed.append(result[1:])
+                    else:
+                        written.append(result[1:6])
+                        if result[6] is not None:
+                            removed.append((sub, name, result[6]))
+                if written or removed:
+                    self.index.apply_file_ops(job.root, written, removed, evict=evict_thumbnails)
+                self._progress(job)
+            else:
+                job.state = "done"
+        except Exception as e:
+            print(f"[GalleryBulk] Job {job.id} failed: {e}")
+            job.state = "failed"
+            job.errors.append({"error": str(e)})
+        job.finished_at = time.monotonic()
+        self._progress(job)
+        print(f"[GalleryBulk] {job.operation} in {job.root}: {job.done} done, {job.skipped} skipped, {job.failed} failed ({job.state})")
+
+    def _progress(self, job):
+        if job.client_id:
+            PromptServer.instance.send_sync(PROGRESS_EVENT, job.status(), job.client_id)
+
+
+BULK = BulkOperations(GALLERY_INDEX)
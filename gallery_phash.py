@@ -0,0 +1,273 @@
+import io
+import os
+import base64
+import threading
+import concurrent.futures
+import numpy as np
+from .gallery_index import GALLERY_INDEX
+
+# Try to import PIL, handle failure
+try:
+    from PIL import Image, features
+    HAS_PIL = True
+    HAS_WEBP = features.check("webp")
+except ImportError:
+    HAS_PIL = False
+    HAS_WEBP = False
+
+# Perceptual hashes for duplicate detection and "find similar", plus the tiny list
+# placeholders, from one background decode per image.
+# Each image gets a 64-bit dHash (is each pixel brighter than its right neighbour, on a
+# 9x8 grayscale thumbnail) computed from a reduced decode: JPEGs are DCT-scaled by the
+# decoder via draft(), other formats are box-reduced before the final resize. Thumbnails
+# are stacked and hashed in one vectorized NumPy pass per batch. The same reduced image
+# yields a ~16px WebP data URI and the average color that /web/gallery/list rows carry,
+# so the grid can paint before any thumbnail request completes. Everything lives in the
+# gallery index; a BK-tree per root answers Hamming-radius queries without comparing
+# against every image.
+
+HASH_SIZE = 8
+HASH_EXTENSIONS = ("png", "jpg", "jpeg", "webp", "gif")
+# Files hashed per batch (one NumPy pass, one index transaction)
+HASH_BATCH = 256
+HASH_WORKERS = 4
+
+# Longest side of the inline placeholder image
+PLACEHOLDER_SIZE = 16
+PLACEHOLDER_QUALITY = 40
+
+DUPLICATE_THRESHOLD = 6
+SIMILAR_DISTANCE = 16
+
+try:
+    popcount = int.bit_count
+except AttributeError:
+    # Python < 3.10
+    def popcount(value):
+        return bin(value).count("1")
+
+
+def placeholder_uri(img):
+    # ~16px data URI of an RGB image (WebP, or JPEG when Pillow lacks WebP support)
+    tiny = img.copy()
+    tiny.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE), Image.Resampling.BILINEAR)
+    buffer = io.BytesIO()
+    if HAS_WEBP:
+        tiny.save(buffer, "WEBP", quality=PLACEHOLDER_QUALITY, method=4)
+        mime = "image/webp"
+    else:
+        tiny.save(buffer, "JPEG", quality=PLACEHOLDER_QUALITY)
+        mime = "image/jpeg"
+    return f"data:{mime};base64,{base64.b64encode(buffer.getvalue()).decode('ascii')}"
+
+
+def reduce_image(path):
+    # (hash thumbnail: [HASH_SIZE, HASH_SIZE + 1] grayscale array, placeholder URI, "#rrggbb"),
+    # or None if the file can't be read
+    try:
+        with Image.open(path) as img:
+            img.draft("RGB", (PLACEHOLDER_SIZE * 4, PLACEHOLDER_SIZE * 4))
+            if img.mode in ("RGBA", "LA", "PA") or (img.mode == "P" and "transparency" in img.info):
+                # Flatten on white like the thumbnails do
+                rgba = img.convert("RGBA")
+                small = Image.new("RGB", rgba.size, (255, 255, 255))
+                small.paste(rgba, mask=rgba.split()[-1])
+            else:
+                small = img.convert("RGB")
+        small = small.reduce(max(1, min(small.size) // (PLACEHOLDER_SIZE * 4)))
+        gray = small.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.BILINEAR)
+        r, g, b = small.resize((1, 1), Image.Resampling.BOX).getpixel((0, 0))
+        return np.asarray(gray, dtype=np.int16), placeholder_uri(small), f"#{r:02x}{g:02x}{b:02x}"
+    except Exception:
+        return None
+
+
+def dhash_arrays(stack):
+    # [N, H, H+1] grayscale thumbnails -> N unsigned 64-bit hashes
+    bits = stack[:, :, 1:] > stack[:, :, :-1]
+    packed = np.packbits(bits.reshape(len(stack), -1), axis=1)
+    return packed.view(">u8").ravel().tolist()
+
+
+class BKTree:
+    # Metric tree over Hamming distance. Each node holds one hash (and every item with that
+    # hash); children are keyed by their distance to the node, so a radius query only
+    # descends into children whose key is within [d - radius, d + radius].
+
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def add(self, value, item):
+        self.size += 1
+        if self.root is None:
+            self.root = (value, [item], {})
+            return
+        node = self.root
+        while True:
+            distance = popcount(node[0] ^ value)
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = (value, [item], {})
+                return
+            node = child
+
+    def search(self, value, radius):
+        # [(distance, item)] for every item within radius of value
+        results = []
+        if self.root is None:
+            return results
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            distance = popcount(node[0] ^ value)
+            if distance <= radius:
+                results.extend((distance, item) for item in node[1])
+            for child_distance, child in node[2].items():
+                if distance - radius <= child_distance <= distance + radius:
+                    stack.append(child)
+        return results
+
+
+class PerceptualIndex:
+    def __init__(self, index):
+        self.index = index
+        self.lock = threading.Lock()
+        self.root_locks = {}
+        self.pending = set()
+        self.worker = None
+        # root -> (index version, BK-tree, {(subfolder, filename): (hash, row)})
+        self.trees = {}
+        # (root, version, threshold) -> clusters
+        self.clusters = {}
+        index.listeners.append(self.schedule_changes)
+
+    def schedule_changes(self, changes):
+        # Index listener: hash new and modified files in the background
+        if changes["added"] or changes["modified"]:
+            self.schedule(changes["root"])
+
+    def schedule(self, root):
+        with self.lock:
+            self.pending.add(root)
+            if self.worker is not None:
+                return
+            self.worker = threading.Thread(target=self._run, name="PerceptualIndex", daemon=True)
+            self.worker.start()
+
+    def _run(self):
+        while True:
+            with self.lock:
+                if not self.pending:
+                    self.worker = None
+                    return
+                root = self.pending.pop()
+            try:
+                self.hash_root(root)
+            except Exception as e:
+                print(f"[PerceptualIndex] Hashing {root} failed: {e}")
+
+    def _root_lock(self, root):
+        with self.lock:
+            return self.root_locks.setdefault(root, threading.Lock())
+
+    def hash_root(self, root):
+        # Hash (and make placeholders for) every file of root the index hasn't hashed yet;
+        # returns how many were processed
+        if not HAS_PIL:
+            return 0
+        hashed = 0
+        with self._root_lock(root), concurrent.futures.ThreadPoolExecutor(max_workers=HASH_WORKERS) as pool:
+            while True:
+                rows = self.index.rows_to_hash(root, HASH_EXTENSIONS, HASH_BATCH)
+                if not rows:
+                    break
+                # PIL releases the GIL while decoding, so threads overlap the reads
+                reduced = list(pool.map(reduce_image, [os.path.join(root, sub, name) for sub, name in rows]))
+                readable = [i for i, r in enumerate(reduced) if r is not None]
+                hashes = dict(zip(readable, dhash_arrays(np.stack([reduced[i][0] for i in readable])))) if readable else {}
+                self.index.set_image_digests(root, [
+                    (sub, name, hashes.get(i), *(reduced[i][1:] if reduced[i] is not None else (None, None)))
+                    for i, (sub, name) in enumerate(rows)])
+                hashed += len(rows)
+        if hashed:
+            print(f"[PerceptualIndex] Hashed {hashed} images in {root}")
+        return hashed
+
+    def progress(self, root):
+        # (hashed, hashable) files of root; starts the background hasher when some are missing,
+        # so callers answer from the hashes that exist instead of waiting for the rest
+        hashed, total = self.index.hash_progress(root, HASH_EXTENSIONS)
+        if hashed < total and HAS_PIL:
+            self.schedule(root)
+        return hashed, total
+
+    def tree(self, root):
+        version = self.index.versions.get(root, 0)
+        with self.lock:
+            cached = self.trees.get(root)
+        if cached is not None and cached[0] == version:
+            return cached[1], cached[2]
+        tree = BKTree()
+        items = {}
+        for value, row in self.index.hashed_rows(root):
+            tree.add(value, row)
+            items[(row["subfolder"], row["filename"])] = (value, row)
+        with self.lock:
+            self.trees[root] = (version, tree, items)
+        return tree, items
+
+    def similar(self, root, subfolder, filename, k=12, max_distance=SIMILAR_DISTANCE):
+        # Up to k rows closest to the given file (each with a "distance"), or None if the
+        # file has no hash
+        tree, items = self.tree(root)
+        target = items.get((subfolder, filename))
+        if target is None:
+            return None
+        matches = [(d, row) for d, row in tree.search(target[0], max_distance)
+                   if (row["subfolder"], row["filename"]) != (subfolder, filename)]
+        matches.sort(key=lambda m: (m[0], -m[1]["date"]))
+        return [dict(row, distance=d) for d, row in matches[:k]]
+
+    def duplicates(self, root, threshold=DUPLICATE_THRESHOLD):
+        # Clusters (lists of rows, newest first) of images within threshold of each other,
+        # joined transitively; largest clusters first
+        key = (root, self.index.versions.get(root, 0), threshold)
+        tree, items = self.tree(root)
+        with self.lock:
+            cached = self.clusters.get(key)
+        if cached is not None:
+            return cached
+
+        parent = {}
+
+        def find(x):
+            while parent.get(x, x) != x:
+                parent[x] = parent.get(parent[x], parent[x])
+                x = parent[x]
+            return x
+
+        for item_key, (value, row) in items.items():
+            for _, other in tree.search(value, threshold):
+                other_key = (other["subfolder"], other["filename"])
+                a, b = find(item_key), find(other_key)
+                if a != b:
+                    parent[a] = b
+
+        groups = {}
+        for item_key in items:
+            groups.setdefault(find(item_key), []).append(items[item_key][1])
+        clusters = [sorted(rows, key=lambda r: -r["date"]) for rows in groups.values() if len(rows) > 1]
+        clusters.sort(key=lambda rows: -len(rows))
+
+        with self.lock:
+            # Only the current version of each root is worth keeping
+            self.clusters = {k: v for k, v in self.clusters.items() if k[0] != root}
+            self.clusters[key] = clusters
+        return clusters
+
+
+PERCEPTUAL_INDEX = PerceptualIndex(GALLERY_INDEX)
@@ -0,0 +1,96 @@
+import time
+import threading
+from server import PromptServer
+from .gallery_index import GALLERY_INDEX, normalize_root, file_matches, row_satisfies
+
+# Websocket push of gallery changes. A client subscribes with its ComfyUI websocket
+# client id and the same path/folder/recursive/search/exclude and attribute filters it
+# lists with; a watcher thread re-syncs the subscribed roots and every diff of the
+# gallery index is sent as a "web_gallery.changes" event carrying /web/gallery/list rows,
+# so clients patch their grid in place instead of re-listing.
+
+CHANGES_EVENT = "web_gallery.changes"
+WATCH_INTERVAL = 2.0
+
+
+class GallerySubscriptions:
+    def __init__(self, index):
+        self.index = index
+        self.lock = threading.Lock()
+        # client id -> subscription
+        self.subscriptions = {}
+        self.worker = None
+        index.listeners.append(self.dispatch)
+
+    def subscribe(self, client_id, root_path, folder="", recursive=False, search="", excludes=(), constraints=None):
+        subscription = {
+            "root": normalize_root(root_path),
+            "root_path": root_path,
+            "folder": folder,
+            "recursive": recursive,
+            "search": search,
+            "excludes": tuple(excludes),
+            "constraints": constraints or {},
+        }
+        with self.lock:
+            self.subscriptions[client_id] = subscription
+            if self.worker is None:
+                self.worker = threading.Thread(target=self._run, name="GalleryWatcher", daemon=True)
+                self.worker.start()
+        return subscription
+
+    def unsubscribe(self, client_id):
+        with self.lock:
+            return self.subscriptions.pop(client_id, None) is not None
+
+    def _run(self):
+        while True:
+            time.sleep(WATCH_INTERVAL)
+            with self.lock:
+                # Forget clients whose websocket has closed
+                sockets = PromptServer.instance.sockets
+                for client_id in [c for c in self.subscriptions if c not in sockets]:
+                    del self.subscriptions[client_id]
+                if not self.subscriptions:
+                    self.worker = None
+                    return
+                roots = {s["root"] for s in self.subscriptions.values()}
+            for root in roots:
+                try:
+                    # Diffs reach subscribers through dispatch()
+                    self.index.sync(root)
+                except Exception as e:
+                    print(f"[GalleryWatcher] Sync of {root} failed: {e}")
+
+    def dispatch(self, changes):
+        # Index listener: forward the part of a diff each subscriber's view contains
+        with self.lock:
+            targets = [(c, s) for c, s in self.subscriptions.items() if s["root"] == changes["root"]]
+        for client_id, s in targets:
+            def visible(row):
+                return file_matches(s["root"], row["subfolder"], row["filename"],
+                                    s["folder"], s["recursive"], s["search"], s["excludes"])
+            constraints = s["constraints"]
+            added = [row for row in changes["added"] if visible(row) and row_satisfies(row, constraints)]
+            modified = []
+            removed = [row for row in changes["removed"] if visible(row)]
+            for row in changes["modified"]:
+                if not visible(row):
+                    continue
+                if row_satisfies(row, constraints):
+                    modified.append(row)
+                else:
+                    # Rewritten so it no longer passes the attribute filters: gone from the view
+                    removed.append({"filename": row["filename"], "subfolder": row["subfolder"]})
+            if not (added or modified or removed):
+                continue
+            PromptServer.instance.send_sync(CHANGES_EVENT, {
+                "root_path": s["root_path"],
+                "folder": s["folder"],
+                "added": added,
+                "modified": modified,
+                "removed": removed,
+            }, client_id)
+
+
+SUBSCRIPTIONS = GallerySubscriptions(GALLERY_INDEX)
@@ -0,0 +1,115 @@
+import os
+import heapq
+import itertools
+import threading
+import concurrent.futures
+from .gallery_metrics import THUMBNAIL_JOBS
+
+# Priority scheduler for thumbnail rendering.
+# Work runs on a few worker threads in priority-class order: "visible" tiles, then
+# "prefetch" (images the client expects to show next), then "prewarm" (server-initiated,
+# e.g. thumbnails for freshly generated outputs). Within a class the newest request runs
+# first, so after a fast scroll the tiles now on screen beat the ones scrolled past.
+# Requests for a key already queued or running share one job; a request with a higher
+# priority promotes the job. A waiter that goes away releases its claim, and a queued job
+# nobody is waiting for any more is cancelled instead of rendered.
+
+PRIORITIES = ("visible", "prefetch", "prewarm")
+THUMBNAIL_WORKERS = max(1, min(4, os.cpu_count() or 1))
+
+
+class ScheduledJob:
+    def __init__(self, key, fn, rank, pinned):
+        self.key = key
+        self.fn = fn
+        self.rank = rank
+        # Latest heap entry for this job; older entries are skipped when popped
+        self.seq = None
+        self.waiters = 0
+        # Pinned jobs (prewarm) run even when nobody is waiting for them
+        self.pinned = pinned
+        self.state = "queued"
+        self.future = concurrent.futures.Future()
+
+
+class ThumbnailScheduler:
+    def __init__(self, workers=THUMBNAIL_WORKERS):
+        self.workers = workers
+        self.condition = threading.Condition()
+        self.heap = []
+        self.jobs = {}
+        self.counter = itertools.count()
+        self.threads = []
+
+    def submit(self, key, fn, priority="visible", wait=True):
+        # Queue fn() under key (or join the job already there). With wait=True the caller
+        # holds a claim it must give back with release() if it stops waiting.
+        rank = PRIORITIES.index(priority)
+        with self.condition:
+            job = self.jobs.get(key)
+            if job is None:
+                job = self.jobs[key] = ScheduledJob(key, fn, rank, pinned=not wait)
+                self._push(job, rank)
+            else:
+                THUMBNAIL_JOBS.inc(priority=priority, result="joined")
+                if job.state == "queued":
+                    # Promote, and re-queue as the newest entry of its class (LIFO)
+                    self._push(job, min(rank, job.rank))
+            if wait:
+                job.waiters += 1
+            else:
+                job.pinned = True
+            self._start_workers()
+            self.condition.notify()
+        return job
+
+    def release(self, job):
+        # A waiter stopped waiting (client disconnected)
+        with self.condition:
+            job.waiters -= 1
+            if job.waiters > 0 or job.pinned or job.state != "queued":
+                return
+            job.state = "cancelled"
+            if self.jobs.get(job.key) is job:
+                del self.jobs[job.key]
+        job.future.cancel()
+        THUMBNAIL_JOBS.inc(priority=PRIORITIES[job.rank], result="cancelled")
+
+    def pending(self):
+        with self.condition:
+            return sum(1 for job in self.jobs.values() if job.state == "queued")
+
+    def _push(self, job, rank):
+        job.rank = rank
+        job.seq = next(self.counter)
+        heapq.heappush(self.heap, (rank, -job.seq, job))
+
+    def _start_workers(self):
+        while len(self.threads) < self.workers:
+            thread = threading.Thread(target=self._run, name=f"ThumbnailWorker-{len(self.threads)}", daemon=True)
+            self.threads.append(thread)
+            thread.start()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while True:
+                    while not self.heap:
+                        self.condition.wait()
+                    rank, neg_seq, job = heapq.heappop(self.heap)
+                    if job.state == "queued" and -neg_seq == job.seq:
+                        break
+                job.state = "running"
+            if job.future.set_running_or_notify_cancel():
+                try:
+                    job.future.set_result(job.fn())
+                    THUMBNAIL_JOBS.inc(priority=PRIORITIES[rank], result="completed")
+                except Exception as e:
+                    job.future.set_exception(e)
+                    THUMBNAIL_JOBS.inc(priority=PRIORITIES[rank], result="failed")
+            with self.condition:
+                if self.jobs.get(job.key) is job:
+                    del self.jobs[job.key]
+
+
+THUMBNAIL_SCHEDULER = ThumbnailScheduler()
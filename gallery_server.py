@@ -2,8 +2,22 @@ import os
 import folder_paths
 from server import PromptServer
 from aiohttp import web
+from .checkpoint_catalog import CATALOG as CHECKPOINT_CATALOG
+from .safetensors_index import INDEX as CHECKPOINT_INDEX, PENDING as CHECKPOINT_PENDING
+from .gallery_format import list_response
+from .gallery_metrics import (REGISTRY as METRICS, CONTENT_TYPE as METRICS_CONTENT_TYPE, WALK_DURATION,
+                              THUMBNAIL_DURATION, FileInfoCache, record_cache, timed_route)
+from .gallery_index import GALLERY_INDEX, SORT_ORDERS, normalize_root, parse_constraints
+from .gallery_thumbnails import THUMBNAIL_SIZES, THUMBNAIL_LADDER, THUMBNAIL_CACHE, snap_width, render_ladder
+from .gallery_scheduler import THUMBNAIL_SCHEDULER, PRIORITIES as THUMBNAIL_PRIORITIES
+from .gallery_phash import PERCEPTUAL_INDEX, DUPLICATE_THRESHOLD, SIMILAR_DISTANCE
+from .gallery_push import SUBSCRIPTIONS as GALLERY_SUBSCRIPTIONS
+from .gallery_ops import BULK as BULK_OPS, BULK_OPERATIONS, CONFLICT_POLICIES, inside_root
+from .gallery_export import zip_response
+from .gallery_collection import merged_page, total_count, decode_cursor
 import sys
 import io
+import asyncio
 
 # Try to import PIL, handle failure
 try:
@@ -16,17 +30,75 @@ except ImportError:
 # Serve the gallery frontend
 WEB_ROOT = os.path.join(os.path.dirname(__file__), "web")
 GALLERY_PATH = os.path.join(WEB_ROOT, "gallery")
-THUMBNAIL_CACHE_DIR = os.path.join(os.path.dirname(__file__), "thumbnails")
 
 # Ensure directories exist
 os.makedirs(GALLERY_PATH, exist_ok=True)
-os.makedirs(THUMBNAIL_CACHE_DIR, exist_ok=True)
+
+# Seconds between checks for a disconnected client while a thumbnail is queued
+DISCONNECT_POLL = 0.25
+# Pre-warm thumbnails for at most this many files added by one index sync
+PREWARM_MAX = 64
+PREWARM_FORMATS = ("png", "jpg", "jpeg", "webp", "gif")
+
+# PNG metadata parses, reused while a file's mtime and size are unchanged
+# (image dimensions live in the gallery index)
+METADATA_CACHE = FileInfoCache("metadata", 4096)
+
+def resolve_gallery_root(custom_path):
+    # Gallery root for a ?path= value: absolute path, path relative to the ComfyUI root,
+    # or the output directory when empty. None if the path doesn't exist.
+    if not custom_path:
+        return folder_paths.get_output_directory()
+    if os.path.isdir(custom_path):
+        return custom_path
+    abs_custom_path = os.path.abspath(os.path.join(folder_paths.base_path, custom_path))
+    if os.path.isdir(abs_custom_path):
+        return abs_custom_path
+    return None
+
+def thumbnail_response(cached):
+    # The file store hands back a path (served with sendfile), the SQLite store the JPEG bytes
+    if isinstance(cached, bytes):
+        return web.Response(body=cached, content_type="image/jpeg")
+    return web.FileResponse(cached)
+
+def render_thumbnail_ladder(full_path, source_mtime):
+    # Runs on a scheduler worker: every rung of the ladder from one decode, unless an earlier
+    # job already stored them
+    cached = {rung: THUMBNAIL_CACHE.get(full_path, rung, source_mtime) for rung in THUMBNAIL_LADDER}
+    if all(entry is not None for entry in cached.values()):
+        return cached
+    source_format = os.path.splitext(full_path)[1][1:].lower()
+    with THUMBNAIL_DURATION.time(format=source_format, size="ladder"):
+        ladder = render_ladder(full_path)
+    return THUMBNAIL_CACHE.put_ladder(full_path, source_mtime, ladder)
+
+def prewarm_thumbnails(changes):
+    # Index listener: render thumbnails for a handful of new outputs before anyone scrolls to
+    # them (a first scan of a whole gallery is left to on-demand rendering)
+    if not HAS_PIL or len(changes["added"]) > PREWARM_MAX:
+        return
+    for row in changes["added"]:
+        if row["format"].lower() not in PREWARM_FORMATS:
+            continue
+        full_path = os.path.join(changes["root"], row["subfolder"], row["filename"])
+        try:
+            source_mtime = os.path.getmtime(full_path)
+        except OSError:
+            continue
+        THUMBNAIL_SCHEDULER.submit(full_path, lambda p=full_path, m=source_mtime: render_thumbnail_ladder(p, m),
+                                   "prewarm", wait=False)
+
+GALLERY_INDEX.listeners.append(prewarm_thumbnails)
 
 @PromptServer.instance.routes.get("/web/gallery/thumbnail")
+@timed_route("thumbnail")
 async def get_thumbnail(request):
     filename = request.query.get("filename")
     subfolder = request.query.get("subfolder", "")
     size_mode = request.query.get("size", "small")  # "small" or "preview"
+    width = request.query.get("w", "")  # any width, snapped to the nearest ladder rung
+    priority = request.query.get("priority", "visible")  # "visible", "prefetch" or "prewarm"
     custom_path = request.query.get("path", "")
     
     if not filename:
@@ -76,47 +148,51 @@ async def get_thumbnail(request):
         return web.Response(status=404, text="File not found")
         
     # Determine target size
-    if size_mode == "preview":
-        target_size = (1920, 1920)
-        quality = 90
-    else:
-        target_size = (400, 400)
-        quality = 85
+    try:
+        rung = snap_width(int(width)) if width else THUMBNAIL_SIZES.get(size_mode, THUMBNAIL_SIZES["small"])
+    except ValueError:
+        return web.Response(status=400, text="Invalid w")
+    if priority not in THUMBNAIL_PRIORITIES:
+        priority = "visible"
         
-    # Check if thumbnail exists
-    # Include size in cache filename to distinguish between small and preview
-    thumb_filename = f"{size_mode}_{subfolder.replace('/', '_').replace(os.sep, '_')}_{filename}"
-    thumb_path = os.path.join(THUMBNAIL_CACHE_DIR, thumb_filename)
-    
-    if os.path.exists(thumb_path):
-        return web.FileResponse(thumb_path)
+    # Check if thumbnail exists (and is not older than the source)
+    source_mtime = os.path.getmtime(full_path)
+    # Off the event loop: the SQLite store's lookup can wait on its lock behind a ladder write
+    loop = asyncio.get_running_loop()
+    cached = await loop.run_in_executor(None, THUMBNAIL_CACHE.get, full_path, rung, source_mtime)
+    if cached is not None:
+        record_cache("thumbnail", True)
+        return thumbnail_response(cached)
+    record_cache("thumbnail", False)
         
-    # Generate thumbnail
+    if not HAS_PIL:
+        # Fallback to original if PIL not available
+        return web.FileResponse(full_path)
+
+    # Rendered by the thumbnail scheduler: visible tiles before prefetches and pre-warms,
+    # newest request first, and dropped from the queue if this client goes away
+    job = THUMBNAIL_SCHEDULER.submit(full_path, lambda: render_thumbnail_ladder(full_path, source_mtime), priority)
+    waiting = asyncio.wrap_future(job.future)
     try:
-        if not HAS_PIL:
-            # Fallback to original if PIL not available
-            return web.FileResponse(full_path)
-            
-        with Image.open(full_path) as img:
-            # Convert to RGB if needed
-            if img.mode in ('RGBA', 'LA'):
-                background = Image.new("RGB", img.size, (255, 255, 255))
-                background.paste(img, mask=img.split()[-1])
-                img = background
-            
-            # Resize logic: maintain aspect ratio
-            img.thumbnail(target_size, Image.Resampling.LANCZOS)
-            
-            # Save to cache
-            img.save(thumb_path, "JPEG", quality=quality, optimize=True)
-            
-        return web.FileResponse(thumb_path)
+        while True:
+            done, _ = await asyncio.wait({waiting}, timeout=DISCONNECT_POLL)
+            if done:
+                break
+            if request.transport is None or request.transport.is_closing():
+                THUMBNAIL_SCHEDULER.release(job)
+                return web.Response(status=499, text="Client closed request")
+    except asyncio.CancelledError:
+        THUMBNAIL_SCHEDULER.release(job)
+        raise
+    try:
+        return thumbnail_response(waiting.result()[rung])
     except Exception as e:
         print(f"Error generating thumbnail for {filename}: {e}")
         # Fallback to original on error
         return web.FileResponse(full_path)
 
 @PromptServer.instance.routes.get("/web/gallery/info")
+@timed_route("info")
 async def get_image_info(request):
     import json
     filename = request.query.get("filename")
@@ -151,7 +227,14 @@ async def get_image_info(request):
         "loras": []
     }
     
-    if HAS_PIL and filename.lower().endswith('.png'):
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        return web.json_response({"error": "File not found"}, status=404)
+    cached = METADATA_CACHE.get(full_path, stat)
+    if cached is not None:
+        info["checkpoints"], info["loras"] = list(cached[0]), list(cached[1])
+    elif HAS_PIL and filename.lower().endswith('.png'):
         try:
             with Image.open(full_path) as img:
                 # Retrieve parameters (ComfyUI stores prompt in 'prompt' or 'workflow' or 'parameters')
@@ -184,6 +267,7 @@ async def get_image_info(request):
                             lora = inputs.get('lora_name')
                             if lora and lora not in info['loras']:
                                 info['loras'].append(lora)
+            METADATA_CACHE.put(full_path, stat, (tuple(info['checkpoints']), tuple(info['loras'])))
                                 
         except Exception as e:
             print(f"Error reading metadata for {filename}: {e}")
@@ -201,6 +285,7 @@ PromptServer.instance.routes.static("/web/gallery/assets", os.path.join(GALLERY_
 PromptServer.instance.routes.static("/web/gallery/lib", os.path.join(WEB_ROOT, "lib"))
 
 @PromptServer.instance.routes.get("/web/gallery/folders")
+@timed_route("folders")
 async def list_gallery_folders(request):
     try:
         custom_path = request.query.get('path', '')
@@ -228,17 +313,19 @@ async def list_gallery_folders(request):
 
         folders = set()
         # Walk to find all subdirectories
-        for root, dirs, filenames in os.walk(output_dir):
-            rel_path = os.path.relpath(root, output_dir)
-            if rel_path != ".":
-                # Ensure we use forward slashes for consistency in JS
-                folders.add(rel_path.replace("\\", "/"))
+        with WALK_DURATION.time(operation="folders"):
+            for root, dirs, filenames in os.walk(output_dir):
+                rel_path = os.path.relpath(root, output_dir)
+                if rel_path != ".":
+                    # Ensure we use forward slashes for consistency in JS
+                    folders.add(rel_path.replace("\\", "/"))
         
         return web.json_response({"folders": sorted(list(folders))})
     except Exception as e:
         return web.json_response({"error": str(e)}, status=500)
 
 @PromptServer.instance.routes.get("/web/gallery/list")
+@timed_route("list")
 async def list_gallery_files(request):
     try:
         # Get custom path from query, default to output directory
@@ -283,158 +370,49 @@ async def list_gallery_files(request):
         recursive = request.query.get('recursive', 'false') == 'true'
         print(f"[Gallery] Target folder: '{target_folder}', Search: '{search_query}', Recursive: {recursive}")
         
-        files = []
-        subfolders = []
+        # Pagination
+        try:
+            skip = int(request.query.get('skip', 0))
+            limit = int(request.query.get('limit', 50))
+        except ValueError:
+            skip = 0
+            limit = 50
         
-        # If searching, we might want to search recursively? 
-        # User said: "show only these filse folders if user search for those"
-        # "leave only these with values split it into two folder folders and image names"
-        # This implies we should return matching subfolders AND matching files.
+        # Ordering: ?sort=date|name|size|width|height|pixels|aspect&order=asc|desc
+        sort = request.query.get('sort', 'date')
+        direction = request.query.get('order', '').lower() or None
+        if sort not in SORT_ORDERS or direction not in (None, 'asc', 'desc'):
+            return web.json_response({
+                "error": "Invalid sort",
+                "details": f"sort must be one of {', '.join(SORT_ORDERS)} and order asc or desc."
+            }, status=400)
         
-        for root, dirs, filenames in os.walk(output_dir):
-            rel_path = os.path.relpath(root, output_dir)
-            current_subfolder = rel_path if rel_path != "." else ""
-            
-            # Ensure consistent slashes
-            current_subfolder = current_subfolder.replace("\\", "/")
-            
-            # Navigation Logic vs Search Logic
-            if not search_query:
-                # Normal navigation mode
-                if recursive:
-                    # Recursive mode: Show files from target_folder AND its subfolders
-                    if target_folder:
-                         # Check if current_subfolder is target_folder OR a child of target_folder
-                         if current_subfolder != target_folder and not current_subfolder.startswith(target_folder + "/"):
-                             continue
-                    else:
-                        # If root, we show everything (already walking everything)
-                        pass
-                else:
-                    # Strict mode (default): Only files in exactly the target folder
-                    if target_folder:
-                         if current_subfolder != target_folder:
-                            continue
-                    else:
-                        if current_subfolder != "":
-                            continue
-            else:
-                # Search mode: Scan EVERYTHING
-                # Filter directories that match search
-                for d in dirs:
-                    if search_query in d.lower():
-                        # Add to subfolders list if it matches
-                        # But we need to be careful about structure. 
-                        # The frontend expects 'subfolders' to be just names relative to current view?
-                        # Or should we return full relative paths?
-                        # If we are searching globally, we probably want to show where they are.
-                        # But the current frontend 'subfolders' logic is simple list of names.
-                        # Let's add them as specific "folder" type items in the file list? 
-                        # Or keep them in subfolders list but formatted differently?
-                        
-                        # User request: "split it into two folder folders and image names"
-                        # So we should populate 'subfolders' with matches found anywhere?
-                        # But 'subfolders' in the response usually means "folders inside current view".
-                        # If we search, "current view" is the search result.
-                        pass
-
-            for filename in filenames:
-                if filename.lower().endswith(('.png', '.jpg', '.jpeg', '.webp', '.mp4', '.gif')):
-                    full_path = os.path.join(root, filename)
-                    
-                    # Check exclusion patterns
-                    if exclude_patterns:
-                        path_to_check = full_path.lower()
-                        if any(pattern in path_to_check for pattern in exclude_patterns):
-                            continue
-                    
-                    # Search Filter
-                    if search_query:
-                         if search_query not in filename.lower():
-                             continue
-                    
-                    # Get file stats
-                    try:
-                        stat = os.stat(full_path)
-                        created_time = stat.st_mtime
-                    except OSError:
-                        created_time = 0
-
-                    # Get image dimensions
-                    width = 0
-                    height = 0
-                    if HAS_PIL and filename.lower().endswith(('.png', '.jpg', '.jpeg', '.webp')):
-                        try:
-                            # Use a try-except block specifically for image opening to avoid crashing the loop
-                            # We open strictly to read the header
-                            with Image.open(full_path) as img:
-                                width, height = img.size
-                        except Exception:
-                            # If image is corrupt or cannot be read, just ignore dimensions
-                            pass
-                        
-                    files.append({
-                        "filename": filename,
-                        "subfolder": current_subfolder,
-                        "type": "output",
-                        "format": os.path.splitext(filename)[1][1:],
-                        "date": created_time,
-                        "width": width,
-                        "height": height
-                    })
+        # Attribute filters (min/max_width, min/max_height, orientation, aspect, min/max_aspect,
+        # extension, date_from/date_to) become index range scans; total counts the filtered rows
+        try:
+            constraints = parse_constraints(request.query)
+        except ValueError as e:
+            return web.json_response({"error": "Invalid filter", "details": str(e)}, status=400)
         
-        # If searching, we also need to populate subfolders that match the query
-        if search_query:
-             for root, dirs, filenames in os.walk(output_dir):
-                rel_path = os.path.relpath(root, output_dir)
-                current_subfolder = rel_path if rel_path != "." else ""
-                
-                for d in dirs:
-                    if search_query in d.lower():
-                         # We found a matching folder. 
-                         # We need to present it such that clicking it navigates there.
-                         # The frontend expects simple names in 'subfolders'.
-                         # If we return "A/B/MatchedFolder", the frontend sidebar might not handle it if it expects just names.
-                         # But wait, the frontend builds a tree now.
-                         # The 'subfolders' return key was used for the OLD sidebar.
-                         # The NEW sidebar fetches /folders (full tree).
-                         # So 'subfolders' in this response is mainly used for... actually it's NOT used for the sidebar anymore.
-                         # It was used to update the sidebar in the old version.
-                         # But wait, did we remove the usage?
-                         # JS: "if (skip === 0) { refreshSidebarSelection(); }"
-                         # So 'subfolders' in JSON is effectively unused by the new sidebar.
-                         # However, the user wants "split it into two folder folders and image names".
-                         # This likely means in the GRID view? Or just visually separated?
-                         # "show only these filse folders if user search for those"
-                         # This implies showing matching folders in the main view area?
-                         
-                         folder_path = os.path.join(current_subfolder, d).replace("\\", "/")
-                         if folder_path.startswith("/"): folder_path = folder_path[1:]
-                         
-                         subfolders.append(folder_path)
+        # Served from the gallery index: the root is re-walked (stat only) at most every
+        # few seconds and only new or changed images have their headers read.
+        # In search mode every file under the root is matched by name, and 'subfolders'
+        # lists the folders whose name matches the query.
+        loop = asyncio.get_running_loop()
+        paginated_files, total, subfolders = await loop.run_in_executor(
+            None, GALLERY_INDEX.list_files, output_dir, target_folder, recursive, search_query, exclude_patterns, skip, limit,
+            sort, direction, constraints)
         
         # Always return success if directory exists, even if empty
         # If user provided a path and it was resolved successfully, we return it as root_path
         # The frontend will show "No images found" if files list is empty, which is correct.
         
-        print(f"[Gallery] Found {len(files)} files")
-        
-        # Sort by date descending
-        files.sort(key=lambda x: x['date'], reverse=True)
-        
-        # Pagination
-        try:
-            skip = int(request.query.get('skip', 0))
-            limit = int(request.query.get('limit', 50))
-        except ValueError:
-            skip = 0
-            limit = 50
-            
-        paginated_files = files[skip:skip+limit]
+        print(f"[Gallery] Found {total} files")
         
-        return web.json_response({
+        # ?format=compact: columnar rows; Accept: application/x-msgpack: MessagePack body
+        return list_response(request, {
             "files": paginated_files,
-            "total": len(files),
+            "total": total,
             "skip": skip,
             "limit": limit,
             "root_path": output_dir,
@@ -445,3 +423,364 @@ async def list_gallery_files(request):
         import traceback
         traceback.print_exc()
         return web.json_response({"error": str(e)}, status=500)
+
+@PromptServer.instance.routes.get("/web/gallery/collection")
+@timed_route("collection")
+async def list_gallery_collection(request):
+    # One newest-first listing over several roots (?root=A&root=B, each resolved like
+    # /web/gallery/list's path) with the list filters. Page with ?cursor= from next_cursor.
+    root_params = [r for r in request.query.getall('root', []) if r]
+    if not root_params:
+        return web.json_response({"error": "Missing root"}, status=400)
+    roots = []
+    for custom_path in root_params:
+        output_dir = resolve_gallery_root(custom_path)
+        if output_dir is None:
+            return web.json_response({"error": "Path is incorrect", "details": f"Root '{custom_path}' does not exist."}, status=400)
+        if normalize_root(output_dir) not in [normalize_root(r) for r in roots]:
+            roots.append(output_dir)
+
+    exclude_str = request.query.get('exclude', '')
+    exclude_patterns = [p.strip().lower() for p in exclude_str.split(',') if p.strip()]
+    target_folder = request.query.get('folder', '')
+    search_query = request.query.get('search', '').lower().strip()
+    recursive = request.query.get('recursive', 'false') == 'true'
+    try:
+        limit = max(1, min(500, int(request.query.get('limit', 50))))
+        cursor = decode_cursor(request.query['cursor']) if request.query.get('cursor') else None
+        constraints = parse_constraints(request.query)
+    except ValueError as e:
+        return web.json_response({"error": str(e)}, status=400)
+
+    loop = asyncio.get_running_loop()
+    try:
+        # Roots (often separate disks) are walked concurrently
+        await asyncio.gather(*[loop.run_in_executor(None, GALLERY_INDEX.sync, normalize_root(r)) for r in roots])
+        files, next_cursor = await loop.run_in_executor(
+            None, merged_page, GALLERY_INDEX, roots, roots, target_folder, recursive, search_query, exclude_patterns, cursor, limit,
+            constraints)
+        total = await loop.run_in_executor(
+            None, total_count, GALLERY_INDEX, roots, target_folder, recursive, search_query, exclude_patterns, constraints)
+    except Exception as e:
+        print(f"Error in gallery collection: {e}")
+        return web.json_response({"error": str(e)}, status=500)
+
+    return list_response(request, {
+        "files": files,
+        "total": total,
+        "limit": limit,
+        "next_cursor": next_cursor,
+        "roots": roots,
+    })
+
+@PromptServer.instance.routes.post("/web/gallery/subscribe")
+@timed_route("subscribe")
+async def subscribe_gallery_changes(request):
+    # Push "web_gallery.changes" events (added/modified/removed list rows) for one view
+    # to the websocket with this client id, instead of the client re-polling the list
+    try:
+        data = await request.json()
+    except ValueError:
+        return web.json_response({"error": "Invalid JSON"}, status=400)
+    client_id = data.get("client_id", "")
+    if not client_id:
+        return web.json_response({"error": "Missing client_id"}, status=400)
+    output_dir = resolve_gallery_root(data.get("path", ""))
+    if output_dir is None:
+        return web.json_response({"error": "Path is incorrect"}, status=400)
+
+    exclude_str = data.get("exclude", "")
+    exclude_patterns = [p.strip().lower() for p in exclude_str.split(',') if p.strip()]
+    try:
+        constraints = parse_constraints(data)
+    except ValueError as e:
+        return web.json_response({"error": "Invalid filter", "details": str(e)}, status=400)
+    GALLERY_SUBSCRIPTIONS.subscribe(
+        client_id, output_dir,
+        folder=data.get("folder", ""),
+        recursive=bool(data.get("recursive", False)),
+        search=data.get("search", "").lower().strip(),
+        excludes=exclude_patterns,
+        constraints=constraints)
+    return web.json_response({"subscribed": True, "root_path": output_dir})
+
+@PromptServer.instance.routes.post("/web/gallery/unsubscribe")
+@timed_route("unsubscribe")
+async def unsubscribe_gallery_changes(request):
+    try:
+        data = await request.json()
+    except ValueError:
+        return web.json_response({"error": "Invalid JSON"}, status=400)
+    return web.json_response({"unsubscribed": GALLERY_SUBSCRIPTIONS.unsubscribe(data.get("client_id", ""))})
+
+@PromptServer.instance.routes.post("/web/gallery/bulk")
+@timed_route("bulk")
+async def start_gallery_bulk_operation(request):
+    # Delete, move or copy many files in one background job; poll /web/gallery/bulk/status
+    # or pass client_id to receive "web_gallery.bulk_progress" websocket events
+    try:
+        data = await request.json()
+    except ValueError:
+        return web.json_response({"error": "Invalid JSON"}, status=400)
+    operation = data.get("operation", "")
+    if operation not in BULK_OPERATIONS:
+        return web.json_response({"error": f"operation must be one of {', '.join(BULK_OPERATIONS)}"}, status=400)
+    conflict = data.get("conflict", "rename")
+    if conflict not in CONFLICT_POLICIES:
+        return web.json_response({"error": f"conflict must be one of {', '.join(CONFLICT_POLICIES)}"}, status=400)
+    output_dir = resolve_gallery_root(data.get("path", ""))
+    if output_dir is None:
+        return web.json_response({"error": "Path is incorrect"}, status=400)
+    try:
+        files = [(f.get("subfolder", ""), f["filename"]) for f in data.get("files", [])]
+    except (KeyError, TypeError, AttributeError):
+        return web.json_response({"error": "files must be a list of {subfolder, filename}"}, status=400)
+    if not files:
+        return web.json_response({"error": "No files given"}, status=400)
+    if operation != "delete" and "destination" not in data:
+        return web.json_response({"error": "Missing destination"}, status=400)
+
+    job = BULK_OPS.start(operation, output_dir, files,
+                         destination=data.get("destination", ""),
+                         conflict=conflict,
+                         client_id=data.get("client_id") or None)
+    return web.json_response(job.status(), status=202)
+
+@PromptServer.instance.routes.get("/web/gallery/bulk/status")
+@timed_route("bulk_status")
+async def get_gallery_bulk_status(request):
+    job = BULK_OPS.get(request.query.get("job_id", ""))
+    if job is None:
+        return web.json_response({"error": "Unknown job"}, status=404)
+    return web.json_response(job.status())
+
+@PromptServer.instance.routes.post("/web/gallery/bulk/cancel")
+@timed_route("bulk_cancel")
+async def cancel_gallery_bulk_operation(request):
+    # Stops the job before its next chunk; files already handled stay handled
+    try:
+        data = await request.json()
+    except ValueError:
+        return web.json_response({"error": "Invalid JSON"}, status=400)
+    return web.json_response({"cancelled": BULK_OPS.cancel(data.get("job_id", ""))})
+
+def zip_archive_name(output_dir, folder=""):
+    name = os.path.basename(os.path.normpath(os.path.join(output_dir, folder))) or "gallery"
+    return name.replace('"', "") + ".zip"
+
+@PromptServer.instance.routes.get("/web/gallery/zip")
+@timed_route("zip")
+async def download_gallery_zip(request):
+    # Streams every file a /web/gallery/list query (path, folder, recursive, search,
+    # exclude and attribute filters) matches as one ZIP, newest first
+    output_dir = resolve_gallery_root(request.query.get('path', ''))
+    if output_dir is None:
+        return web.json_response({"error": "Path is incorrect"}, status=400)
+    exclude_str = request.query.get('exclude', '')
+    exclude_patterns = [p.strip().lower() for p in exclude_str.split(',') if p.strip()]
+    target_folder = request.query.get('folder', '')
+    search_query = request.query.get('search', '').lower().strip()
+    recursive = request.query.get('recursive', 'false') == 'true'
+    try:
+        constraints = parse_constraints(request.query)
+    except ValueError as e:
+        return web.json_response({"error": "Invalid filter", "details": str(e)}, status=400)
+
+    root = normalize_root(output_dir)
+    await asyncio.get_running_loop().run_in_executor(None, GALLERY_INDEX.sync, root)
+    # Rows are read a keyset page at a time by the zip writer thread as it goes
+    files = GALLERY_INDEX.iter_files(root, target_folder, recursive, search_query, exclude_patterns, constraints)
+    entries = ((f"{f['subfolder']}/{f['filename']}" if f['subfolder'] else f['filename'],
+                os.path.join(output_dir, f['subfolder'], f['filename'])) for f in files)
+    return await zip_response(request, entries, zip_archive_name(output_dir, target_folder))
+
+@PromptServer.instance.routes.post("/web/gallery/zip")
+@timed_route("zip")
+async def download_selected_gallery_zip(request):
+    # Streams the selected files as one ZIP. Accepts JSON or a form post (so a browser can
+    # download natively) with "path" and "files", a JSON list of {subfolder, filename}.
+    import json
+    try:
+        if request.content_type == "application/json":
+            data = await request.json()
+            files = data.get("files", [])
+        else:
+            data = await request.post()
+            files = json.loads(data.get("files", "[]"))
+        selection = [(f.get("subfolder", ""), f["filename"]) for f in files]
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return web.json_response({"error": "files must be a list of {subfolder, filename}"}, status=400)
+    if not selection:
+        return web.json_response({"error": "No files given"}, status=400)
+    output_dir = resolve_gallery_root(data.get("path", ""))
+    if output_dir is None:
+        return web.json_response({"error": "Path is incorrect"}, status=400)
+
+    entries = []
+    for subfolder, filename in selection:
+        full_path = os.path.join(output_dir, subfolder, filename)
+        if not inside_root(output_dir, full_path):
+            return web.json_response({"error": f"File is outside the gallery root: {subfolder}/{filename}"}, status=400)
+        entries.append((f"{subfolder}/{filename}" if subfolder else filename, full_path))
+    return await zip_response(request, entries, zip_archive_name(output_dir))
+
+def perceptual_root(output_dir):
+    # Runs in an executor: refresh the index (a throttled stat walk) and report hashing
+    # progress as (root, hashed, hashable). Missing hashes are computed by the background
+    # hasher; requests answer from the ones that exist.
+    root = normalize_root(output_dir)
+    GALLERY_INDEX.sync(root)
+    hashed, total = PERCEPTUAL_INDEX.progress(root)
+    return root, hashed, total
+
+def hashing_status(hashed, total):
+    # Response fields telling clients the results may still grow
+    return {"pending": hashed < total, "hashed": hashed, "hashable": total}
+
+@PromptServer.instance.routes.get("/web/gallery/duplicates")
+@timed_route("duplicates")
+async def find_gallery_duplicates(request):
+    # Clusters of near-identical images (perceptual hashes within ?threshold= bits)
+    output_dir = resolve_gallery_root(request.query.get('path', ''))
+    if output_dir is None:
+        return web.json_response({"error": "Path is incorrect"}, status=400)
+    try:
+        threshold = max(0, min(32, int(request.query.get('threshold', DUPLICATE_THRESHOLD))))
+    except ValueError:
+        threshold = DUPLICATE_THRESHOLD
+    try:
+        loop = asyncio.get_running_loop()
+        root, hashed, total = await loop.run_in_executor(None, perceptual_root, output_dir)
+        clusters = await loop.run_in_executor(None, PERCEPTUAL_INDEX.duplicates, root, threshold)
+    except Exception as e:
+        print(f"Error finding duplicates: {e}")
+        return web.json_response({"error": str(e)}, status=500)
+    return list_response(request, {
+        "clusters": clusters,
+        "threshold": threshold,
+        "root_path": output_dir,
+        **hashing_status(hashed, total),
+    })
+
+@PromptServer.instance.routes.get("/web/gallery/similar")
+@timed_route("similar")
+async def find_similar_gallery_files(request):
+    # Images whose perceptual hash is closest to the given file's, nearest first
+    output_dir = resolve_gallery_root(request.query.get('path', ''))
+    if output_dir is None:
+        return web.json_response({"error": "Path is incorrect"}, status=400)
+    filename = request.query.get('filename', '')
+    subfolder = request.query.get('subfolder', '')
+    if not filename:
+        return web.json_response({"error": "Missing filename"}, status=400)
+    try:
+        k = max(1, min(200, int(request.query.get('k', 12))))
+        max_distance = max(0, min(64, int(request.query.get('max_distance', SIMILAR_DISTANCE))))
+    except ValueError:
+        return web.json_response({"error": "Invalid k or max_distance"}, status=400)
+    try:
+        loop = asyncio.get_running_loop()
+        root, hashed, total = await loop.run_in_executor(None, perceptual_root, output_dir)
+        files = await loop.run_in_executor(None, PERCEPTUAL_INDEX.similar, root, subfolder, filename, k, max_distance)
+    except Exception as e:
+        print(f"Error finding similar images: {e}")
+        return web.json_response({"error": str(e)}, status=500)
+    if files is None:
+        if hashed >= total:
+            return web.json_response({"error": "File not found or not hashable"}, status=404)
+        # Not hashed yet: empty result the client can retry once hashing catches up
+        files = []
+    return list_response(request, {
+        "files": files,
+        "root_path": output_dir,
+        **hashing_status(hashed, total),
+    })
+
+@PromptServer.instance.routes.get("/web/gallery/metrics")
+@timed_route("metrics")
+async def get_gallery_metrics(request):
+    # Prometheus text format: route latencies, walk durations, thumbnail timings, cache hit ratios
+    return web.Response(body=METRICS.render().encode("utf-8"), headers={"Content-Type": METRICS_CONTENT_TYPE})
+
+async def refresh_checkpoint_catalog():
+    # The first request builds the catalog in the executor; later requests are answered from
+    # the last snapshot while a background thread re-checks the checkpoint directories
+    if CHECKPOINT_CATALOG.loaded:
+        CHECKPOINT_CATALOG.refresh_in_background()
+    else:
+        await asyncio.get_running_loop().run_in_executor(None, CHECKPOINT_CATALOG.refresh)
+
+def filter_by_architecture(candidates, architecture):
+    # Runs in the executor (one stat per candidate). Checkpoints the header index hasn't
+    # read yet are queued for its background thread and counted instead of read here.
+    matched, pending = [], 0
+    for c in candidates:
+        found = CHECKPOINT_INDEX.architecture(c, read=False)
+        if found == architecture:
+            matched.append(c)
+        elif found == CHECKPOINT_PENDING:
+            pending += 1
+    return matched, pending
+
+@PromptServer.instance.routes.get("/web/gallery/checkpoints/folders")
+@timed_route("checkpoint_folders")
+async def list_checkpoint_folders(request):
+    # Folder suggestions for the Random Checkpoint Loader widget
+    try:
+        query = request.query.get("q", "")
+        await refresh_checkpoint_catalog()
+        folders = CHECKPOINT_CATALOG.get_folders(query, refresh=False)
+        return web.json_response({
+            "folders": folders,
+            "tree": CHECKPOINT_CATALOG.tree,
+            "version": CHECKPOINT_CATALOG.version
+        })
+    except Exception as e:
+        return web.json_response({"error": str(e)}, status=500)
+
+@PromptServer.instance.routes.get("/web/gallery/checkpoints")
+@timed_route("checkpoints")
+async def list_checkpoints(request):
+    # Checkpoints matching the loader's folder/exclude settings (plus an optional name query)
+    try:
+        folder = request.query.get("folder", "All")
+        exclude = request.query.get("exclude", "")
+        query = request.query.get("q", "").lower()
+        architecture = request.query.get("architecture", "Any")
+        try:
+            limit = int(request.query.get("limit", 0))
+        except ValueError:
+            limit = 0
+
+        await refresh_checkpoint_catalog()
+        candidates = CHECKPOINT_CATALOG.select(folder, exclude, refresh=False)
+        if query:
+            candidates = [c for c in candidates if query in c.lower()]
+        pending = 0
+        if architecture and architecture != "Any":
+            candidates, pending = await asyncio.get_running_loop().run_in_executor(
+                None, filter_by_architecture, candidates, architecture)
+        total = len(candidates)
+        if limit > 0:
+            candidates = candidates[:limit]
+
+        return web.json_response({
+            "checkpoints": candidates,
+            "total": total,
+            "pending": pending,
+            "version": CHECKPOINT_CATALOG.version
+        })
+    except Exception as e:
+        return web.json_response({"error": str(e)}, status=500)
+
+@PromptServer.instance.routes.get("/web/gallery/checkpoints/info")
+@timed_route("checkpoint_info")
+async def get_checkpoint_info(request):
+    # Header index entry (architecture, parameter count, dtypes, metadata) for one checkpoint
+    name = request.query.get("name", "")
+    if not name:
+        return web.json_response({"error": "Missing name"}, status=400)
+    entry = await asyncio.get_running_loop().run_in_executor(None, CHECKPOINT_INDEX.get, name)
+    if entry is None:
+        return web.json_response({"error": "Checkpoint not found"}, status=404)
+    return web.json_response(dict(entry, name=name))
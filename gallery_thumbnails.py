@@ -0,0 +1,215 @@
+import io
+import os
+import sqlite3
+import hashlib
+import threading
+
+# Try to import PIL, handle failure
+try:
+    from PIL import Image
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
+# Thumbnail cache shared by the thumbnail route and the bulk file operations (which evict
+# the entries of files they overwrite or remove).
+# Two backends, picked with WEB_GALLERY_THUMBNAIL_STORE:
+#   "files" (default): one JPEG per source file and size in THUMBNAIL_CACHE_DIR, served
+#       with sendfile.
+#   "sqlite": every thumbnail is a blob row in a single SQLite file. Large galleries avoid
+#       a directory of millions of small files (lookup cost, inodes, slow backups). Pages
+#       freed by evictions are returned to the filesystem incrementally.
+# get() returns a file path (files) or the JPEG bytes (sqlite); None means regenerate.
+# Thumbnails come in a ladder of widths rendered together from one decode of the source
+# (render_ladder), each rung downscaled from the previous one; requests are snapped to
+# the nearest rung so srcset clients never trigger another decode.
+
+THUMBNAIL_CACHE_DIR = os.path.join(os.path.dirname(__file__), "thumbnails")
+THUMBNAIL_DB_PATH = os.path.join(os.path.dirname(__file__), "thumbnails.sqlite")
+THUMBNAIL_STORE = os.environ.get("WEB_GALLERY_THUMBNAIL_STORE", "files").strip().lower()
+
+# Longest-side sizes of the ladder, smallest first
+THUMBNAIL_LADDER = (200, 400, 800, 1920)
+# The original ?size= modes map onto rungs
+THUMBNAIL_SIZES = {
+    "small": 400,
+    "preview": 1920,
+}
+# Rungs at or below this are grid thumbnails and get a lower JPEG quality
+GRID_RUNG = 400
+
+
+def snap_width(width):
+    # Nearest rung to a requested width (ties go to the larger rung)
+    return min(THUMBNAIL_LADDER, key=lambda rung: (abs(rung - width), -rung))
+
+
+def rung_quality(rung):
+    return 85 if rung <= GRID_RUNG else 90
+
+
+def render_ladder(full_path):
+    # {rung: JPEG bytes} for every rung, from a single decode of full_path
+    with Image.open(full_path) as img:
+        # JPEGs decode straight at a reduced DCT scale when the largest rung allows it
+        img.draft("RGB", (THUMBNAIL_LADDER[-1], THUMBNAIL_LADDER[-1]))
+        # Convert to RGB if needed
+        if img.mode in ('RGBA', 'LA'):
+            current = Image.new("RGB", img.size, (255, 255, 255))
+            current.paste(img, mask=img.split()[-1])
+        else:
+            current = img.convert("RGB")
+    ladder = {}
+    for rung in reversed(THUMBNAIL_LADDER):
+        # Each rung is downscaled from the one above it, not from the original
+        current.thumbnail((rung, rung), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        current.save(buffer, "JPEG", quality=rung_quality(rung), optimize=True)
+        ladder[rung] = buffer.getvalue()
+    return ladder
+
+# Bump when the SQLite store's table changes
+STORE_VERSION = 2
+# Name prefixes of per-file thumbnails from before the ladder (keyed by size mode, not width)
+LEGACY_PREFIXES = ("small_", "preview_")
+# Written to the thumbnail directory once those have been removed
+LEGACY_CLEANED_MARKER = ".ladder"
+# Evictions between incremental vacuums of the SQLite store
+VACUUM_EVERY = 1000
+
+
+def thumbnail_cache_path(full_path, rung, directory=THUMBNAIL_CACHE_DIR):
+    # One cache entry per source file and rung. The path digest keeps same-named files
+    # from different folders/roots (e.g. Gallery Image Picker selections) apart.
+    digest = hashlib.sha1(os.path.abspath(full_path).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(directory, f"w{rung}_{digest}_{os.path.basename(full_path)}")
+
+
+class FileThumbnailStore:
+    name = "files"
+
+    def __init__(self, directory=THUMBNAIL_CACHE_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.cleanup = None
+        if not os.path.exists(os.path.join(directory, LEGACY_CLEANED_MARKER)):
+            # Old entries are never read again; the directory can be large, so don't hold up startup
+            self.cleanup = threading.Thread(target=self.remove_legacy, name="ThumbnailCleanup", daemon=True)
+            self.cleanup.start()
+
+    def remove_legacy(self):
+        # One-time removal of the size-mode thumbnails the ladder replaced
+        removed = 0
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.name.startswith(LEGACY_PREFIXES) and entry.is_file():
+                        try:
+                            os.remove(entry.path)
+                            removed += 1
+                        except OSError:
+                            pass
+            open(os.path.join(self.directory, LEGACY_CLEANED_MARKER), "w").close()
+        except OSError as e:
+            print(f"[Gallery] Could not clean up old thumbnails: {e}")
+            return
+        if removed:
+            print(f"[Gallery] Removed {removed} thumbnails from before the size ladder")
+
+    def get(self, full_path, rung, source_mtime):
+        # Cached thumbnail path, unless it's missing or older than the source
+        thumb_path = thumbnail_cache_path(full_path, rung, self.directory)
+        try:
+            if os.path.getmtime(thumb_path) >= source_mtime:
+                return thumb_path
+        except OSError:
+            pass
+        return None
+
+    def put_ladder(self, full_path, source_mtime, ladder):
+        # Write every rung of {rung: JPEG bytes}; returns {rung: path}
+        paths = {}
+        for rung, data in ladder.items():
+            thumb_path = thumbnail_cache_path(full_path, rung, self.directory)
+            with open(thumb_path, "wb") as f:
+                f.write(data)
+            paths[rung] = thumb_path
+        return paths
+
+    def evict(self, full_path):
+        for rung in THUMBNAIL_LADDER:
+            try:
+                os.remove(thumbnail_cache_path(full_path, rung, self.directory))
+            except OSError:
+                pass
+
+
+class SqliteThumbnailStore:
+    name = "sqlite"
+
+    def __init__(self, path=THUMBNAIL_DB_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.evictions = 0
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # auto_vacuum only takes effect on a new database (before the first table)
+        self.conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != STORE_VERSION:
+            # A cache: thumbnails in an older layout are simply rendered again
+            self.conn.execute("DROP TABLE IF EXISTS thumbnails")
+            self.conn.execute(f"PRAGMA user_version = {STORE_VERSION}")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS thumbnails ("
+            "path TEXT NOT NULL, width INTEGER NOT NULL, source_mtime REAL NOT NULL, data BLOB NOT NULL, "
+            "PRIMARY KEY (path, width))")
+
+    def get(self, full_path, rung, source_mtime):
+        # Cached JPEG bytes, unless missing or built from an older version of the source
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT source_mtime, data FROM thumbnails WHERE path = ? AND width = ?",
+                (os.path.abspath(full_path), rung)).fetchone()
+        if row is None or row[0] < source_mtime:
+            return None
+        return row[1]
+
+    def put_ladder(self, full_path, source_mtime, ladder):
+        # Write every rung of {rung: JPEG bytes} in one transaction; returns the ladder
+        path = os.path.abspath(full_path)
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO thumbnails (path, width, source_mtime, data) VALUES (?, ?, ?, ?)",
+                    [(path, rung, source_mtime, sqlite3.Binary(data)) for rung, data in ladder.items()])
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return ladder
+
+    def evict(self, full_path):
+        with self.lock:
+            deleted = self.conn.execute("DELETE FROM thumbnails WHERE path = ?", (os.path.abspath(full_path),)).rowcount
+            self.evictions += deleted
+            if self.evictions >= VACUUM_EVERY:
+                self.evictions = 0
+                self.conn.execute("PRAGMA incremental_vacuum")
+
+
+def open_store(name=THUMBNAIL_STORE):
+    if name == "sqlite":
+        return SqliteThumbnailStore()
+    if name != "files":
+        print(f"[Gallery] Unknown WEB_GALLERY_THUMBNAIL_STORE '{name}', using files")
+    return FileThumbnailStore()
+
+
+THUMBNAIL_CACHE = open_store()
+
+
+def evict_thumbnails(full_path):
+    # Drop every cached size of a source file
+    THUMBNAIL_CACHE.evict(full_path)
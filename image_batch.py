@@ -0,0 +1,219 @@
+import os
+import sys
+import time
+import tracemalloc
+import torch
+import numpy as np
+from PIL import Image, ImageOps
+
+# Shared decode / batching helpers for the random loader nodes.
+# "list" mode keeps the historical output (one [1,H,W,3] tensor per image),
+# "batch" mode writes every image into a single preallocated [B,H,W,3] tensor.
+
+OUTPUT_MODES = ["list", "batch"]
+RESIZE_POLICIES = ["resize", "crop", "pad"]
+# Per-execution time/peak memory reports share the stage timers' opt-in
+# (WEB_GALLERY_STAGE_TIMING, see node_timing.py): measuring resets the kernel's RSS peak on
+# Linux and runs tracemalloc elsewhere, which slows every allocation while the node runs.
+# Read here rather than imported, so benchmarks can load this module outside ComfyUI.
+BATCH_REPORTS = os.environ.get("WEB_GALLERY_STAGE_TIMING", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def open_rgb(path):
+    # Decode an image the same way the loaders always have: EXIF transpose,
+    # 16-bit 'I' mode scaled down, then converted to RGB.
+    i = Image.open(path)
+    i = ImageOps.exif_transpose(i)
+    if i.mode == 'I':
+        i = i.point(lambda i: i * (1 / 255))
+    return i.convert("RGB")
+
+
+def fit_image(image, width, height, policy="resize"):
+    # Bring a PIL image to exactly (width, height)
+    if image.size == (width, height):
+        return image
+    if policy == "crop":
+        # Scale to cover, then center crop
+        return ImageOps.fit(image, (width, height), Image.Resampling.LANCZOS)
+    if policy == "pad":
+        # Scale to fit inside, then pad with black (keeps OpenPose/Canny backgrounds intact)
+        return ImageOps.pad(image, (width, height), Image.Resampling.LANCZOS, color=(0, 0, 0))
+    return image.resize((width, height), Image.Resampling.LANCZOS)
+
+
+def to_list_tensor(image_np):
+    # uint8 HWC -> float32 [1,H,W,3], converting and normalizing in a single allocation
+    return torch.from_numpy(image_np).to(torch.float32).div_(255.0)[None,]
+
+
+class TensorBatch:
+    # A [B,H,W,3] float32 buffer allocated once and filled slot by slot.
+    # The buffer is allocated lazily on the first write so that, when no target size
+    # is given, the first accepted image decides the batch size.
+
+    def __init__(self, capacity, width=0, height=0, policy="resize"):
+        self.capacity = capacity
+        self.width = width
+        self.height = height
+        self.policy = policy
+        self.buffer = None
+        self.count = 0
+
+    def add(self, image):
+        # image is either a PIL image or an HWC uint8 array
+        if self.count >= self.capacity:
+            return None
+        if self.buffer is None:
+            if isinstance(image, np.ndarray):
+                h, w = image.shape[0], image.shape[1]
+            else:
+                w, h = image.size
+            self.width = self.width or w
+            self.height = self.height or h
+            self.buffer = torch.empty((self.capacity, self.height, self.width, 3), dtype=torch.float32)
+
+        if isinstance(image, np.ndarray):
+            if image.shape[0] != self.height or image.shape[1] != self.width:
+                image = fit_image(Image.fromarray(image), self.width, self.height, self.policy)
+        else:
+            image = fit_image(image, self.width, self.height, self.policy)
+
+        if not isinstance(image, np.ndarray):
+            # np.asarray on a PIL image is read-only, which torch.from_numpy warns about
+            image = np.array(image)
+        slot = self.buffer[self.count]
+        # copy_ converts uint8 -> float32 straight into the slot, then normalize in place
+        slot.copy_(torch.from_numpy(image))
+        slot.div_(255.0)
+        self.count += 1
+        return self.count - 1
+
+    def repeat(self, index):
+        # Duplicate an already filled slot (used when padding a batch with reused picks)
+        if self.buffer is None or self.count >= self.capacity:
+            return None
+        self.buffer[self.count].copy_(self.buffer[index])
+        self.count += 1
+        return self.count - 1
+
+    def result(self):
+        if self.buffer is None:
+            return None
+        # Narrowing is a view, no copy
+        return self.buffer[:self.count]
+
+
+def read_rss():
+    # (current, peak) resident set size in bytes, or None where /proc/self/status is missing
+    try:
+        with open("/proc/self/status") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+        return int(fields["VmRSS"].split()[0]) * 1024, int(fields["VmHWM"].split()[0]) * 1024
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def reset_rss_peak():
+    # Reset the kernel's resident-set high-water mark (VmHWM) to the current RSS
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+class PeakMemory:
+    # Measured memory peak while one batch is built, in bytes above the starting point.
+    # On Linux the process resident-set high-water mark is reset at the start and read at
+    # the end, which covers PIL, NumPy and torch allocations alike. Elsewhere tracemalloc
+    # measures the NumPy/Python heap and the output tensors are added from their
+    # numel * element_size, since torch's CPU allocator is invisible to tracemalloc.
+
+    def __init__(self):
+        self.rss_start = None
+        self.tracing = False
+        if reset_rss_peak():
+            rss = read_rss()
+            if rss is not None:
+                self.rss_start = rss[0]
+                self.source = "process RSS high-water mark"
+                return
+        self.source = "tracemalloc + output tensors"
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            self.trace_start = tracemalloc.get_traced_memory()[0]
+        else:
+            tracemalloc.start()
+            self.tracing = True
+            self.trace_start = 0
+
+    def stop(self, tensor_bytes=0):
+        if self.rss_start is not None:
+            rss = read_rss()
+            return max(0, rss[1] - self.rss_start) if rss is not None else 0
+        peak = tracemalloc.get_traced_memory()[1] - self.trace_start
+        if self.tracing:
+            tracemalloc.stop()
+        return max(0, peak) + tensor_bytes
+
+
+class BatchReport:
+    # Time and measured peak memory of one loader execution, logged to the console so
+    # list and batch mode can be compared (benchmarks/image_batch.py runs both).
+
+    def __init__(self, node_name, mode):
+        self.node_name = node_name
+        self.mode = mode
+        self.start = time.perf_counter()
+        self.images = 0
+        self.output_bytes = 0
+        self.memory = PeakMemory()
+        self.peak_bytes = None
+
+    def record(self, height, width):
+        self.images += 1
+        self.output_bytes += height * width * 3 * 4
+
+    def finish(self, batch_buffer_bytes=None):
+        # (elapsed seconds, measured peak bytes); stops the measurement
+        elapsed = time.perf_counter() - self.start
+        output_bytes = batch_buffer_bytes if batch_buffer_bytes is not None else self.output_bytes
+        if self.peak_bytes is None:
+            self.peak_bytes = self.memory.stop(output_bytes)
+        return elapsed, self.peak_bytes
+
+    def log(self, batch_buffer_bytes=None):
+        elapsed, peak = self.finish(batch_buffer_bytes)
+        if not self.images:
+            return
+        elapsed_ms = elapsed * 1000.0
+        line = (f"[{self.node_name}] {self.mode} mode: {self.images} images in {elapsed_ms:.1f} ms "
+                f"({elapsed_ms / self.images:.1f} ms/image), peak +{peak / 2**20:.1f} MB ({self.memory.source})")
+        if self.mode == "list":
+            # Downstream nodes usually torch.cat the list, which holds a second full copy
+            line += f" (+{self.output_bytes / 2**20:.1f} MB if concatenated downstream)"
+        print(line)
+
+
+class NullReport:
+    # Stand-in when reports are off: nothing is measured or logged
+
+    def record(self, height, width):
+        pass
+
+    def finish(self, batch_buffer_bytes=None):
+        return None
+
+    def log(self, batch_buffer_bytes=None):
+        pass
+
+
+NULL_REPORT = NullReport()
+
+
+def batch_report(node_name, mode):
+    return BatchReport(node_name, mode) if BATCH_REPORTS else NULL_REPORT
@@ -0,0 +1,62 @@
+import os
+import heapq
+
+VALID_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+
+def iter_image_paths(image_dir, subfolders=False, extensions=VALID_EXTENSIONS, dir_mtimes=None):
+    # Stream image paths under image_dir without building the full list.
+    # Entries are sorted per directory, so the order only depends on the directory
+    # contents (os.scandir order is filesystem dependent).
+    # Like os.walk, symlinked directories are not descended into.
+    # dir_mtimes, if given, receives {directory: st_mtime_ns} for every directory scanned,
+    # taken before its listing so a file added mid-scan still shows up as a change.
+    stack = [image_dir]
+    while stack:
+        current = stack.pop()
+        try:
+            if dir_mtimes is not None:
+                dir_mtimes[current] = os.stat(current).st_mtime_ns
+            with os.scandir(current) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError as e:
+            print(f"Error scanning {current}: {e}")
+            continue
+
+        child_dirs = []
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    if subfolders and not entry.is_symlink():
+                        child_dirs.append(entry.path)
+                    continue
+            except OSError:
+                continue
+            if entry.name.lower().endswith(extensions):
+                yield entry.path
+
+        # Reversed so the stack pops them in sorted order
+        stack.extend(reversed(child_dirs))
+
+
+def reservoir_sample(stream, k, rng, accept=None):
+    # Uniform sample of k items from a stream of unknown length in O(k) memory.
+    # Every accepted item draws a random key and the k smallest keys are kept
+    # (bottom-k sampling), so the result comes back in a random order and a larger k
+    # with the same seed extends the same sequence instead of starting a new one.
+    # Returns (sample, items seen, items accepted).
+    heap = []
+    seen = 0
+    accepted = 0
+    for item in stream:
+        seen += 1
+        if accept is not None and not accept(item):
+            continue
+        accepted += 1
+        key = rng.random()
+        if len(heap) < k:
+            heapq.heappush(heap, (-key, accepted, item))
+        elif -heap[0][0] > key:
+            heapq.heapreplace(heap, (-key, accepted, item))
+    heap.sort(key=lambda entry: -entry[0])
+    return [entry[2] for entry in heap], seen, accepted
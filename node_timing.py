@@ -0,0 +1,102 @@
+import os
+import json
+import time
+import threading
+import contextlib
+from server import PromptServer
+
+# Opt-in per-stage timing for the loader nodes.
+#   WEB_GALLERY_STAGE_TIMING=1        enable timers (each execution sends a "web_gallery.stage_timing" event)
+#   WEB_GALLERY_STAGE_LOG=<file>      also append every breakdown to a JSON-lines file
+# When disabled, nodes get NULL_TIMER whose methods do nothing, so the cost is one
+# no-op call per stage.
+
+STAGE_TIMING = os.environ.get("WEB_GALLERY_STAGE_TIMING", "").strip().lower() in ("1", "true", "yes", "on")
+STAGE_LOG = os.environ.get("WEB_GALLERY_STAGE_LOG", "").strip()
+STAGE_EVENT = "web_gallery.stage_timing"
+
+_log_lock = threading.Lock()
+
+
+class Stage:
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class StageTimer:
+    enabled = True
+
+    def __init__(self, node_name, unique_id=None):
+        self.node_name = node_name
+        self.unique_id = unique_id
+        self.start = time.perf_counter()
+        # Insertion ordered, so the breakdown lists stages in the order they first ran
+        self.stages = {}
+        self.counters = {}
+
+    def stage(self, name):
+        return Stage(self, name)
+
+    def add(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def finish(self):
+        record = {
+            "node": self.node_name,
+            "node_id": self.unique_id,
+            "timestamp": time.time(),
+            "total_ms": round((time.perf_counter() - self.start) * 1000.0, 2),
+            "stages_ms": {name: round(seconds * 1000.0, 2) for name, seconds in self.stages.items()},
+            "counters": dict(self.counters),
+        }
+        stages = ", ".join(f"{name} {ms:.1f}" for name, ms in record["stages_ms"].items())
+        counters = ", ".join(f"{name}={value}" for name, value in record["counters"].items())
+        print(f"[{self.node_name}] {record['total_ms']:.1f} ms ({stages} ms) {counters}")
+
+        try:
+            PromptServer.instance.send_sync(STAGE_EVENT, record)
+        except Exception as e:
+            print(f"[{self.node_name}] Could not send stage timings: {e}")
+        if STAGE_LOG:
+            try:
+                with _log_lock, open(STAGE_LOG, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record) + "\n")
+            except OSError as e:
+                print(f"[{self.node_name}] Could not write stage log: {e}")
+        return record
+
+
+class NullTimer:
+    enabled = False
+    _stage = contextlib.nullcontext()
+
+    def stage(self, name):
+        return self._stage
+
+    def add(self, name, seconds):
+        pass
+
+    def count(self, name, amount=1):
+        pass
+
+    def finish(self):
+        return None
+
+
+NULL_TIMER = NullTimer()
+
+
+def stage_timer(node_name, unique_id=None):
+    return StageTimer(node_name, unique_id) if STAGE_TIMING else NULL_TIMER
@@ -0,0 +1,196 @@
+import os
+import json
+import heapq
+import hashlib
+import tempfile
+import threading
+from array import array
+from .image_scan import iter_image_paths
+
+# Persisted, sorted manifest of the image paths under a directory, plus named cursors.
+# Reading a slice costs O(batch_size): the offsets file gives the byte position of every
+# line in the paths file, so nothing is walked, listed or sorted at query time.
+#
+# Layout (under MANIFEST_DIR/<sha1 of directory + subfolders flag>/):
+#   paths.txt     one UTF-8 path per line, sorted (undecodable filename bytes kept via surrogateescape)
+#   offsets.bin   uint64 byte offset of each line in paths.txt
+#   meta.json     directory, subfolders, count, {relative directory: mtime} of every scanned directory
+#   cursors.json  {name: {"position": int, "start_from": int}}
+
+MANIFEST_DIR = os.path.join(os.path.dirname(__file__), "manifests")
+
+# Paths sorted in memory per run file while building; bounds memory for huge trees
+SORT_CHUNK = 200000
+
+# os.scandir hands undecodable filename bytes back as lone surrogates; this round-trips them
+PATH_ERRORS = "surrogateescape"
+
+
+class PathManifest:
+    _lock = threading.Lock()
+
+    def __init__(self, image_dir, subfolders=False):
+        self.image_dir = os.path.abspath(image_dir)
+        self.subfolders = bool(subfolders)
+        key = hashlib.sha1(f"{self.image_dir}|{int(self.subfolders)}".encode("utf-8", PATH_ERRORS)).hexdigest()[:16]
+        self.manifest_dir = os.path.join(MANIFEST_DIR, key)
+        self.paths_file = os.path.join(self.manifest_dir, "paths.txt")
+        self.offsets_file = os.path.join(self.manifest_dir, "offsets.bin")
+        self.meta_file = os.path.join(self.manifest_dir, "meta.json")
+        self.cursors_file = os.path.join(self.manifest_dir, "cursors.json")
+
+    def _read_meta(self):
+        try:
+            with open(self.meta_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_stale(self):
+        meta = self._read_meta()
+        if meta is None or not os.path.exists(self.paths_file) or not os.path.exists(self.offsets_file):
+            return True
+        dir_mtimes = meta.get("dir_mtimes")
+        if not isinstance(dir_mtimes, dict):
+            return True
+        # Adding or removing a file changes its directory's mtime, and a new subdirectory
+        # changes its parent's, so one stat per scanned directory (no listing) catches
+        # every change to the set of paths.
+        try:
+            for rel, mtime_ns in dir_mtimes.items():
+                if os.stat(os.path.join(self.image_dir, rel)).st_mtime_ns != mtime_ns:
+                    return True
+        except OSError:
+            return True
+        return False
+
+    def build(self):
+        # External sort: sorted runs of SORT_CHUNK paths on disk, then a streaming k-way merge
+        os.makedirs(self.manifest_dir, exist_ok=True)
+        dir_mtimes = {}
+        run_files = []
+        try:
+            chunk = []
+            for path in iter_image_paths(self.image_dir, self.subfolders, dir_mtimes=dir_mtimes):
+                if "\n" in path:
+                    continue
+                chunk.append(path)
+                if len(chunk) >= SORT_CHUNK:
+                    run_files.append(self._write_run(chunk))
+                    chunk = []
+            if chunk or not run_files:
+                run_files.append(self._write_run(chunk))
+
+            runs = [open(r, "r", encoding="utf-8", errors=PATH_ERRORS) for r in run_files]
+            count = 0
+            tmp_paths = self.paths_file + ".tmp"
+            tmp_offsets = self.offsets_file + ".tmp"
+            try:
+                with open(tmp_paths, "wb") as paths_out, open(tmp_offsets, "wb") as offsets_out:
+                    offsets = array("Q")
+                    for line in heapq.merge(*runs):
+                        offsets.append(paths_out.tell())
+                        paths_out.write(line.encode("utf-8", PATH_ERRORS))
+                        count += 1
+                        if len(offsets) >= 65536:
+                            offsets.tofile(offsets_out)
+                            offsets = array("Q")
+                    offsets.tofile(offsets_out)
+            finally:
+                for r in runs:
+                    r.close()
+
+            os.replace(tmp_paths, self.paths_file)
+            os.replace(tmp_offsets, self.offsets_file)
+            # Keyed relative to image_dir ("" is image_dir itself); json escapes surrogates
+            dir_mtimes = {os.path.relpath(d, self.image_dir) if d != self.image_dir else "": m
+                          for d, m in dir_mtimes.items()}
+            with open(self.meta_file, "w", encoding="utf-8") as f:
+                json.dump({"directory": self.image_dir, "subfolders": self.subfolders, "count": count, "dir_mtimes": dir_mtimes}, f)
+            print(f"[RecursiveImageLoader] Built manifest for '{self.image_dir}': {count} files")
+            return count
+        finally:
+            for r in run_files:
+                try:
+                    os.remove(r)
+                except OSError:
+                    pass
+
+    def _write_run(self, chunk):
+        chunk.sort()
+        fd, run_path = tempfile.mkstemp(prefix="run_", suffix=".txt", dir=self.manifest_dir)
+        with os.fdopen(fd, "w", encoding="utf-8", errors=PATH_ERRORS) as f:
+            for path in chunk:
+                f.write(path)
+                f.write("\n")
+        return run_path
+
+    def ensure(self, rebuild=False):
+        with self._lock:
+            if rebuild or self.is_stale():
+                self.build()
+
+    def count(self):
+        return os.path.getsize(self.offsets_file) // 8
+
+    def read(self, positions):
+        # Paths at the given manifest positions, one seek per position
+        total = self.count()
+        result = []
+        with open(self.offsets_file, "rb") as offsets_in, open(self.paths_file, "rb") as paths_in:
+            for position in positions:
+                if position < 0 or position >= total:
+                    continue
+                offsets_in.seek(position * 8)
+                offset = array("Q")
+                offset.frombytes(offsets_in.read(8))
+                paths_in.seek(offset[0])
+                result.append(paths_in.readline().decode("utf-8", PATH_ERRORS).rstrip("\n"))
+        return result
+
+    def read_range(self, start, length):
+        # Contiguous slice: one offsets read and one sequential read of the paths file
+        total = self.count()
+        start = max(0, start)
+        end = min(total, start + length)
+        if start >= end:
+            return []
+        with open(self.offsets_file, "rb") as offsets_in:
+            offsets_in.seek(start * 8)
+            offsets = array("Q")
+            offsets.frombytes(offsets_in.read((end - start) * 8))
+        with open(self.paths_file, "rb") as paths_in:
+            paths_in.seek(offsets[0])
+            return [paths_in.readline().decode("utf-8", PATH_ERRORS).rstrip("\n") for _ in range(end - start)]
+
+    def _read_cursors(self):
+        try:
+            with open(self.cursors_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def advance(self, name, start_from, batch_size):
+        # Return the cursor position for this call and persist the next one.
+        # The cursor restarts from start_from whenever start_from changes and wraps at the end.
+        with self._lock:
+            total = self.count()
+            cursors = self._read_cursors()
+            cursor = cursors.get(name)
+            if cursor is None or cursor.get("start_from") != start_from:
+                position = start_from
+            else:
+                position = cursor.get("position", start_from)
+            if total == 0 or position >= total:
+                position = 0
+
+            step = batch_size if batch_size > 0 else total - position
+            next_position = position + step
+            if next_position >= total:
+                next_position = 0
+            cursors[name] = {"position": next_position, "start_from": start_from}
+            tmp_path = self.cursors_file + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(cursors, f)
+            os.replace(tmp_path, self.cursors_file)
+            return position, step
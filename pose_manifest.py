@@ -0,0 +1,205 @@
+import os
+import json
+import hashlib
+import itertools
+import threading
+import collections
+import concurrent.futures
+import numpy as np
+from .decoded_store import load_rgb_array
+
+# Persistent classification manifest for PoseImageManager.
+# Remembers, per file (relative to image_dir), whether it is an OpenPose skeleton,
+# keyed on mtime and size, so reruns only decode new or changed files.
+
+POSE_MANIFEST_DIR = os.path.join(os.path.dirname(__file__), "pose_manifests")
+
+# Below this many files a thread pool costs more than it saves
+MIN_POOL_FILES = 32
+# Classifications in flight per worker. Results are consumed in path order, so this bounds
+# how many decoded images can wait behind a slow file.
+POOL_WINDOW = 4
+
+
+def is_openpose_array(img_array):
+    # OpenPose skeletons are thin lines on a black background,
+    # so the background should be very dominant (> 80% near-black pixels)
+    threshold = 30
+    black_pixels = np.all(img_array < threshold, axis=-1)
+    black_ratio = np.mean(black_pixels)
+    return black_ratio > 0.8
+
+
+def classify_image_file(path, store=None):
+    # Pool worker: (path, True/False, HxWx3 uint8 pixels), or (path, None, None) if the
+    # file can't be read
+    try:
+        image_np = load_rgb_array(path, store)
+        return path, bool(is_openpose_array(image_np)), image_np
+    except Exception as e:
+        print(f"Error processing {path}: {e}")
+        return path, None, None
+
+
+def classify_in_pool(paths, workers=0, on_result=None, store=None):
+    # Classify paths on a thread pool. Decoding (PIL) and the NumPy reduction release the
+    # GIL, so threads overlap like processes would, without forking a server process that
+    # runs aiohttp, CUDA and other threads (as gallery_phash.hash_root does).
+    # on_result(path, is_openpose, pixels) is called on this thread in path order, so the
+    # caller can keep the decode of the files it is about to output.
+    results = {}
+    if not paths:
+        return results
+    workers = workers or os.cpu_count() or 1
+    if len(paths) < MIN_POOL_FILES or workers == 1:
+        for path in paths:
+            path, is_openpose, image_np = classify_image_file(path, store)
+            results[path] = is_openpose
+            if on_result is not None:
+                on_result(path, is_openpose, image_np)
+        return results
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        remaining = iter(paths)
+        pending = collections.deque(pool.submit(classify_image_file, path, store)
+                                    for path in itertools.islice(remaining, workers * POOL_WINDOW))
+        while pending:
+            path, is_openpose, image_np = pending.popleft().result()
+            following = next(remaining, None)
+            if following is not None:
+                pending.append(pool.submit(classify_image_file, following, store))
+            results[path] = is_openpose
+            if on_result is not None:
+                on_result(path, is_openpose, image_np)
+    return results
+
+
+class PosePrefixIndex:
+    # Trie over OpenPose base names. match() walks the example name once, so pairing
+    # costs O(len(name)) instead of a startswith loop over every OpenPose base name.
+
+    def __init__(self, names=()):
+        self.root = {}
+        for name in names:
+            self.add(name)
+
+    def add(self, name):
+        if not name:
+            return
+        node = self.root
+        for ch in name:
+            node = node.setdefault(ch, {})
+        # None can't collide with a character key
+        node[None] = name
+
+    def match(self, name):
+        # Longest base name that prefixes name and is followed by nothing or a non-digit
+        # ("pose1" must not claim "pose12_sample", but does claim "pose1_sample")
+        node = self.root
+        best = None
+        for ch in name:
+            if None in node and not ch.isdigit():
+                best = node[None]
+            node = node.get(ch)
+            if node is None:
+                return best
+        if None in node:
+            best = node[None]
+        return best
+
+
+class PoseManifest:
+    _lock = threading.Lock()
+
+    def __init__(self, image_dir):
+        self.image_dir = os.path.abspath(image_dir)
+        key = hashlib.sha1(self.image_dir.encode("utf-8")).hexdigest()[:16]
+        self.path = os.path.join(POSE_MANIFEST_DIR, f"{key}.json")
+        self.entries = {}
+        # example relpath -> openpose relpath
+        self.pairs = {}
+        self.dirty = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.entries = data.get("entries", {})
+            self.pairs = data.get("pairs", {})
+        except (OSError, ValueError):
+            self.entries = {}
+            self.pairs = {}
+
+    def _rel(self, path):
+        return os.path.relpath(os.path.abspath(path), self.image_dir).replace("\\", "/")
+
+    def lookup(self, path, stat):
+        # Cached classification, or None if the file is new or changed
+        entry = self.entries.get(self._rel(path))
+        if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            return entry["openpose"]
+        return None
+
+    def record(self, path, stat, is_openpose):
+        self.entries[self._rel(path)] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "openpose": bool(is_openpose)}
+        self.dirty = True
+
+    def move(self, old_path, new_path):
+        # Keep the classification when we rename/move a file ourselves (rename keeps mtime)
+        old_rel = self._rel(old_path)
+        new_rel = self._rel(new_path)
+        entry = self.entries.pop(old_rel, None)
+        if entry is not None:
+            self.entries[new_rel] = entry
+        # Only examples are ever renamed/moved, so only the example side of a pair follows
+        if old_rel in self.pairs:
+            self.pairs[new_rel] = self.pairs.pop(old_rel)
+        self.dirty = True
+
+    def set_pair(self, example_path, openpose_path):
+        example_rel = self._rel(example_path)
+        openpose_rel = self._rel(openpose_path)
+        if self.pairs.get(example_rel) != openpose_rel:
+            self.pairs[example_rel] = openpose_rel
+            self.dirty = True
+
+    def get_pairs(self):
+        # (openpose_path, example_path) for every persisted pair whose files still exist.
+        # Examples moved into skipped folders (e.g. examples/) stay paired without a rescan.
+        # Paths are normpath'd so they match abspath keys of the same files on Windows,
+        # where the stored "/"-separated relpaths would otherwise mix separators.
+        result = []
+        stale = []
+        for example_rel, openpose_rel in sorted(self.pairs.items(), key=lambda item: (item[1], item[0])):
+            openpose_path = os.path.normpath(os.path.join(self.image_dir, openpose_rel))
+            example_path = os.path.normpath(os.path.join(self.image_dir, example_rel))
+            if os.path.exists(openpose_path) and os.path.exists(example_path):
+                result.append((openpose_path, example_path))
+            else:
+                stale.append(example_rel)
+        for example_rel in stale:
+            del self.pairs[example_rel]
+        if stale:
+            self.dirty = True
+        return result
+
+    def prune(self, paths):
+        # Forget files that no longer exist (or are now excluded from the scan)
+        keep = {self._rel(p) for p in paths}
+        stale = [rel for rel in self.entries if rel not in keep]
+        for rel in stale:
+            del self.entries[rel]
+        if stale:
+            self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        with self._lock:
+            os.makedirs(POSE_MANIFEST_DIR, exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"directory": self.image_dir, "entries": self.entries, "pairs": self.pairs}, f)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
@@ -0,0 +1,223 @@
+import os
+import json
+import mmap
+import struct
+import threading
+import folder_paths
+from .checkpoint_catalog import CATALOG
+
+# Persistent index of checkpoint architecture hints read from safetensors headers.
+# Only the JSON header at the start of each file is memory-mapped and parsed, so
+# indexing a multi-GB checkpoint reads a few hundred KB. Entries are keyed on the
+# checkpoint name and reused while mtime and size are unchanged.
+
+INDEX_PATH = os.path.join(os.path.dirname(__file__), "checkpoint_index.json")
+
+ARCHITECTURES = ["Any", "SDXL", "SD1.5", "SD2", "SD3", "Flux", "Unknown"]
+
+# Reported by architecture(read=False) for checkpoints the indexer hasn't read yet
+PENDING = "Pending"
+
+# Headers larger than this are not real safetensors headers
+MAX_HEADER_BYTES = 100 * 2**20
+
+# Tensors whose shapes are recorded because they tell architectures apart
+MARKER_TENSORS = (
+    "model.diffusion_model.input_blocks.1.1.transformer_blocks.0.attn2.to_k.weight",
+    "model.diffusion_model.input_blocks.4.1.transformer_blocks.0.attn2.to_k.weight",
+    "model.diffusion_model.label_emb.0.0.weight",
+    "model.diffusion_model.double_blocks.0.img_attn.qkv.weight",
+    "double_blocks.0.img_attn.qkv.weight",
+    "model.diffusion_model.joint_blocks.0.x_block.attn.qkv.weight",
+)
+
+# modelspec.architecture metadata prefixes
+MODELSPEC_ARCHITECTURES = (
+    ("stable-diffusion-xl", "SDXL"),
+    ("stable-diffusion-v1", "SD1.5"),
+    ("stable-diffusion-v2", "SD2"),
+    ("stable-diffusion-v3", "SD3"),
+    ("flux", "Flux"),
+)
+
+
+def read_safetensors_header(path):
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if len(mm) < 8:
+                raise ValueError("file too small")
+            (length,) = struct.unpack("<Q", mm[:8])
+            if length > MAX_HEADER_BYTES or 8 + length > len(mm):
+                raise ValueError(f"invalid header length {length}")
+            return json.loads(mm[8:8 + length])
+
+
+def detect_architecture(keys, shapes, metadata):
+    spec = str(metadata.get("modelspec.architecture", "")).lower()
+    for prefix, architecture in MODELSPEC_ARCHITECTURES:
+        if spec.startswith(prefix):
+            return architecture
+
+    if any("double_blocks." in k for k in keys) and any("single_blocks." in k for k in keys):
+        return "Flux"
+    if any("joint_blocks." in k for k in keys):
+        return "SD3"
+    if any(k.startswith("conditioner.embedders.1.") for k in keys) or "model.diffusion_model.label_emb.0.0.weight" in shapes:
+        return "SDXL"
+
+    # Cross-attention context size: 768 (SD1.x), 1024 (SD2.x), 2048 (SDXL)
+    to_k = shapes.get(MARKER_TENSORS[0]) or shapes.get(MARKER_TENSORS[1])
+    if to_k and len(to_k) == 2:
+        return {768: "SD1.5", 1024: "SD2", 2048: "SDXL"}.get(to_k[1], "Unknown")
+    if any(k.startswith("cond_stage_model.transformer.") for k in keys):
+        return "SD1.5"
+    if any(k.startswith("cond_stage_model.model.") for k in keys):
+        return "SD2"
+    return "Unknown"
+
+
+def summarize_header(header):
+    metadata = header.pop("__metadata__", None) or {}
+    keys = list(header.keys())
+    params = 0
+    dtypes = {}
+    prefixes = {}
+    for key, info in header.items():
+        count = 1
+        for dim in info.get("shape", []):
+            count *= dim
+        params += count
+        dtype = info.get("dtype", "?")
+        dtypes[dtype] = dtypes.get(dtype, 0) + count
+        prefix = ".".join(key.split(".")[:2])
+        prefixes[prefix] = prefixes.get(prefix, 0) + 1
+    shapes = {k: header[k].get("shape") for k in MARKER_TENSORS if k in header}
+    return {
+        "architecture": detect_architecture(keys, shapes, metadata),
+        "params": params,
+        "dtypes": dtypes,
+        # The most common key prefixes are enough to recognise a layout
+        "prefixes": dict(sorted(prefixes.items(), key=lambda item: -item[1])[:16]),
+        "shapes": shapes,
+        # Keep metadata small: training configs can embed megabytes of JSON
+        "metadata": {k: v for k, v in metadata.items() if isinstance(v, str) and len(v) <= 1024},
+    }
+
+
+class CheckpointHeaderIndex:
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.pending = set()
+        self.worker = None
+        self.reads = 0
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f).get("entries", {})
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def save(self):
+        with self.lock:
+            data = {"entries": self.entries}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def _lookup(self, name):
+        # (full path, stat, entry or None if missing or out of date) for a checkpoint name
+        full_path = folder_paths.get_full_path("checkpoints", name)
+        if not full_path:
+            return None, None, None
+        try:
+            stat = os.stat(full_path)
+        except OSError:
+            return full_path, None, None
+        with self.lock:
+            entry = self.entries.get(name)
+        if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            return full_path, stat, entry
+        return full_path, stat, None
+
+    def get(self, name):
+        # Index entry for a checkpoint name, (re)reading its header if the file changed
+        full_path, stat, entry = self._lookup(name)
+        if stat is None:
+            return None
+        if entry is not None:
+            return entry
+
+        self.reads += 1
+        entry = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+        if full_path.lower().endswith(".safetensors"):
+            try:
+                entry.update(summarize_header(read_safetensors_header(full_path)))
+            except Exception as e:
+                print(f"[CheckpointIndex] Could not read header of {name}: {e}")
+                entry["architecture"] = "Unknown"
+        else:
+            # Pickled checkpoints can't be inspected without loading them
+            entry["architecture"] = "Unknown"
+        with self.lock:
+            self.entries[name] = entry
+        return entry
+
+    def architecture(self, name, read=True):
+        # Architecture from an up-to-date entry. Unindexed or changed checkpoints are read on
+        # the spot, or with read=False queued for the background indexer and reported as PENDING
+        full_path, stat, entry = self._lookup(name)
+        if stat is None:
+            return "Unknown"
+        if entry is None:
+            if not read:
+                self.enqueue([name])
+                return PENDING
+            entry = self.get(name)
+        return entry.get("architecture", "Unknown") if entry else "Unknown"
+
+    def schedule(self, names):
+        # Index names in a background thread; called whenever the catalog changes
+        names = set(names)
+        with self.lock:
+            # Drop entries for checkpoints that no longer exist
+            for stale in [n for n in self.entries if n not in names]:
+                del self.entries[stale]
+        self.enqueue(names)
+
+    def enqueue(self, names):
+        with self.lock:
+            self.pending.update(names)
+            if self.worker is not None:
+                return
+            self.worker = threading.Thread(target=self._run, name="CheckpointHeaderIndex", daemon=True)
+            self.worker.start()
+
+    def _run(self):
+        while True:
+            reads_before = self.reads
+            while True:
+                with self.lock:
+                    if not self.pending:
+                        break
+                    name = self.pending.pop()
+                self.get(name)
+            try:
+                self.save()
+            except OSError as e:
+                print(f"[CheckpointIndex] Could not save index: {e}")
+            if self.reads > reads_before:
+                print(f"[CheckpointIndex] Read {self.reads - reads_before} checkpoint headers")
+            with self.lock:
+                # Names scheduled while saving are picked up by another round
+                if not self.pending:
+                    self.worker = None
+                    return
+
+
+INDEX = CheckpointHeaderIndex()
+CATALOG.listeners.append(INDEX.schedule)
@@ -0,0 +1,63 @@
+import os
+import sys
+import types
+
+# The node pack is a package whose modules use relative imports, and its __init__ loads
+# every node and registers the gallery routes inside a running ComfyUI. Tests import the
+# modules through a package object that points at the repository without running
+# __init__.py (import web_gallery.<module>). The same object is registered under the
+# repository's own name, which is what pytest imports the root package as.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if "web_gallery" not in sys.modules:
+    package = types.ModuleType("web_gallery")
+    package.__path__ = [ROOT]
+    sys.modules["web_gallery"] = package
+    sys.modules.setdefault(os.path.basename(ROOT), package)
+
+
+class _Routes:
+    # Route decorators leave the handler as is; tests call handlers directly
+    def _register(self, path):
+        return lambda handler: handler
+
+    get = post = put = delete = _register
+
+    def static(self, prefix, path, **kwargs):
+        pass
+
+
+class _PromptServer:
+    def __init__(self):
+        self.routes = _Routes()
+        self.sockets = {}
+        # (event, data, sid) of every send_sync call
+        self.events = []
+
+    def send_sync(self, event, data, sid=None):
+        self.events.append((event, data, sid))
+
+
+def _install_comfyui_stubs():
+    # Outside ComfyUI, provide the few names of its "server" and "folder_paths" modules
+    # the pack touches; tests point folder_paths at temporary directories as needed
+    try:
+        import server  # noqa: F401
+    except ImportError:
+        server = types.ModuleType("server")
+        server.PromptServer = type("PromptServer", (), {"instance": _PromptServer()})
+        sys.modules["server"] = server
+    try:
+        import folder_paths  # noqa: F401
+    except ImportError:
+        folder_paths = types.ModuleType("folder_paths")
+        folder_paths.base_path = ROOT
+        folder_paths.folder_names_and_paths = {}
+        folder_paths.get_output_directory = lambda: os.path.join(ROOT, "output")
+        folder_paths.get_folder_paths = lambda name: list(folder_paths.folder_names_and_paths.get(name, ([], set()))[0])
+        folder_paths.get_filename_list = lambda name: []
+        folder_paths.get_full_path = lambda name, filename: None
+        sys.modules["folder_paths"] = folder_paths
+
+
+_install_comfyui_stubs()
@@ -0,0 +1,73 @@
+import os
+import time
+import pytest
+from web_gallery import checkpoint_catalog
+from web_gallery.checkpoint_catalog import CheckpointCatalog, compile_filter
+
+
+@pytest.fixture
+def checkpoints(tmp_path, monkeypatch):
+    # Checkpoint root on disk; get_filename_list mirrors ComfyUI's relative names
+    root = tmp_path / "checkpoints"
+    for name in ("base.safetensors", "SDXL/a.safetensors", "SDXL/turbo/b.safetensors", "v1.5/c.ckpt"):
+        (root / name).parent.mkdir(parents=True, exist_ok=True)
+        (root / name).write_bytes(b"")
+
+    def get_filename_list(folder_name):
+        return [os.path.relpath(os.path.join(d, f), root).replace(os.sep, "/")
+                for d, _, files in os.walk(root) for f in files]
+
+    monkeypatch.setattr(checkpoint_catalog.folder_paths, "get_folder_paths", lambda folder_name: [str(root)], raising=False)
+    monkeypatch.setattr(checkpoint_catalog.folder_paths, "get_filename_list", get_filename_list, raising=False)
+    return root
+
+
+def test_compile_filter_folders_root_and_excludes():
+    names = {"base.safetensors": "", "SDXL/a.safetensors": "SDXL", "SDXL/turbo/b.safetensors": "SDXL/turbo",
+             "SDXLextra/d.safetensors": "SDXLextra"}
+    pick = lambda folder, exclude="": sorted(n for n, d in names.items() if compile_filter(folder, exclude)(n, d))
+    assert pick("All") == sorted(names)
+    assert pick("Root") == ["base.safetensors"]
+    # A folder matches itself and its subfolders, not siblings sharing a prefix
+    assert pick("SDXL") == ["SDXL/a.safetensors", "SDXL/turbo/b.safetensors"]
+    assert pick("Root, SDXL\nturbo", "turbo") == ["SDXL/a.safetensors", "base.safetensors"]
+
+
+def test_select_and_folders(checkpoints):
+    catalog = CheckpointCatalog()
+    assert catalog.select("SDXL") == ["SDXL/a.safetensors", "SDXL/turbo/b.safetensors"]
+    assert catalog.get_folders() == ["All", "Root", "SDXL", "SDXL/turbo", "v1.5"]
+    assert catalog.get_folders("TUR") == ["SDXL/turbo"]
+    assert catalog.tree == {"SDXL": {"turbo": {}}, "v1.5": {}}
+
+
+def test_refresh_picks_up_new_files_and_notifies_listeners(checkpoints, monkeypatch):
+    monkeypatch.setattr(checkpoint_catalog, "REFRESH_INTERVAL", 0)
+    catalog = CheckpointCatalog()
+    seen = []
+    catalog.listeners.append(seen.append)
+    catalog.refresh()
+    version = catalog.version
+    catalog.refresh()
+    assert catalog.version == version and len(seen) == 1
+
+    (checkpoints / "SDXL" / "new.safetensors").write_bytes(b"")
+    os.utime(checkpoints / "SDXL", ns=(1, 1))
+    assert "SDXL/new.safetensors" not in catalog.select("SDXL", refresh=False)
+    assert "SDXL/new.safetensors" in catalog.select("SDXL")
+    assert catalog.version == version + 1 and len(seen) == 2
+
+
+def test_background_refresh_serves_the_last_snapshot(checkpoints, monkeypatch):
+    monkeypatch.setattr(checkpoint_catalog, "REFRESH_INTERVAL", 0)
+    catalog = CheckpointCatalog()
+    catalog.refresh()
+    (checkpoints / "late.safetensors").write_bytes(b"")
+    os.utime(checkpoints, ns=(1, 1))
+    assert "late.safetensors" not in catalog.select("Root", refresh=False)
+
+    catalog.refresh_in_background()
+    deadline = time.monotonic() + 5
+    while catalog.worker is not None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert "late.safetensors" in catalog.select("Root", refresh=False)
@@ -0,0 +1,131 @@
+import os
+import threading
+import pytest
+from web_gallery import checkpoint_prefetch
+from web_gallery.checkpoint_prefetch import CheckpointPrefetcher, read_ahead, timed_read
+
+
+@pytest.fixture
+def checkpoint(tmp_path):
+    path = tmp_path / "model.safetensors"
+    path.write_bytes(os.urandom(3 * 2**20 + 17))
+    return str(path)
+
+
+def run_prefetch(full_path, mode):
+    done = threading.Event()
+    results = []
+
+    def on_done(stats):
+        results.append(stats)
+        done.set()
+
+    CheckpointPrefetcher().prefetch(full_path, mode, on_done)
+    assert done.wait(10)
+    return results[0]
+
+
+def test_timed_read_honours_the_limit(checkpoint, monkeypatch):
+    monkeypatch.setattr(checkpoint_prefetch, "READ_CHUNK", 2**20)
+    assert timed_read(checkpoint)[0] == os.path.getsize(checkpoint)
+    assert timed_read(checkpoint, 2**20)[0] == 2**20
+
+
+def test_warm_time_is_measured_when_the_sample_covers_the_file(checkpoint):
+    stats = read_ahead(checkpoint)
+    assert stats["bytes"] == os.path.getsize(checkpoint)
+    assert stats["cold_seconds"] >= 0 and stats["warm_seconds"] >= 0
+    assert stats["warm_estimated"] is False
+
+
+def test_warm_time_is_flagged_as_an_estimate_past_the_sample(checkpoint, monkeypatch):
+    monkeypatch.setattr(checkpoint_prefetch, "READ_CHUNK", 2**20)
+    monkeypatch.setattr(checkpoint_prefetch, "WARM_SAMPLE", 2**20)
+    assert read_ahead(checkpoint)["warm_estimated"] is True
+
+
+def test_read_ahead_reads_and_times_the_whole_file(checkpoint):
+    stats = run_prefetch(checkpoint, "read-ahead")
+    assert stats["status"] == "warm" and stats["bytes"] == os.path.getsize(checkpoint)
+    assert "cold_seconds" in stats and "warm_seconds" in stats
+    assert isinstance(stats["already_cached"], bool)
+
+
+@pytest.mark.skipif(not hasattr(os, "posix_fadvise"), reason="needs posix_fadvise")
+def test_fadvise_only_times_a_sample(checkpoint, monkeypatch):
+    monkeypatch.setattr(checkpoint_prefetch, "READ_CHUNK", 2**20)
+    monkeypatch.setattr(checkpoint_prefetch, "FADVISE_SAMPLE", 2**20)
+    stats = run_prefetch(checkpoint, "fadvise")
+    assert stats["status"] == "advised" and stats["advised"] is True
+    assert stats["bytes"] == 2**20 and stats["size"] == os.path.getsize(checkpoint)
+
+
+def test_fadvise_falls_back_to_read_ahead(checkpoint, monkeypatch):
+    monkeypatch.setattr(checkpoint_prefetch, "fadvise_willneed", lambda full_path: False)
+    stats = run_prefetch(checkpoint, "fadvise")
+    assert stats["mode"] == "read-ahead" and stats["status"] == "warm"
+    assert stats["bytes"] == os.path.getsize(checkpoint)
+
+
+def test_a_file_already_in_the_page_cache_is_flagged(checkpoint, monkeypatch):
+    monkeypatch.setattr(checkpoint_prefetch, "timed_read", lambda full_path, limit=None: (2**20, 0.01))
+    assert read_ahead(checkpoint)["already_cached"] is True
+    times = iter([1.0, 0.01])
+    monkeypatch.setattr(checkpoint_prefetch, "timed_read", lambda full_path, limit=None: (2**20, next(times)))
+    assert read_ahead(checkpoint)["already_cached"] is False
+
+
+def test_every_request_for_a_queued_path_gets_its_stats(checkpoint, monkeypatch):
+    release = threading.Event()
+    real_read_ahead = checkpoint_prefetch.read_ahead
+
+    def gated_read_ahead(full_path, limit=None):
+        release.wait(10)
+        return real_read_ahead(full_path, limit)
+
+    monkeypatch.setattr(checkpoint_prefetch, "read_ahead", gated_read_ahead)
+    prefetcher = CheckpointPrefetcher()
+    results = []
+    both = threading.Semaphore(0)
+
+    def on_done(stats):
+        results.append(stats)
+        both.release()
+
+    prefetcher.prefetch(checkpoint, "read-ahead", on_done)
+    prefetcher.prefetch(checkpoint, "read-ahead", on_done)
+    release.set()
+    assert both.acquire(timeout=10) and both.acquire(timeout=10)
+    assert len(results) == 2 and all(stats["status"] == "warm" for stats in results)
+    assert not prefetcher.queued
+
+
+def test_errors_are_reported(tmp_path):
+    stats = run_prefetch(str(tmp_path / "missing.safetensors"), "read-ahead")
+    assert stats["status"] == "error" and stats["error"]
+
+
+def test_off_and_unknown_modes_do_nothing(checkpoint):
+    prefetcher = CheckpointPrefetcher()
+    prefetcher.prefetch(checkpoint, "off")
+    prefetcher.prefetch(checkpoint, "bogus")
+    assert prefetcher.worker is None and not prefetcher.queued
+
+
+def test_loader_sends_the_timings_to_its_node(checkpoint, monkeypatch):
+    from server import PromptServer
+    from web_gallery import RandomCheckpointLoader as module
+    monkeypatch.setattr(module.folder_paths, "get_full_path", lambda folder, name: checkpoint, raising=False)
+    events = []
+    warmed = threading.Event()
+
+    def send_sync(event, data, sid=None):
+        events.append(data)
+        if "prefetch" in data:
+            warmed.set()
+
+    monkeypatch.setattr(PromptServer.instance, "send_sync", send_sync)
+    module.RandomCheckpointLoader().get_checkpoints("All", 0, force_checkpoint="model.safetensors", prefetch="fadvise", unique_id="7")
+    assert warmed.wait(10)
+    assert events[0] == {"node_id": "7", "checkpoint": "model.safetensors", "mode": "fixed"}
+    assert {"status", "cold_seconds"} <= set(events[-1]["prefetch"])
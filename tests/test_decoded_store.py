@@ -0,0 +1,151 @@
+import os
+import numpy as np
+import pytest
+from PIL import Image
+from web_gallery import decoded_store
+from web_gallery.decoded_store import DecodedImageStore, load_rgb_array
+
+
+@pytest.fixture
+def dataset(tmp_path, monkeypatch):
+    monkeypatch.setattr(decoded_store, "DECODED_CACHE_DIR", str(tmp_path / "cache"))
+    directory = tmp_path / "images"
+    directory.mkdir()
+    return directory
+
+
+def write_image(path, seed, size=(12, 8)):
+    pixels = np.random.default_rng(seed).integers(0, 256, (size[1], size[0], 3), dtype=np.uint8)
+    Image.fromarray(pixels).save(path)
+    return pixels
+
+
+def test_hit_is_a_writable_view_of_the_decode(dataset):
+    pixels = write_image(dataset / "a.png", 1)
+    store = DecodedImageStore(str(dataset))
+    first = store.load(str(dataset / "a.png"))
+    second = store.load(str(dataset / "a.png"))
+    assert (store.misses, store.hits) == (1, 1)
+    assert isinstance(second, np.memmap)
+    assert second.flags.writeable
+    np.testing.assert_array_equal(first, pixels)
+    np.testing.assert_array_equal(second, pixels)
+
+
+def test_index_survives_a_new_store(dataset):
+    pixels = write_image(dataset / "a.png", 1)
+    store = DecodedImageStore(str(dataset))
+    store.load(str(dataset / "a.png"))
+    store.flush()
+
+    reopened = DecodedImageStore(str(dataset))
+    np.testing.assert_array_equal(reopened.load(str(dataset / "a.png")), pixels)
+    assert reopened.hits == 1
+
+
+def test_changed_file_is_decoded_again(dataset):
+    path = dataset / "a.png"
+    write_image(path, 1)
+    store = DecodedImageStore(str(dataset))
+    store.load(str(path))
+    pixels = write_image(path, 2, size=(6, 4))
+    os.utime(path, ns=(1, 1))
+    np.testing.assert_array_equal(store.load(str(path)), pixels)
+    assert store.misses == 2
+
+
+def test_files_outside_the_directory_are_not_stored(dataset, tmp_path):
+    pixels = write_image(tmp_path / "outside.png", 3)
+    store = DecodedImageStore(str(dataset))
+    np.testing.assert_array_equal(load_rgb_array(str(tmp_path / "outside.png"), store), pixels)
+    assert store.entries == {}
+
+
+def test_entries_past_a_truncated_pack_are_dropped(dataset):
+    write_image(dataset / "a.png", 1)
+    store = DecodedImageStore(str(dataset))
+    store.load(str(dataset / "a.png"))
+    store.flush()
+    with open(store.pack_path, "r+b") as f:
+        f.truncate(10)
+    assert DecodedImageStore(str(dataset)).entries == {}
+
+
+def test_compaction_drops_replaced_pixels(dataset, monkeypatch):
+    monkeypatch.setattr(decoded_store, "COMPACT_MIN_BYTES", 0)
+    monkeypatch.setattr(decoded_store, "COMPACT_RATIO", 0.3)
+    paths = [dataset / f"{i}.png" for i in range(3)]
+    for i, path in enumerate(paths):
+        write_image(path, i)
+    store = DecodedImageStore(str(dataset))
+    for path in paths:
+        store.load(str(path))
+    # Rewrite two files: 2 of the 5 arrays in the pack become dead space
+    expected = {}
+    for i, path in enumerate(paths[:2]):
+        expected[path] = write_image(path, 10 + i)
+        os.utime(path, ns=(5, 5))
+        store.load(str(path))
+    expected[paths[2]] = np.array(Image.open(paths[2]).convert("RGB"))
+    store.flush()
+
+    assert os.path.getsize(store.pack_path) == 3 * 12 * 8 * 3
+    reopened = DecodedImageStore(str(dataset))
+    for path, pixels in expected.items():
+        np.testing.assert_array_equal(reopened.load(str(path)), pixels)
+    assert reopened.misses == 0
+
+
+def stale_store(dataset, monkeypatch):
+    # A store whose next flush compacts: three arrays, two of them replaced
+    monkeypatch.setattr(decoded_store, "COMPACT_MIN_BYTES", 0)
+    monkeypatch.setattr(decoded_store, "COMPACT_RATIO", 0.3)
+    paths = [dataset / f"{i}.png" for i in range(3)]
+    for i, path in enumerate(paths):
+        write_image(path, i)
+    store = DecodedImageStore(str(dataset))
+    for path in paths:
+        store.load(str(path))
+    store.flush()
+    for i, path in enumerate(paths[:2]):
+        write_image(path, 10 + i)
+        os.utime(path, ns=(5, 5))
+        store.load(str(path))
+    return store, {path: np.array(Image.open(path).convert("RGB")) for path in paths}
+
+
+def test_crash_before_the_index_switch_keeps_the_old_pair(dataset, monkeypatch):
+    store, _ = stale_store(dataset, monkeypatch)
+    old_pack = store.pack_path
+
+    def crash():
+        raise KeyboardInterrupt
+    monkeypatch.setattr(store, "_write_index", crash)
+    with pytest.raises(KeyboardInterrupt):
+        store.flush()
+    # The new pack was written, but the index on disk still names the old one
+    assert os.path.exists(store.pack_path) and store.pack_path != old_pack
+
+    reopened = DecodedImageStore(str(dataset))
+    assert reopened.pack_path == old_pack
+    assert sorted(os.listdir(os.path.dirname(old_pack))) == ["index.json", "pixels.bin"]
+    # Only the entries flushed before the crash are known, and they read back correctly
+    pixels = reopened.load(str(dataset / "2.png"))
+    np.testing.assert_array_equal(pixels, np.array(Image.open(dataset / "2.png").convert("RGB")))
+    assert reopened.hits == 1
+
+
+def test_crash_after_the_index_switch_uses_the_new_pack(dataset, monkeypatch):
+    store, expected = stale_store(dataset, monkeypatch)
+    old_pack = store.pack_path
+    real_remove = os.remove
+    monkeypatch.setattr(decoded_store.os, "remove", lambda path: None if path == old_pack else real_remove(path))
+    store.flush()
+    monkeypatch.setattr(decoded_store.os, "remove", real_remove)
+    assert os.path.exists(old_pack) and store.generation == 1
+
+    reopened = DecodedImageStore(str(dataset))
+    assert reopened.pack_path == store.pack_path and not os.path.exists(old_pack)
+    for path, pixels in expected.items():
+        np.testing.assert_array_equal(reopened.load(str(path)), pixels)
+    assert reopened.misses == 0
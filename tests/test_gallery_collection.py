@@ -0,0 +1,74 @@
+import os
+import pytest
+from web_gallery.gallery_collection import decode_cursor, encode_cursor, merged_page, total_count
+from web_gallery.gallery_index import GalleryIndex
+
+# (root position, relative path, mtime): ties on date within a root and across roots
+FILES = [
+    (0, "a.png", 300), (0, "b.png", 300), (0, "sub/c.png", 300), (0, "d.png", 200), (0, "e.png", 100),
+    (1, "a.png", 300), (1, "z.png", 250), (1, "y.png", 200), (1, "sub/x.png", 200),
+    (2, "only.png", 50),
+]
+
+
+@pytest.fixture
+def collection(tmp_path):
+    roots = [tmp_path / name for name in ("disk1", "disk2", "disk3")]
+    for root_index, relative, mtime in FILES:
+        path = roots[root_index] / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x")
+        os.utime(path, (mtime, mtime))
+    index = GalleryIndex(str(tmp_path / "index.sqlite"))
+    for root in roots:
+        index.sync(str(root), force=True)
+    return index, [str(root) for root in roots]
+
+
+def expected_order(recursive=True):
+    rows = [(-mtime, root_index, os.path.dirname(relative), os.path.basename(relative))
+            for root_index, relative, mtime in FILES if recursive or "/" not in relative]
+    return [(root_index, subfolder, filename) for _, root_index, subfolder, filename in sorted(rows)]
+
+
+def walk(index, roots, limit, **filters):
+    # Every page from the first to the one without next_cursor
+    pages, cursor = [], None
+    while True:
+        files, cursor = merged_page(index, roots, roots, cursor=cursor, limit=limit, **filters)
+        pages.append(files)
+        if cursor is None:
+            return pages
+        cursor = decode_cursor(cursor)
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 4, 10, 50])
+def test_cursor_pages_cover_every_row_once_in_merged_order(collection, limit):
+    index, roots = collection
+    pages = walk(index, roots, limit, recursive=True)
+    rows = [(f["root"], f["subfolder"], f["filename"]) for page in pages for f in page]
+    assert rows == expected_order()
+    assert all(len(page) == limit for page in pages[:-1])
+    # No trailing empty page when the rows divide evenly into pages
+    assert pages[-1] or len(pages) == 1
+    assert all(f["root_path"] == roots[f["root"]] for page in pages for f in page)
+
+
+def test_filters_apply_to_every_root(collection):
+    index, roots = collection
+    rows = [(f["root"], f["filename"]) for page in walk(index, roots, 2) for f in page]
+    assert rows == [(root_index, filename) for root_index, subfolder, filename in expected_order(recursive=False)]
+    assert total_count(index, roots, recursive=True) == len(FILES)
+    assert total_count(index, roots) == len(FILES) - 2
+    files, cursor = merged_page(index, roots, roots, search="a.png", recursive=True)
+    assert [(f["root"], f["filename"]) for f in files] == [(0, "a.png"), (1, "a.png")] and cursor is None
+
+
+def test_cursor_round_trips_and_rejects_garbage():
+    row = {"date": 1700000000.25, "subfolder": "sub dir/ü", "filename": "a b.png"}
+    cursor = encode_cursor(row, 2)
+    assert "/" not in cursor and "+" not in cursor
+    assert decode_cursor(cursor) == (1700000000.25, 2, "sub dir/ü", "a b.png")
+    for garbage in ("not base64!", encode_cursor(row, 2)[:-4], "W10="):
+        with pytest.raises(ValueError):
+            decode_cursor(garbage)
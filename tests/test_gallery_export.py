@@ -0,0 +1,113 @@
+import io
+import asyncio
+import zipfile
+import threading
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+from web_gallery import gallery_export
+from web_gallery.gallery_export import ZipStream, write_zip, zip_response
+from web_gallery.gallery_index import GalleryIndex
+
+
+def collect(entries):
+    # Run write_zip on a thread and gather what it hands to the event loop
+    async def run():
+        stream = ZipStream(asyncio.get_running_loop())
+        writer = threading.Thread(target=write_zip, args=(stream, entries))
+        writer.start()
+        chunks = []
+        while (chunk := await stream.queue.get()) is not None:
+            chunks.append(chunk)
+            stream.consumed()
+        writer.join()
+        return b"".join(chunks)
+    return asyncio.run(run())
+
+
+def test_archive_round_trips_and_skips_missing_files(tmp_path):
+    (tmp_path / "a.png").write_bytes(b"a" * 10)
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "b.png").write_bytes(b"b" * 3000)
+    data = collect([("a.png", str(tmp_path / "a.png")), ("gone.png", str(tmp_path / "gone.png")),
+                    ("sub/b.png", str(tmp_path / "sub" / "b.png"))])
+
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        assert zf.namelist() == ["a.png", "sub/b.png"]
+        assert all(info.compress_type == zipfile.ZIP_STORED for info in zf.infolist())
+        assert zf.read("sub/b.png") == b"b" * 3000
+
+
+def test_entries_are_consumed_on_the_writer_thread(tmp_path, monkeypatch):
+    monkeypatch.setattr(gallery_export, "CHUNK_SIZE", 64)
+    (tmp_path / "a.png").write_bytes(bytes(range(256)) * 4)
+    threads = []
+
+    def entries():
+        threads.append(threading.current_thread())
+        yield "a.png", str(tmp_path / "a.png")
+
+    with zipfile.ZipFile(io.BytesIO(collect(entries()))) as zf:
+        assert zf.read("a.png") == bytes(range(256)) * 4
+    assert threads and threads[0] is not threading.main_thread()
+
+
+def test_cancel_wakes_a_writer_waiting_for_the_response(tmp_path, monkeypatch):
+    monkeypatch.setattr(gallery_export, "CHUNK_SIZE", 16)
+    monkeypatch.setattr(gallery_export, "QUEUE_CHUNKS", 1)
+    (tmp_path / "big.png").write_bytes(b"x" * 4096)
+
+    async def run():
+        stream = ZipStream(asyncio.get_running_loop())
+        writer = threading.Thread(target=write_zip, args=(stream, [("big.png", str(tmp_path / "big.png"))]))
+        writer.start()
+        # Nothing is consumed, so the writer blocks after its first chunk
+        assert await stream.queue.get() is not None
+        stream.cancel()
+        await asyncio.get_running_loop().run_in_executor(None, writer.join, 2)
+        return writer.is_alive()
+    assert asyncio.run(run()) is False
+
+
+def test_response_streams_a_lazily_read_index_query(tmp_path):
+    root = tmp_path / "output"
+    root.mkdir()
+    for i in range(7):
+        (root / f"{i}.png").write_bytes(b"not decoded")
+    index = GalleryIndex(str(tmp_path / "index.sqlite"))
+    index.sync(str(root), force=True)
+    pages = []
+    query_after = index.query_after
+
+    def counting_query_after(*args, **kwargs):
+        pages.append(kwargs["limit"])
+        return query_after(*args, **kwargs)
+    index.query_after = counting_query_after
+
+    async def handler(request):
+        rows = index.iter_files(str(root), batch=3)
+        return await zip_response(request, ((r["filename"], str(root / r["filename"])) for r in rows), "out.zip")
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/zip", handler)
+        async with TestClient(TestServer(app)) as client:
+            response = await client.get("/zip")
+            assert response.headers["Content-Disposition"] == 'attachment; filename="out.zip"'
+            return await response.read()
+
+    with zipfile.ZipFile(io.BytesIO(asyncio.run(run()))) as zf:
+        assert sorted(zf.namelist()) == [f"{i}.png" for i in range(7)]
+    assert pages == [3, 3, 3]
+
+
+@pytest.mark.parametrize("batch", [1, 2, 50])
+def test_iter_files_walks_every_row_once_in_list_order(tmp_path, batch):
+    root = tmp_path / "output"
+    root.mkdir()
+    for i in range(5):
+        (root / f"{i}.png").write_bytes(b"x")
+    index = GalleryIndex(str(tmp_path / "index.sqlite"))
+    index.sync(str(root), force=True)
+    expected, _ = index.query(str(root), limit=-1)
+    assert [r["filename"] for r in index.iter_files(str(root), batch=batch)] == [r["filename"] for r in expected]
@@ -0,0 +1,54 @@
+import json
+from aiohttp.test_utils import make_mocked_request
+from web_gallery import gallery_format
+from web_gallery.gallery_format import list_response, to_columns
+
+
+ROWS = [
+    {"filename": "a.png", "subfolder": "", "type": "output", "format": "png", "date": 3.0, "width": 512, "height": 768},
+    {"filename": "b.png", "subfolder": "x/y", "type": "output", "format": "png", "date": 2.0, "width": 512, "height": 512},
+    {"filename": "c.webp", "subfolder": "", "type": "output", "format": "webp", "date": 1.0, "width": 640, "height": None},
+]
+
+
+def expand(files):
+    # Same expansion as the frontends' expandCompactFiles
+    rows = []
+    for i in range(files["count"]):
+        row = dict(files["constants"])
+        for key, column in files["columns"].items():
+            row[key] = files["subfolders"][column[i]] if key == "subfolder" else column[i]
+        rows.append(row)
+    return rows
+
+
+def test_columns_round_trip_with_a_subfolder_table_and_constants():
+    files = to_columns(ROWS)
+    assert files["subfolders"] == ["", "x/y"]
+    assert files["columns"]["subfolder"] == [0, 1, 0]
+    assert files["constants"] == {"type": "output"}
+    assert expand(files) == ROWS
+
+
+def test_empty_page():
+    files = to_columns([])
+    assert files["count"] == 0 and files["columns"] == {} and expand(files) == []
+
+
+def test_list_response_encodes_and_compresses_on_request():
+    payload = {"files": ROWS * 20, "total": 60}
+    plain = list_response(make_mocked_request("GET", "/web/gallery/list"), payload)
+    assert json.loads(plain.body) == payload
+
+    request = make_mocked_request("GET", "/web/gallery/list?format=compact", headers={"Accept-Encoding": "gzip"})
+    compact = list_response(request, payload)
+    body = json.loads(compact.body)
+    assert body["total"] == 60 and expand(body["files"]) == payload["files"]
+    assert len(compact.body) < len(plain.body)
+    assert compact._compression
+
+
+def test_small_bodies_are_not_compressed():
+    request = make_mocked_request("GET", "/web/gallery/list?format=compact", headers={"Accept-Encoding": "gzip"})
+    assert len(list_response(request, {"files": ROWS[:1]}).body) < gallery_format.MIN_COMPRESS_BYTES
+    assert not list_response(request, {"files": ROWS[:1]})._compression
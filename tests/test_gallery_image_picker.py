@@ -0,0 +1,69 @@
+import os
+import numpy as np
+import pytest
+import torch
+from PIL import Image
+from web_gallery.GalleryImagePicker import GalleryImagePicker
+
+
+def save_png(path, size=(8, 6), value=128):
+    Image.fromarray(np.full((size[1], size[0], 3), value, dtype=np.uint8)).save(path)
+    return str(path)
+
+
+def test_is_changed_is_stable_for_an_unchanged_selection(tmp_path):
+    paths = "\n".join([save_png(tmp_path / "a.png"), save_png(tmp_path / "b.png")])
+    assert GalleryImagePicker.IS_CHANGED(image_path=paths) == GalleryImagePicker.IS_CHANGED(image_path=paths + "\n")
+
+
+def test_is_changed_follows_file_changes(tmp_path):
+    path = save_png(tmp_path / "a.png")
+    before = GalleryImagePicker.IS_CHANGED(image_path=path)
+    os.utime(path, ns=(1, 1))
+    touched = GalleryImagePicker.IS_CHANGED(image_path=path)
+    os.remove(path)
+    missing = GalleryImagePicker.IS_CHANGED(image_path=path)
+    assert len({before, touched, missing}) == 3
+
+
+def test_previews_point_at_the_gallery(tmp_path):
+    path = save_png(tmp_path / "a.png")
+    result = GalleryImagePicker().load_image("", "", path, True)
+    assert result["ui"]["gallery_previews"] == [{"filename": "a.png", "path": str(tmp_path), "type": "gallery"}]
+
+
+def save_gif(path, values, size=(8, 6)):
+    frames = [Image.fromarray(np.full((size[1], size[0], 3), v, dtype=np.uint8)) for v in values]
+    frames[0].save(path, save_all=True, append_images=frames[1:], duration=10, loop=0)
+    return str(path)
+
+
+def frame_values(images):
+    return [round(float(images[i, 0, 0, 0]) * 255) for i in range(images.shape[0])]
+
+
+def test_frame_range_selects_start_count_and_stride(tmp_path):
+    path = save_gif(tmp_path / "a.gif", [0, 40, 80, 120, 160, 200])
+    images, masks, _ = GalleryImagePicker().load_image("", "", path, False, frame_start=1, frame_count=2, frame_stride=2)["result"]
+    assert images.shape == (2, 6, 8, 3) and masks.shape == (2, 6, 8)
+    assert frame_values(images) == [40, 120]
+
+
+def test_all_frames_load_without_a_memory_cap(tmp_path):
+    path = save_gif(tmp_path / "a.gif", [0, 40, 80, 120], size=(512, 512))
+    images = GalleryImagePicker().load_image("", "", path, False)["result"][0]
+    assert images.shape[0] == 4
+
+
+def test_memory_cap_is_opt_in_and_truncates(tmp_path):
+    # One 512x512 frame costs 4 MB of float32 image + mask
+    path = save_gif(tmp_path / "a.gif", [0, 40, 80, 120], size=(512, 512))
+    images = GalleryImagePicker().load_image("", "", path, False, max_memory_mb=8)["result"][0]
+    assert frame_values(images) == [0, 40]
+
+
+def test_mixed_sizes_are_resized_to_the_first_frame(tmp_path):
+    paths = [save_png(tmp_path / "a.png", (8, 6), 10), save_png(tmp_path / "b.png", (16, 12), 200)]
+    images, masks, _ = GalleryImagePicker().load_image("", "", "\n".join(paths), False)["result"]
+    assert images.shape == (2, 6, 8, 3) and masks.shape == (2, 6, 8)
+    assert frame_values(images) == [10, 200]
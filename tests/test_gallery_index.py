@@ -0,0 +1,166 @@
+import os
+import numpy as np
+import pytest
+from PIL import Image
+from web_gallery.gallery_index import SORT_ORDERS, GalleryIndex, build_filter, order_by, parse_constraints, row_satisfies
+
+# name -> (width, height, mtime); None dimensions for a file the index can't measure
+IMAGES = {
+    "Beta.png": (300, 200, 100),
+    "alpha.png": (100, 400, 300),
+    "gamma.png": (200, 200, 300),
+    "sub/delta.png": (400, 100, 200),
+    "sub/Epsilon.png": (150, 300, 200),
+    "clip.mp4": (None, None, 400),
+}
+
+
+@pytest.fixture
+def gallery(tmp_path):
+    root = tmp_path / "output"
+    for relative, (width, height, mtime) in IMAGES.items():
+        path = root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if width is None:
+            path.write_bytes(b"\0" * 50)
+        else:
+            # Noise, so sizes on disk differ from image to image
+            pixels = np.random.default_rng(width * height).integers(0, 256, (height, width, 3), dtype=np.uint8)
+            Image.fromarray(pixels).save(path)
+        os.utime(path, (mtime, mtime))
+    index = GalleryIndex(str(tmp_path / "index.sqlite"))
+    index.sync(str(root), force=True)
+    return str(root), index
+
+
+def expected(root, sort, recursive):
+    # Ascending order computed in Python: (sort value, subfolder, filename)
+    keys = []
+    for relative, (width, height, mtime) in IMAGES.items():
+        subfolder, filename = os.path.dirname(relative), os.path.basename(relative)
+        if subfolder and not recursive:
+            continue
+        value = {
+            "date": mtime,
+            "name": filename.lower(),
+            "size": os.path.getsize(os.path.join(root, relative)),
+            "width": width,
+            "height": height,
+            "pixels": width * height if width else None,
+            "aspect": width / height if width else None,
+        }[sort]
+        if sort == "date":
+            # Newest first with ties by path is the defined order; ascending is its reverse
+            keys.append(((-value,), subfolder, filename))
+        else:
+            # NULLs sort first ascending, as in SQLite
+            keys.append(((value is not None, value or 0), subfolder, filename))
+    order = [(subfolder, filename) for _, subfolder, filename in sorted(keys)]
+    return order[::-1] if sort == "date" else order
+
+
+@pytest.mark.parametrize("recursive", [False, True])
+@pytest.mark.parametrize("sort", SORT_ORDERS)
+def test_every_sort_matches_python_in_both_directions(gallery, sort, recursive):
+    root, index = gallery
+    ascending = expected(root, sort, recursive)
+
+    def listed(direction):
+        files, total = index.query(root, recursive=recursive, limit=-1, sort=sort, direction=direction)
+        assert total == len(ascending)
+        return [(f["subfolder"], f["filename"]) for f in files]
+    assert listed("asc") == ascending
+    # Every ORDER BY term flips, so descending is exactly ascending reversed
+    assert listed("desc") == ascending[::-1]
+
+
+def test_default_directions(gallery):
+    root, index = gallery
+    newest_first = [f["filename"] for f in index.query(root, limit=-1)[0]]
+    assert newest_first == ["clip.mp4", "alpha.png", "gamma.png", "Beta.png"]
+    assert [f["filename"] for f in index.query(root, limit=-1, sort="name")[0]] == ["alpha.png", "Beta.png", "clip.mp4", "gamma.png"]
+
+
+@pytest.mark.parametrize("sort", SORT_ORDERS)
+def test_pages_are_slices_of_the_full_order(gallery, sort):
+    root, index = gallery
+    full = index.query(root, recursive=True, limit=-1, sort=sort, direction="desc")[0]
+    pages = [index.query(root, recursive=True, skip=skip, limit=2, sort=sort, direction="desc")[0] for skip in (0, 2, 4)]
+    assert [f["filename"] for page in pages for f in page] == [f["filename"] for f in full]
+
+
+@pytest.mark.parametrize("direction", ["asc", "desc"])
+@pytest.mark.parametrize("sort", SORT_ORDERS)
+@pytest.mark.parametrize("view", [{"recursive": True}, {"folder": "sub"}])
+def test_sorted_pages_never_need_a_temp_btree(gallery, sort, direction, view):
+    root, index = gallery
+    where, params = build_filter(root, **view)
+    plan = index.conn.execute(
+        f"EXPLAIN QUERY PLAN SELECT filename FROM files WHERE {where} ORDER BY {order_by(sort, direction)} LIMIT 50",
+        params).fetchall()
+    assert not any("TEMP B-TREE" in row[-1] for row in plan), plan
+
+
+def test_parse_constraints():
+    assert parse_constraints({}) == {}
+    # ?format= is the list endpoint's response format, never a filter
+    assert parse_constraints({"format": "compact", "path": "x", "limit": "10"}) == {}
+    assert parse_constraints({"extension": " .PNG, webp,,png "}) == {"formats": ("png", "webp")}
+    # An upper dimension bound excludes files stored without dimensions (0x0)
+    assert parse_constraints({"max_width": "512"}) == {"max_width": 512, "min_width": 1}
+    aspect = parse_constraints({"aspect": "2:3", "max_aspect": "0.665"})
+    assert aspect["min_aspect"] == pytest.approx(2 / 3 * 0.99) and aspect["max_aspect"] == 0.665
+    assert parse_constraints({"orientation": "Portrait", "min_aspect": "1/2"}) == {"orientation": "portrait", "min_aspect": 0.5}
+    day = parse_constraints({"date_from": "2024-01-02", "date_to": "2024-01-02"})
+    assert day["date_to"] - day["date_from"] == pytest.approx(86400, abs=1)
+    assert parse_constraints({"date_from": "1700000000.5"}) == {"date_from": 1700000000.5}
+    for bad in ({"min_width": "wide"}, {"min_height": "-1"}, {"orientation": "diagonal"}, {"aspect": "3:0"},
+                {"max_aspect": "abc"}, {"date_to": "yesterday"}):
+        with pytest.raises(ValueError):
+            parse_constraints(bad)
+
+
+@pytest.mark.parametrize("query", [
+    {"min_width": "200"}, {"max_height": "250"}, {"orientation": "portrait"}, {"orientation": "square"},
+    {"orientation": "landscape", "min_width": "350"}, {"aspect": "1:2"}, {"min_aspect": "1", "max_aspect": "3/2"},
+    {"extension": "mp4"}, {"extension": "png", "date_to": "250"}, {"date_from": "200", "date_to": "300"},
+])
+def test_row_satisfies_agrees_with_the_sql_filter(gallery, query):
+    root, index = gallery
+    constraints = parse_constraints(query)
+    every_row = index.query(root, recursive=True, limit=-1)[0]
+    filtered = index.query(root, recursive=True, limit=-1, constraints=constraints)[0]
+    assert filtered == [row for row in every_row if row_satisfies(row, constraints)]
+    assert index.count(root, recursive=True, constraints=constraints) == len(filtered)
+
+
+def test_query_after_resumes_from_a_row_key_or_a_date(gallery):
+    root, index = gallery
+    every_row = index.query(root, recursive=True, limit=-1)[0]
+    for i, row in enumerate(every_row):
+        after = index.query_after(root, recursive=True, after=(row["date"], row["subfolder"], row["filename"]), limit=100)
+        assert after == every_row[i + 1:]
+    before = index.query_after(root, recursive=True, before_date=300, limit=100)
+    assert {row["date"] for row in before} == {200, 100}
+    at_or_before = index.query_after(root, recursive=True, before_date=300, include_date=True, limit=100)
+    assert at_or_before == every_row[1:]
+    assert index.query_after(root, recursive=True, limit=2) == every_row[:2]
+
+
+def test_list_endpoint_with_compact_format_is_not_filtered(gallery, monkeypatch):
+    import asyncio
+    import json
+    from aiohttp.test_utils import make_mocked_request
+    from web_gallery import gallery_server
+
+    root, index = gallery
+    monkeypatch.setattr(gallery_server, "GALLERY_INDEX", index)
+
+    def listed(query):
+        request = make_mocked_request("GET", f"/web/gallery/list?path={root}&recursive=true&{query}")
+        return json.loads(asyncio.run(gallery_server.list_gallery_files(request)).body)
+    compact = listed("format=compact")
+    assert compact["files"]["encoding"] == "columnar"
+    assert compact["total"] == compact["files"]["count"] == len(IMAGES)
+    assert listed("format=compact&extension=mp4")["total"] == 1
+    assert listed("extension=gif")["total"] == 0
@@ -0,0 +1,77 @@
+import asyncio
+import os
+from types import SimpleNamespace
+from web_gallery.gallery_metrics import CacheRatio, Counter, FileInfoCache, Histogram, Registry, timed_route
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, route="list")
+    assert list(histogram.render()) == [
+        'latency_seconds_bucket{route="list",le="0.1"} 2',
+        'latency_seconds_bucket{route="list",le="1.0"} 3',
+        'latency_seconds_bucket{route="list",le="+Inf"} 4',
+        'latency_seconds_sum{route="list"} 3.65',
+        'latency_seconds_count{route="list"} 4',
+    ]
+
+
+def test_registry_renders_help_type_and_escaped_labels():
+    registry = Registry()
+    counter = registry.register(Counter("requests_total", "Requests", ("route",)))
+    counter.inc(route='a"b\\c')
+    counter.inc(2, route='a"b\\c')
+    assert counter.get(route='a"b\\c') == 3
+    assert registry.render() == (
+        "# HELP requests_total Requests\n"
+        "# TYPE requests_total counter\n"
+        'requests_total{route="a\\"b\\\\c"} 3\n'
+    )
+
+
+def test_cache_ratio_is_derived_from_the_request_counter():
+    requests = Counter("cache_requests_total", "Lookups", ("cache", "result"))
+    for result in ("hit", "hit", "hit", "miss"):
+        requests.inc(cache="thumbs", result=result)
+    requests.inc(cache="meta", result="miss")
+    assert list(CacheRatio("ratio", "Ratio", requests).render()) == ['ratio{cache="meta"} 0.0', 'ratio{cache="thumbs"} 0.75']
+
+
+def test_timed_route_records_status_even_on_errors():
+    from web_gallery.gallery_metrics import ROUTE_REQUESTS, ROUTE_LATENCY
+
+    @timed_route("test_ok")
+    async def ok(request):
+        return SimpleNamespace(status=201)
+
+    @timed_route("test_fail")
+    async def fail(request):
+        raise RuntimeError("boom")
+
+    asyncio.run(ok(None))
+    try:
+        asyncio.run(fail(None))
+    except RuntimeError:
+        pass
+    assert ROUTE_REQUESTS.get(route="test_ok", status="201") == 1
+    assert ROUTE_REQUESTS.get(route="test_fail", status="500") == 1
+    assert ROUTE_LATENCY.values[("test_ok",)][2] == 1
+
+
+def test_file_info_cache_validates_stat_and_evicts_lru(tmp_path):
+    cache = FileInfoCache("test_info", max_entries=2)
+    paths = []
+    for name in "abc":
+        path = tmp_path / name
+        path.write_bytes(b"x")
+        paths.append(str(path))
+    stats = [os.stat(p) for p in paths]
+    cache.put(paths[0], stats[0], "A")
+    cache.put(paths[1], stats[1], "B")
+    assert cache.get(paths[0], stats[0]) == "A"
+    # b is now least recently used
+    cache.put(paths[2], stats[2], "C")
+    assert cache.get(paths[1], stats[1]) is None
+    changed = SimpleNamespace(st_mtime_ns=stats[0].st_mtime_ns + 1, st_size=stats[0].st_size)
+    assert cache.get(paths[0], changed) is None
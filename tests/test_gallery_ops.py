@@ -0,0 +1,101 @@
+import os
+import time
+import pytest
+from web_gallery import gallery_ops
+from web_gallery.gallery_index import GalleryIndex
+from web_gallery.gallery_ops import BulkOperations, free_name, inside_root
+
+
+def test_inside_root_accepts_the_root_and_its_children(tmp_path):
+    (tmp_path / "a" / "b").mkdir(parents=True)
+    assert inside_root(str(tmp_path), str(tmp_path))
+    assert inside_root(str(tmp_path), str(tmp_path / "a" / "b" / "c.png"))
+    assert inside_root(str(tmp_path) + os.sep, str(tmp_path / "a" / ".." / "a"))
+
+
+def test_inside_root_rejects_escapes(tmp_path):
+    root = tmp_path / "output"
+    (root / "sub").mkdir(parents=True)
+    (tmp_path / "outputs").mkdir()
+    assert not inside_root(str(root), str(root / ".." / "secret.txt"))
+    assert not inside_root(str(root), str(root / "sub" / ".." / ".." / "outputs"))
+    # A sibling whose name starts with the root's is not inside it
+    assert not inside_root(str(root), str(tmp_path / "outputs" / "x.png"))
+    assert not inside_root(str(root), "/etc/passwd")
+
+
+def test_inside_root_follows_symlinks(tmp_path):
+    root = tmp_path / "output"
+    root.mkdir()
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    (root / "link").symlink_to(outside, target_is_directory=True)
+    assert not inside_root(str(root), str(root / "link" / "x.png"))
+    # A symlinked root is compared by where it points
+    (tmp_path / "alias").symlink_to(root, target_is_directory=True)
+    assert inside_root(str(tmp_path / "alias"), str(root / "x.png"))
+
+
+def test_free_name_skips_taken_and_reserved_names(tmp_path):
+    assert free_name(str(tmp_path), "a.png") == "a.png"
+    (tmp_path / "a.png").write_bytes(b"")
+    (tmp_path / "a_1.png").write_bytes(b"")
+    assert free_name(str(tmp_path), "a.png") == "a_2.png"
+    assert free_name(str(tmp_path), "a.png", {"a_2.png"}) == "a_3.png"
+    assert free_name(str(tmp_path), "b.png", {"b.png"}) == "b_1.png"
+
+
+@pytest.fixture
+def bulk(tmp_path, monkeypatch):
+    root = tmp_path / "output"
+    (root / "sub").mkdir(parents=True)
+    for name in ("a.txt", "b.txt", "sub/a.txt"):
+        (root / name).write_text(name)
+    (tmp_path / "secret.txt").write_text("secret")
+    index = GalleryIndex(str(tmp_path / "index.sqlite"))
+    index.sync(str(root), force=True)
+    monkeypatch.setattr(gallery_ops, "evict_thumbnails", lambda path: None)
+    return root, BulkOperations(index)
+
+
+def run(operations, *args, **kwargs):
+    job = operations.start(*args, **kwargs)
+    deadline = time.monotonic() + 10
+    while job.finished_at is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return job.status()
+
+
+def test_copy_renames_on_conflict(bulk):
+    root, operations = bulk
+    status = run(operations, "copy", str(root), [("", "a.txt"), ("", "b.txt")], destination="sub")
+    assert (status["state"], status["done"], status["failed"]) == ("done", 2, 0)
+    assert sorted(os.listdir(root / "sub")) == ["a.txt", "a_1.txt", "b.txt"]
+    assert (root / "sub" / "a_1.txt").read_text() == "a.txt"
+
+
+def test_skip_and_overwrite_policies(bulk):
+    root, operations = bulk
+    assert run(operations, "move", str(root), [("", "a.txt")], destination="sub", conflict="skip")["skipped"] == 1
+    assert (root / "a.txt").exists()
+    assert run(operations, "move", str(root), [("", "a.txt")], destination="sub", conflict="overwrite")["done"] == 1
+    assert not (root / "a.txt").exists() and (root / "sub" / "a.txt").read_text() == "a.txt"
+
+
+def test_escaping_sources_and_destinations_fail_without_touching_files(bulk):
+    root, operations = bulk
+    status = run(operations, "delete", str(root), [("..", "secret.txt"), ("", "b.txt")])
+    assert (status["done"], status["failed"]) == (1, 1)
+    assert (root.parent / "secret.txt").exists() and not (root / "b.txt").exists()
+
+    status = run(operations, "copy", str(root), [("", "a.txt")], destination="../elsewhere")
+    assert status["failed"] == 1 and "outside the gallery root" in status["errors"][0]["error"]
+    assert not (root.parent / "elsewhere").exists()
+
+
+def test_index_follows_the_operations(bulk):
+    root, operations = bulk
+    run(operations, "move", str(root), [("", "a.txt")], destination="sub")
+    rows = {(sub, name) for sub, name, *_ in operations.index.conn.execute(
+        "SELECT subfolder, filename FROM files WHERE root = ?", (str(root),))}
+    assert ("sub", "a_1.txt") in rows and ("", "a.txt") not in rows
@@ -0,0 +1,118 @@
+import io
+import base64
+import random
+import time
+import numpy as np
+import pytest
+from PIL import Image
+from web_gallery.gallery_index import GalleryIndex
+from web_gallery.gallery_phash import PLACEHOLDER_SIZE, BKTree, PerceptualIndex, dhash_arrays, popcount, reduce_image
+
+
+def test_dhash_bits_follow_horizontal_gradients():
+    rising = np.tile(np.arange(9, dtype=np.int16), (8, 1))
+    flat = np.zeros((8, 9), dtype=np.int16)
+    assert dhash_arrays(np.stack([rising, flat, rising[:, ::-1]])) == [2**64 - 1, 0, 0]
+    # First row brighter to the right, the rest flat: only the top 8 bits are set
+    step = flat.copy()
+    step[0] = np.arange(9)
+    assert dhash_arrays(step[None]) == [0xFF << 56]
+
+
+def test_bktree_search_matches_brute_force():
+    rng = random.Random(0)
+    values = [rng.getrandbits(64) for _ in range(300)]
+    # Near copies so small radii have hits
+    values += [v ^ (1 << rng.randrange(64)) for v in values[:50]]
+    tree = BKTree()
+    for i, value in enumerate(values):
+        tree.add(value, i)
+    assert tree.size == len(values)
+    for query in values[:20] + [rng.getrandbits(64)]:
+        for radius in (0, 1, 6, 20):
+            expected = sorted((popcount(query ^ v), i) for i, v in enumerate(values) if popcount(query ^ v) <= radius)
+            assert sorted(tree.search(query, radius)) == expected
+
+
+def test_bktree_keeps_every_item_with_the_same_hash():
+    tree = BKTree()
+    tree.add(5, "a")
+    tree.add(5, "b")
+    assert sorted(tree.search(5, 0)) == [(0, "a"), (0, "b")]
+    assert BKTree().search(5, 64) == []
+
+
+@pytest.fixture
+def perceptual(tmp_path):
+    root = tmp_path / "output"
+    root.mkdir()
+    gradient = np.tile(np.linspace(0, 255, 64, dtype=np.uint8), (64, 1))
+    noise = np.random.default_rng(0).integers(0, 256, (64, 64), dtype=np.uint8)
+    for name, pixels in (("a.png", gradient), ("b.png", gradient), ("c.png", gradient[:, ::-1]), ("d.png", noise)):
+        Image.fromarray(np.dstack([pixels] * 3)).save(root / name)
+    index = GalleryIndex(str(tmp_path / "index.sqlite"))
+    index.sync(str(root), force=True)
+    return str(root), index, PerceptualIndex(index)
+
+
+def wait_hashed(perceptual_index, root):
+    deadline = time.monotonic() + 10
+    while perceptual_index.worker is not None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return perceptual_index.index.hash_progress(root, ("png",))
+
+
+def test_queries_answer_from_existing_hashes_while_hashing_runs(perceptual):
+    root, index, hashes = perceptual
+    assert index.hash_progress(root, ("png",)) == (0, 4)
+    # Nothing hashed yet: no clusters and no target, instead of blocking on the hasher
+    assert hashes.duplicates(root) == []
+    assert hashes.similar(root, "", "a.png") is None
+    assert hashes.progress(root) == (0, 4)
+    assert wait_hashed(hashes, root) == (4, 4)
+
+    clusters = hashes.duplicates(root)
+    assert [sorted(r["filename"] for r in cluster) for cluster in clusters] == [["a.png", "b.png"]]
+    similar = hashes.similar(root, "", "a.png", k=3)
+    assert similar[0]["filename"] == "b.png" and similar[0]["distance"] == 0
+    assert "a.png" not in [r["filename"] for r in similar]
+
+
+def test_trees_and_clusters_are_rebuilt_only_when_the_index_changes(perceptual):
+    root, index, hashes = perceptual
+    hashes.progress(root)
+    wait_hashed(hashes, root)
+    tree, _ = hashes.tree(root)
+    assert hashes.tree(root)[0] is tree
+    assert hashes.duplicates(root) is hashes.duplicates(root)
+    index.versions[root] += 1
+    assert hashes.tree(root)[0] is not tree
+
+
+def test_placeholder_is_a_tiny_image_of_the_average_color(tmp_path):
+    path = tmp_path / "rgba.png"
+    # Half transparent red on the left, opaque blue on the right: red flattens on white
+    pixels = np.zeros((96, 192, 4), dtype=np.uint8)
+    pixels[:, :96] = (255, 0, 0, 0)
+    pixels[:, 96:] = (0, 0, 255, 255)
+    Image.fromarray(pixels).save(path)
+    gray, uri, color = reduce_image(str(path))
+
+    assert gray.shape == (8, 9)
+    assert color == "#7f7fff"
+    header, data = uri.split(",", 1)
+    assert header in ("data:image/webp;base64", "data:image/jpeg;base64")
+    with Image.open(io.BytesIO(base64.b64decode(data))) as tiny:
+        assert max(tiny.size) <= PLACEHOLDER_SIZE and tiny.size[0] == 2 * tiny.size[1]
+    assert reduce_image(str(tmp_path / "missing.png")) is None
+
+
+def test_list_rows_carry_placeholders_once_hashed(perceptual):
+    root, index, hashes = perceptual
+    files, _ = index.query(root, limit=-1)
+    assert {(f["placeholder"], f["color"]) for f in files} == {(None, None)}
+    hashes.progress(root)
+    wait_hashed(hashes, root)
+    files, _ = index.query(root, limit=-1)
+    assert all(f["placeholder"].startswith("data:image/") for f in files)
+    assert {f["filename"]: f["color"] for f in files}["a.png"] == "#7f7f7f"
@@ -0,0 +1,67 @@
+import os
+import numpy as np
+import pytest
+from PIL import Image
+from server import PromptServer
+from web_gallery.gallery_index import GalleryIndex
+from web_gallery.gallery_push import CHANGES_EVENT, GallerySubscriptions
+
+
+def save_png(path, size):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    Image.fromarray(np.zeros((size[1], size[0], 3), dtype=np.uint8)).save(path)
+
+
+@pytest.fixture
+def gallery(tmp_path, monkeypatch):
+    root = tmp_path / "output"
+    save_png(root / "old.png", (64, 64))
+    index = GalleryIndex(str(tmp_path / "index.sqlite"))
+    index.sync(str(root), force=True)
+    subscriptions = GallerySubscriptions(index)
+    sent = []
+    monkeypatch.setattr(PromptServer.instance, "send_sync", lambda event, data, sid=None: sent.append((event, data, sid)))
+    monkeypatch.setattr(PromptServer.instance, "sockets", {"a": object(), "b": object()})
+    return root, index, subscriptions, sent
+
+
+def test_changes_reach_only_the_views_that_contain_them(gallery):
+    root, index, subscriptions, sent = gallery
+    subscriptions.subscribe("a", str(root))
+    subscriptions.subscribe("b", str(root), folder="sub")
+    save_png(root / "new.png", (32, 48))
+    os.remove(root / "old.png")
+    index.sync(str(root), force=True)
+
+    assert len(sent) == 1
+    event, data, client_id = sent[0]
+    assert (event, client_id, data["folder"]) == (CHANGES_EVENT, "a", "")
+    assert [row["filename"] for row in data["added"]] == ["new.png"]
+    assert data["added"][0]["width"] == 32 and data["added"][0]["height"] == 48
+    assert data["removed"] == [{"filename": "old.png", "subfolder": ""}]
+
+    save_png(root / "sub" / "deep.png", (8, 8))
+    index.sync(str(root), force=True)
+    assert [(s[2], [r["filename"] for r in s[1]["added"]]) for s in sent[1:]] == [("b", ["deep.png"])]
+
+
+def test_rows_rewritten_out_of_the_filters_are_removed(gallery):
+    root, index, subscriptions, sent = gallery
+    subscriptions.subscribe("a", str(root), constraints={"orientation": "portrait"})
+    save_png(root / "tall.png", (32, 64))
+    index.sync(str(root), force=True)
+    assert [r["filename"] for r in sent[-1][1]["added"]] == ["tall.png"]
+
+    save_png(root / "tall.png", (64, 32))
+    os.utime(root / "tall.png", ns=(1, 1))
+    index.sync(str(root), force=True)
+    assert sent[-1][1]["modified"] == [] and sent[-1][1]["removed"] == [{"filename": "tall.png", "subfolder": ""}]
+
+
+def test_unsubscribed_clients_get_nothing(gallery):
+    root, index, subscriptions, sent = gallery
+    subscriptions.subscribe("a", str(root))
+    assert subscriptions.unsubscribe("a") and not subscriptions.unsubscribe("a")
+    save_png(root / "new.png", (8, 8))
+    index.sync(str(root), force=True)
+    assert sent == []
@@ -0,0 +1,78 @@
+import time
+import threading
+import concurrent.futures
+import pytest
+from web_gallery.gallery_scheduler import ThumbnailScheduler
+
+
+@pytest.fixture
+def blocked():
+    # One worker, held busy by a first job until the test opens the gate
+    scheduler = ThumbnailScheduler(workers=1)
+    gate, started = threading.Event(), threading.Event()
+    blocker = scheduler.submit("blocker", lambda: (started.set(), gate.wait(5)))
+    assert started.wait(5)
+    return scheduler, gate, blocker
+
+
+def test_jobs_run_by_class_then_newest_first(blocked):
+    scheduler, gate, _ = blocked
+    order = []
+    jobs = [scheduler.submit(key, lambda key=key: order.append(key), priority)
+            for key, priority in (("warm", "prewarm"), ("next", "prefetch"), ("old", "visible"), ("new", "visible"))]
+    assert scheduler.pending() == 4
+    gate.set()
+    concurrent.futures.wait([job.future for job in jobs], timeout=5)
+    assert order == ["new", "old", "next", "warm"]
+
+
+def test_requests_for_a_queued_key_share_and_promote_the_job(blocked):
+    scheduler, gate, _ = blocked
+    order = []
+    prefetch = scheduler.submit("a", lambda: order.append("a") or "rendered", "prefetch")
+    scheduler.submit("b", lambda: order.append("b"), "visible")
+    visible = scheduler.submit("a", lambda: order.append("duplicate"), "visible")
+    assert visible is prefetch and visible.waiters == 2
+    gate.set()
+    assert visible.future.result(5) == "rendered"
+    scheduler.submit("c", lambda: None).future.result(5)
+    # "a" was promoted to visible and re-queued as the newest entry of that class
+    assert order == ["a", "b"]
+
+
+def test_released_jobs_are_cancelled_unless_someone_still_needs_them(blocked):
+    scheduler, gate, blocker = blocked
+    ran = []
+    abandoned = scheduler.submit("abandoned", lambda: ran.append("abandoned"))
+    shared = scheduler.submit("shared", lambda: ran.append("shared"))
+    scheduler.submit("shared", lambda: None)
+    pinned = scheduler.submit("pinned", lambda: ran.append("pinned"))
+    scheduler.submit("pinned", lambda: None, "prewarm", wait=False)
+    for job in (abandoned, shared, pinned):
+        scheduler.release(job)
+    # Already running: releasing it doesn't stop it
+    scheduler.release(blocker)
+
+    assert abandoned.future.cancelled() and abandoned.state == "cancelled"
+    assert scheduler.pending() == 2
+    gate.set()
+    shared.future.result(5)
+    pinned.future.result(5)
+    assert blocker.future.result(5) is not None
+    assert sorted(ran) == ["pinned", "shared"]
+
+
+def test_failures_reach_every_waiter(blocked):
+    scheduler, gate, _ = blocked
+
+    def fail():
+        raise OSError("unreadable")
+    job = scheduler.submit("bad", fail)
+    gate.set()
+    with pytest.raises(OSError, match="unreadable"):
+        job.future.result(5)
+    # Once the worker has dropped the finished job, the key can be submitted again
+    deadline = time.monotonic() + 5
+    while "bad" in scheduler.jobs and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert scheduler.submit("bad", lambda: "retried").future.result(5) == "retried"
@@ -0,0 +1,162 @@
+import io
+import asyncio
+import os
+import sqlite3
+import numpy as np
+import pytest
+from PIL import Image
+from web_gallery import gallery_thumbnails
+from web_gallery.gallery_thumbnails import (FileThumbnailStore, SqliteThumbnailStore, LEGACY_CLEANED_MARKER,
+                                            STORE_VERSION, THUMBNAIL_LADDER, render_ladder, snap_width)
+
+LADDER = {200: b"small jpeg", 1920: b"large jpeg"}
+
+
+@pytest.fixture(params=["files", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "files":
+        return FileThumbnailStore(str(tmp_path / "thumbnails"))
+    return SqliteThumbnailStore(str(tmp_path / "thumbnails.sqlite"))
+
+
+def read(cached):
+    # The files store hands back a path, the SQLite store the bytes themselves
+    if isinstance(cached, str):
+        with open(cached, "rb") as f:
+            return f.read()
+    return cached
+
+
+def test_rungs_round_trip_until_the_source_changes(store, tmp_path):
+    source = str(tmp_path / "image.png")
+    assert store.get(source, 200, 100.0) is None
+    store.put_ladder(source, 100.0, LADDER)
+
+    assert read(store.get(source, 200, 100.0)) == b"small jpeg"
+    assert read(store.get(source, 1920, 100.0)) == b"large jpeg"
+    assert store.get(source, 400, 100.0) is None
+    if store.name == "sqlite":
+        # The files store compares against the thumbnail file's own mtime instead
+        assert store.get(source, 200, 101.0) is None
+
+
+def test_same_name_in_another_folder_is_a_separate_entry(store, tmp_path):
+    store.put_ladder(str(tmp_path / "a" / "image.png"), 1.0, {200: b"a"})
+    store.put_ladder(str(tmp_path / "b" / "image.png"), 1.0, {200: b"b"})
+    assert read(store.get(str(tmp_path / "a" / "image.png"), 200, 1.0)) == b"a"
+    assert read(store.get(str(tmp_path / "b" / "image.png"), 200, 1.0)) == b"b"
+
+
+def test_evict_drops_every_rung_of_one_source(store, tmp_path):
+    kept, evicted = str(tmp_path / "kept.png"), str(tmp_path / "evicted.png")
+    store.put_ladder(kept, 1.0, LADDER)
+    store.put_ladder(evicted, 1.0, LADDER)
+    store.evict(evicted)
+    store.evict(str(tmp_path / "never_cached.png"))
+
+    assert all(store.get(evicted, rung, 1.0) is None for rung in LADDER)
+    assert read(store.get(kept, 1920, 1.0)) == b"large jpeg"
+
+
+def test_sqlite_store_replaces_rungs_and_vacuums_after_evictions(tmp_path, monkeypatch):
+    monkeypatch.setattr(gallery_thumbnails, "VACUUM_EVERY", 2)
+    store = SqliteThumbnailStore(str(tmp_path / "thumbnails.sqlite"))
+    source = str(tmp_path / "image.png")
+    store.put_ladder(source, 1.0, LADDER)
+    store.put_ladder(source, 2.0, {200: b"newer"})
+    assert store.get(source, 200, 2.0) == b"newer"
+
+    store.evict(source)
+    # Two rows were deleted, which reaches VACUUM_EVERY and resets the counter
+    assert store.evictions == 0
+    assert store.conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+
+def test_sqlite_store_from_an_older_layout_starts_empty(tmp_path):
+    path = str(tmp_path / "thumbnails.sqlite")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE thumbnails (path TEXT, size TEXT, data BLOB)")
+    conn.execute("INSERT INTO thumbnails VALUES ('x', 'small', x'00')")
+    conn.execute(f"PRAGMA user_version = {STORE_VERSION - 1}")
+    conn.commit()
+    conn.close()
+
+    store = SqliteThumbnailStore(path)
+    assert store.conn.execute("SELECT COUNT(*) FROM thumbnails").fetchone()[0] == 0
+    store.put_ladder(os.path.join(str(tmp_path), "x.png"), 1.0, LADDER)
+    assert store.get(os.path.join(str(tmp_path), "x.png"), 200, 1.0) == b"small jpeg"
+
+
+def test_unknown_store_name_falls_back_to_files():
+    # Same default directory as the module's own THUMBNAIL_CACHE, so nothing new is created
+    assert gallery_thumbnails.open_store("packfile").name == "files"
+
+
+def test_widths_snap_to_the_nearest_rung():
+    assert [snap_width(w) for w in (1, 200, 299, 300, 301, 600, 601, 1359, 1360, 5000)] == \
+        [200, 200, 200, 400, 400, 800, 800, 800, 1920, 1920]
+
+
+def test_ladder_is_rendered_from_one_decode(tmp_path, monkeypatch):
+    path = tmp_path / "wide.png"
+    pixels = np.zeros((1000, 3000, 4), dtype=np.uint8)
+    pixels[..., 3] = 255
+    Image.fromarray(pixels).save(path)
+    opened = []
+    real_open = Image.open
+    monkeypatch.setattr(Image, "open", lambda *args, **kwargs: opened.append(args[0]) or real_open(*args, **kwargs))
+
+    ladder = render_ladder(str(path))
+    assert opened == [str(path)]
+    assert sorted(ladder) == list(THUMBNAIL_LADDER)
+    for rung, data in ladder.items():
+        with real_open(io.BytesIO(data)) as thumb:
+            assert thumb.format == "JPEG" and thumb.mode == "RGB"
+            assert max(thumb.size) == rung and abs(thumb.size[0] / thumb.size[1] - 3) < 0.05
+
+
+def test_thumbnails_from_before_the_ladder_are_removed_once(tmp_path):
+    directory = tmp_path / "thumbnails"
+    directory.mkdir()
+    for name in ("small_0123_a.png", "preview_0123_a.png", "small_b.png", "w400_0123_a.png", "notes.txt"):
+        (directory / name).write_bytes(b"x")
+    store = FileThumbnailStore(str(directory))
+    store.cleanup.join()
+    assert sorted(os.listdir(directory)) == [LEGACY_CLEANED_MARKER, "notes.txt", "w400_0123_a.png"]
+
+    (directory / "small_again.png").write_bytes(b"x")
+    assert FileThumbnailStore(str(directory)).cleanup is None
+    assert (directory / "small_again.png").exists()
+
+
+def test_route_snaps_sizes_and_looks_up_off_the_event_loop(tmp_path, monkeypatch):
+    import threading
+    import folder_paths
+    from aiohttp.test_utils import make_mocked_request
+    from web_gallery import gallery_server
+
+    output = tmp_path / "output"
+    output.mkdir()
+    Image.fromarray(np.zeros((1000, 2000, 3), dtype=np.uint8)).save(output / "a.png")
+    monkeypatch.setattr(folder_paths, "get_output_directory", lambda: str(output))
+    store = FileThumbnailStore(str(tmp_path / "thumbnails"))
+    lookups = []
+    real_get = store.get
+    monkeypatch.setattr(store, "get", lambda *args: lookups.append(threading.current_thread()) or real_get(*args))
+    monkeypatch.setattr(gallery_server, "THUMBNAIL_CACHE", store)
+
+    def request(query):
+        return gallery_server.get_thumbnail(make_mocked_request("GET", f"/web/gallery/thumbnail?filename=a.png&{query}"))
+
+    async def run():
+        # The picker's size=small is the 400 rung; w= snaps; the first miss renders every rung
+        widths = []
+        for query in ("size=small", "size=preview", "w=700", "w=250"):
+            with Image.open((await request(query))._path) as thumb:
+                widths.append(thumb.size[0])
+        return widths, (await request("w=abc")).status, threading.current_thread()
+
+    widths, invalid_status, loop_thread = asyncio.run(run())
+    assert widths == [400, 1920, 800, 200]
+    assert invalid_status == 400
+    assert lookups and loop_thread not in lookups
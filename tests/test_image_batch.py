@@ -0,0 +1,92 @@
+import warnings
+import numpy as np
+import pytest
+import torch
+from PIL import Image
+from web_gallery import image_batch
+from web_gallery.image_batch import NULL_REPORT, TensorBatch, BatchReport, PeakMemory, batch_report, fit_image, to_list_tensor
+
+
+def gradient(width, height):
+    x = np.linspace(0, 255, width, dtype=np.uint8)
+    return np.ascontiguousarray(np.broadcast_to(x[None, :, None], (height, width, 3)))
+
+
+def test_to_list_tensor_normalizes_in_one_tensor():
+    image = gradient(8, 4)
+    tensor = to_list_tensor(image)
+    assert tensor.shape == (1, 4, 8, 3)
+    assert tensor.dtype == torch.float32
+    assert torch.allclose(tensor[0], torch.from_numpy(image).float() / 255.0)
+
+
+def test_batch_fills_preallocated_slots():
+    batch = TensorBatch(3)
+    first = gradient(8, 4)
+    assert batch.add(first) == 0
+    # The first image decides the size; later ones are fitted to it
+    assert batch.add(gradient(16, 8)) == 1
+    assert batch.repeat(0) == 2
+    assert batch.add(first) is None
+
+    output = batch.result()
+    assert output.shape == (3, 4, 8, 3)
+    assert output.data_ptr() == batch.buffer.data_ptr()
+    assert torch.allclose(output[0], torch.from_numpy(first).float() / 255.0)
+    assert torch.equal(output[2], output[0])
+
+
+@pytest.mark.parametrize("policy", ["resize", "crop", "pad"])
+def test_fit_image_policies_hit_the_target_size(policy):
+    image = Image.fromarray(gradient(30, 10))
+    assert fit_image(image, 16, 16, policy).size == (16, 16)
+
+
+def test_adding_pil_images_does_not_warn():
+    batch = TensorBatch(1, 8, 8)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        batch.add(Image.fromarray(gradient(8, 8)))
+    assert batch.count == 1
+
+
+def allocate_and_measure(memory, megabytes):
+    block = np.ones(megabytes * 2**20, dtype=np.uint8)
+    block.sum()
+    del block
+    return memory.stop()
+
+
+def test_peak_memory_measures_the_process():
+    memory = PeakMemory()
+    assert allocate_and_measure(memory, 64) >= 60 * 2**20
+
+
+def test_peak_memory_falls_back_to_tracemalloc(monkeypatch):
+    monkeypatch.setattr(image_batch, "reset_rss_peak", lambda: False)
+    memory = PeakMemory()
+    assert memory.source.startswith("tracemalloc")
+    peak = allocate_and_measure(memory, 32)
+    assert 32 * 2**20 <= peak < 48 * 2**20
+
+
+def test_report_logs_measured_peak(capsys):
+    report = BatchReport("Loader", "list")
+    report.record(4, 8)
+    report.log()
+    line = capsys.readouterr().out
+    assert "list mode: 1 images" in line
+    assert "peak +" in line
+
+
+def test_reports_are_opt_in(monkeypatch, capsys):
+    monkeypatch.setattr(image_batch, "reset_rss_peak", lambda: pytest.fail("measured while reports are off"))
+    monkeypatch.setattr(image_batch, "BATCH_REPORTS", False)
+    report = batch_report("Loader", "batch")
+    assert report is NULL_REPORT
+    report.record(4, 8)
+    report.log(96)
+    assert capsys.readouterr().out == ""
+    monkeypatch.setattr(image_batch, "BATCH_REPORTS", True)
+    monkeypatch.setattr(image_batch, "reset_rss_peak", lambda: False)
+    assert isinstance(batch_report("Loader", "batch"), BatchReport)
@@ -0,0 +1,37 @@
+import random
+from collections import Counter
+from web_gallery.image_scan import reservoir_sample
+
+
+def test_sample_counts_and_filter():
+    sample, seen, accepted = reservoir_sample(range(100), 10, random.Random(1), accept=lambda x: x % 2 == 0)
+    assert (seen, accepted) == (100, 50)
+    assert len(sample) == 10
+    assert len(set(sample)) == 10
+    assert all(x % 2 == 0 for x in sample)
+
+
+def test_small_streams_are_returned_whole():
+    sample, seen, accepted = reservoir_sample(iter("abc"), 10, random.Random(0))
+    assert sorted(sample) == ["a", "b", "c"]
+    assert (seen, accepted) == (3, 3)
+
+
+def test_same_seed_same_sample():
+    assert reservoir_sample(range(1000), 5, random.Random(7))[0] == reservoir_sample(range(1000), 5, random.Random(7))[0]
+
+
+def test_larger_k_extends_the_same_sequence():
+    small = reservoir_sample(range(1000), 5, random.Random(3))[0]
+    large = reservoir_sample(range(1000), 20, random.Random(3))[0]
+    assert large[:5] == small
+
+
+def test_every_item_is_equally_likely():
+    counts = Counter()
+    trials = 4000
+    for seed in range(trials):
+        counts.update(reservoir_sample(range(10), 3, random.Random(seed))[0])
+    for item in range(10):
+        # Expected 0.3 per item; 4000 trials keep the deviation well under 0.03
+        assert abs(counts[item] / trials - 0.3) < 0.03
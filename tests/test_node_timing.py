@@ -0,0 +1,43 @@
+import json
+from web_gallery import node_timing
+from web_gallery.node_timing import NULL_TIMER, STAGE_EVENT, StageTimer, stage_timer
+
+
+def test_stages_accumulate_in_first_run_order(monkeypatch):
+    timer = StageTimer("Loader", "3")
+    times = iter([10.0, 10.5, 20.0, 20.25, 30.0, 31.0])
+    monkeypatch.setattr(node_timing.time, "perf_counter", lambda: next(times))
+    for name in ("decode", "resize", "decode"):
+        with timer.stage(name):
+            pass
+    timer.count("decoded")
+    timer.count("decoded", 2)
+    assert timer.stages == {"decode": 1.5, "resize": 0.25}
+    assert timer.counters == {"decoded": 3}
+
+
+def test_finish_sends_the_breakdown_and_appends_the_log(tmp_path, monkeypatch):
+    from server import PromptServer
+    sent = []
+    monkeypatch.setattr(PromptServer.instance, "send_sync", lambda event, data, sid=None: sent.append((event, data)))
+    log = tmp_path / "stages.jsonl"
+    monkeypatch.setattr(node_timing, "STAGE_LOG", str(log))
+    timer = StageTimer("Loader", "3")
+    timer.add("decode", 0.0125)
+    timer.count("files_scanned", 4)
+    record = timer.finish()
+    assert sent == [(STAGE_EVENT, record)]
+    assert record["node"] == "Loader" and record["node_id"] == "3"
+    assert record["stages_ms"] == {"decode": 12.5} and record["counters"] == {"files_scanned": 4}
+    assert json.loads(log.read_text()) == record
+
+
+def test_timing_is_off_unless_enabled(monkeypatch):
+    monkeypatch.setattr(node_timing, "STAGE_TIMING", False)
+    timer = stage_timer("Loader")
+    assert timer is NULL_TIMER and not timer.enabled
+    with timer.stage("decode"):
+        timer.count("decoded")
+    assert timer.finish() is None
+    monkeypatch.setattr(node_timing, "STAGE_TIMING", True)
+    assert isinstance(stage_timer("Loader"), StageTimer)
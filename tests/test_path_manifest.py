@@ -0,0 +1,90 @@
+import os
+import sys
+import pytest
+from web_gallery import path_manifest
+from web_gallery.path_manifest import PathManifest
+from web_gallery.image_scan import iter_image_paths
+
+OLD_NS = 10**18
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    monkeypatch.setattr(path_manifest, "MANIFEST_DIR", str(tmp_path / "manifests"))
+    root = tmp_path / "images"
+    for rel in ("b.png", "a.jpg", "notes.txt", "sub/c.webp", "sub/deeper/d.png", "z/e.jpeg"):
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"")
+    # Old directory mtimes, so any change made by a test moves them
+    for directory in (root, root / "sub", root / "sub" / "deeper", root / "z"):
+        os.utime(directory, ns=(OLD_NS, OLD_NS))
+    return root
+
+
+def rel_paths(root, paths):
+    return [os.path.relpath(p, root).replace(os.sep, "/") for p in paths]
+
+
+def test_iter_image_paths_is_sorted_per_directory(tree):
+    assert rel_paths(tree, iter_image_paths(str(tree))) == ["a.jpg", "b.png"]
+    assert rel_paths(tree, iter_image_paths(str(tree), subfolders=True)) == [
+        "a.jpg", "b.png", "sub/c.webp", "sub/deeper/d.png", "z/e.jpeg"]
+
+
+def test_manifest_slices_in_sorted_order(tree):
+    manifest = PathManifest(str(tree), subfolders=True)
+    manifest.ensure()
+    assert manifest.count() == 5
+    assert rel_paths(tree, manifest.read_range(1, 3)) == ["b.png", "sub/c.webp", "sub/deeper/d.png"]
+    assert rel_paths(tree, manifest.read([4, 0, 99])) == ["z/e.jpeg", "a.jpg"]
+    assert manifest.read_range(5, 2) == []
+
+
+def test_cursor_advances_wraps_and_restarts(tree):
+    manifest = PathManifest(str(tree), subfolders=True)
+    manifest.ensure()
+    assert manifest.advance("run", 0, 2) == (0, 2)
+    assert manifest.advance("run", 0, 2) == (2, 2)
+    assert manifest.advance("run", 0, 2) == (4, 2)
+    assert manifest.advance("run", 0, 2) == (0, 2)
+    # A new start_from restarts the cursor there
+    assert manifest.advance("run", 3, 2) == (3, 2)
+    # Cursors are independent
+    assert manifest.advance("other", 0, 0) == (0, 5)
+
+
+def test_fresh_manifest_is_not_stale(tree):
+    manifest = PathManifest(str(tree), subfolders=True)
+    manifest.ensure()
+    assert not manifest.is_stale()
+
+
+@pytest.mark.parametrize("change", ["add_deep", "remove_deep", "remove_dir", "add_dir"])
+def test_changes_in_subdirectories_make_it_stale(tree, change):
+    manifest = PathManifest(str(tree), subfolders=True)
+    manifest.ensure()
+    if change == "add_deep":
+        (tree / "sub" / "deeper" / "new.png").write_bytes(b"")
+    elif change == "remove_deep":
+        (tree / "sub" / "deeper" / "d.png").unlink()
+    elif change == "remove_dir":
+        (tree / "z" / "e.jpeg").unlink()
+        (tree / "z").rmdir()
+    else:
+        (tree / "sub" / "new").mkdir()
+    assert manifest.is_stale()
+    manifest.ensure()
+    assert not manifest.is_stale()
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="needs bytes filenames")
+def test_undecodable_filenames_round_trip(tree):
+    raw = os.path.join(os.fsencode(str(tree)), b"caf\xe9.png")
+    with open(raw, "wb"):
+        pass
+    manifest = PathManifest(str(tree))
+    manifest.ensure()
+    paths = manifest.read_range(0, manifest.count())
+    assert os.fsdecode(raw) in paths
+    assert all(os.path.exists(p) for p in paths)
@@ -0,0 +1,161 @@
+import os
+import concurrent.futures
+import numpy as np
+import pytest
+from PIL import Image
+from web_gallery import pose_manifest
+from web_gallery.pose_manifest import PoseManifest, classify_in_pool, is_openpose_array
+
+
+def skeleton(size=32):
+    pixels = np.zeros((size, size, 3), dtype=np.uint8)
+    pixels[size // 2, :, 0] = 255
+    return pixels
+
+
+def photo(seed, size=32):
+    return np.random.default_rng(seed).integers(60, 256, (size, size, 3), dtype=np.uint8)
+
+
+def test_is_openpose_array():
+    assert is_openpose_array(skeleton())
+    assert not is_openpose_array(photo(0))
+
+
+@pytest.mark.parametrize("count", [4, pose_manifest.MIN_POOL_FILES + 8])
+def test_classify_in_pool_uses_threads(tmp_path, monkeypatch, count):
+    def no_processes(*args, **kwargs):
+        raise AssertionError("classification must not fork the server process")
+    monkeypatch.setattr(concurrent.futures, "ProcessPoolExecutor", no_processes)
+
+    expected = {}
+    for i in range(count):
+        path = str(tmp_path / f"{i}.png")
+        Image.fromarray(skeleton() if i % 2 else photo(i)).save(path)
+        expected[path] = bool(i % 2)
+    broken = str(tmp_path / "broken.png")
+    with open(broken, "wb") as f:
+        f.write(b"not an image")
+    expected[broken] = None
+
+    assert classify_in_pool(list(expected), workers=4) == expected
+
+
+@pytest.fixture
+def manifest(tmp_path, monkeypatch):
+    monkeypatch.setattr(pose_manifest, "POSE_MANIFEST_DIR", str(tmp_path / "manifests"))
+    image_dir = tmp_path / "poses"
+    (image_dir / "examples").mkdir(parents=True)
+    for rel in ("pose1.png", "pose1_sample.png"):
+        (image_dir / rel).write_bytes(b"")
+    return PoseManifest(str(image_dir))
+
+
+def test_lookup_is_keyed_on_mtime_and_size(manifest):
+    path = os.path.join(manifest.image_dir, "pose1.png")
+    stat = os.stat(path)
+    assert manifest.lookup(path, stat) is None
+    manifest.record(path, stat, True)
+    assert manifest.lookup(path, stat) is True
+    with open(path, "wb") as f:
+        f.write(b"changed")
+    assert manifest.lookup(path, os.stat(path)) is None
+
+
+def test_pairs_follow_moves_and_persist(manifest):
+    image_dir = manifest.image_dir
+    pose = os.path.join(image_dir, "pose1.png")
+    example = os.path.join(image_dir, "pose1_sample.png")
+    manifest.record(example, os.stat(example), False)
+    manifest.set_pair(example, pose)
+
+    moved = os.path.join(image_dir, "examples", "pose1_sample.png")
+    os.rename(example, moved)
+    manifest.move(example, moved)
+    manifest.save()
+
+    reloaded = PoseManifest(image_dir)
+    assert reloaded.pairs == {"examples/pose1_sample.png": "pose1.png"}
+    assert reloaded.lookup(moved, os.stat(moved)) is False
+    assert reloaded.get_pairs() == [(pose, moved)]
+
+
+def test_pair_paths_match_abspath_keys(manifest):
+    # PoseImageManager looks pair paths up in a dict keyed by normpath(abspath(path))
+    pose = os.path.join(manifest.image_dir, "pose1.png")
+    example = os.path.join(manifest.image_dir, "pose1_sample.png")
+    manifest.set_pair(example, pose)
+    keys = {os.path.normpath(os.path.abspath(p)) for p in (pose, example)}
+    for pair in manifest.get_pairs():
+        assert set(pair) <= keys
+        assert all(p == os.path.normpath(p) for p in pair)
+
+
+def test_pairs_with_missing_files_are_dropped(manifest):
+    pose = os.path.join(manifest.image_dir, "pose1.png")
+    example = os.path.join(manifest.image_dir, "pose1_sample.png")
+    manifest.set_pair(example, pose)
+    os.remove(example)
+    assert manifest.get_pairs() == []
+    assert manifest.pairs == {}
+
+
+def test_prune_forgets_missing_files(manifest):
+    pose = os.path.join(manifest.image_dir, "pose1.png")
+    example = os.path.join(manifest.image_dir, "pose1_sample.png")
+    for path in (pose, example):
+        manifest.record(path, os.stat(path), path == pose)
+    manifest.prune([pose])
+    assert list(manifest.entries) == ["pose1.png"]
+
+
+def test_prefix_index_picks_the_longest_base_name():
+    index = pose_manifest.PosePrefixIndex(["pose", "pose_a", "walk"])
+    assert index.match("pose_a_sample") == "pose_a"
+    assert index.match("pose_b_sample") == "pose"
+    assert index.match("walk") == "walk"
+    assert index.match("run_sample") is None
+
+
+def test_prefix_index_does_not_split_numbers():
+    index = pose_manifest.PosePrefixIndex(["pose1", "pose12"])
+    assert index.match("pose1_sample") == "pose1"
+    assert index.match("pose12_sample") == "pose12"
+    assert index.match("pose123_sample") is None
+    assert pose_manifest.PosePrefixIndex(["pose1"]).match("pose12_sample") is None
+
+
+def test_prefix_index_ignores_empty_names():
+    index = pose_manifest.PosePrefixIndex([""])
+    assert index.match("anything") is None
+
+
+def test_cold_library_with_a_short_class_is_classified_on_the_pool(tmp_path, monkeypatch):
+    from web_gallery import PoseImageManager as node_module
+    monkeypatch.setattr(pose_manifest, "POSE_MANIFEST_DIR", str(tmp_path / "manifests"))
+    image_dir = tmp_path / "poses"
+    image_dir.mkdir()
+    # 3 skeletons (under the 64 load quota) and 70 examples (over it)
+    for i in range(3):
+        Image.fromarray(skeleton()).save(image_dir / f"pose{i:02d}.png")
+    for i in range(70):
+        Image.fromarray(photo(i)).save(image_dir / f"photo{i:02d}.png")
+
+    pools = []
+    real_pool = concurrent.futures.ThreadPoolExecutor
+    monkeypatch.setattr(concurrent.futures, "ThreadPoolExecutor", lambda *a, **kw: pools.append(kw) or real_pool(*a, **kw))
+    decodes = []
+    real_load = pose_manifest.load_rgb_array
+    monkeypatch.setattr(pose_manifest, "load_rgb_array", lambda path, store=None: decodes.append(path) or real_load(path, store))
+    monkeypatch.setattr(node_module, "load_rgb_array", lambda path, store=None: decodes.append(path) or real_load(path, store))
+
+    result = node_module.PoseImageManager().process_images(str(image_dir), False, False, True, True, workers=4)
+    examples, example_paths, openposes, openpose_paths = result[:4]
+
+    assert pools == [{"max_workers": 4}]
+    assert (len(openposes), len(openpose_paths), len(examples), len(example_paths)) == (3, 3, 64, 70)
+    # One decode per file: the loaded images reuse the pool's decode
+    assert sorted(decodes) == sorted(str(p) for p in image_dir.iterdir())
+    # The loaded examples are the first 64 in scan order
+    for tensor, path in zip(examples, example_paths):
+        np.testing.assert_allclose(tensor[0].numpy(), np.array(Image.open(path)) / 255.0, atol=1e-6)
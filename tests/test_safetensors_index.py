@@ -0,0 +1,96 @@
+import os
+import json
+import struct
+import time
+import pytest
+from web_gallery import safetensors_index
+from web_gallery.safetensors_index import CheckpointHeaderIndex, PENDING, detect_architecture, read_safetensors_header
+
+
+def write_safetensors(path, tensors, metadata=None):
+    # Header-only safetensors file: {name: {"dtype", "shape", "data_offsets"}} plus zeroed data
+    header, offset = {}, 0
+    for name, shape in tensors.items():
+        size = 2
+        for dim in shape:
+            size *= dim
+        header[name] = {"dtype": "F16", "shape": list(shape), "data_offsets": [offset, offset + size]}
+        offset += size
+    if metadata:
+        header["__metadata__"] = metadata
+    raw = json.dumps(header).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(struct.pack("<Q", len(raw)) + raw + b"\0" * offset)
+
+
+SDXL = {"model.diffusion_model.label_emb.0.0.weight": (4, 4),
+        "conditioner.embedders.1.model.ln_final.weight": (4,)}
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    root = tmp_path / "checkpoints"
+    root.mkdir()
+    monkeypatch.setattr(safetensors_index.folder_paths, "get_full_path",
+                        lambda folder, name: str(root / name) if (root / name).exists() else None, raising=False)
+    index = CheckpointHeaderIndex(str(tmp_path / "index.json"))
+    index.root = root
+    return index
+
+
+def wait_idle(index):
+    deadline = time.monotonic() + 5
+    while index.worker is not None and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_header_is_read_without_the_tensor_data(tmp_path):
+    path = tmp_path / "a.safetensors"
+    write_safetensors(path, SDXL, {"modelspec.architecture": "stable-diffusion-xl-v1-base"})
+    header = read_safetensors_header(str(path))
+    assert header["__metadata__"]["modelspec.architecture"] == "stable-diffusion-xl-v1-base"
+    assert set(header) - {"__metadata__"} == set(SDXL)
+
+
+def test_architecture_reads_unindexed_names_on_the_spot(index):
+    write_safetensors(index.root / "a.safetensors", SDXL)
+    (index.root / "b.ckpt").write_bytes(b"pickle")
+    assert index.architecture("a.safetensors") == "SDXL"
+    assert index.architecture("b.ckpt") == "Unknown"
+    assert index.architecture("missing.safetensors") == "Unknown"
+    reads = index.reads
+    index.architecture("a.safetensors")
+    assert index.reads == reads
+
+
+def test_architecture_without_reading_queues_the_indexer(index):
+    write_safetensors(index.root / "a.safetensors", SDXL)
+    assert index.architecture("a.safetensors", read=False) == PENDING
+    wait_idle(index)
+    assert index.architecture("a.safetensors", read=False) == "SDXL"
+    assert os.path.exists(index.path)
+
+
+def test_changed_files_are_not_served_from_the_index(index):
+    path = index.root / "a.safetensors"
+    write_safetensors(path, SDXL)
+    assert index.architecture("a.safetensors") == "SDXL"
+    # Same name, different contents: mtime and size no longer match the entry
+    write_safetensors(path, {"double_blocks.0.img_attn.qkv.weight": (8, 4), "single_blocks.0.linear1.weight": (8, 4)})
+    os.utime(path, ns=(1, 1))
+    assert index.architecture("a.safetensors", read=False) == PENDING
+    wait_idle(index)
+    assert index.architecture("a.safetensors") == "Flux"
+
+
+def test_schedule_drops_removed_checkpoints(index):
+    write_safetensors(index.root / "a.safetensors", SDXL)
+    index.get("a.safetensors")
+    index.schedule([])
+    wait_idle(index)
+    assert index.entries == {}
+
+
+def test_detect_architecture_from_metadata_and_keys():
+    assert detect_architecture([], {}, {"modelspec.architecture": "flux-1-dev"}) == "Flux"
+    assert detect_architecture(list(SDXL), {k: list(v) for k, v in SDXL.items()}, {}) == "SDXL"
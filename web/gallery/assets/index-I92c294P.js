@@ -42,4 +42,4 @@ Error generating stack: `+a.message+`
 .transform-component-module_content__FBWxo img {
   pointer-events: none;
 }
-`,Cm={wrapper:"transform-component-module_wrapper__SPB86",content:"transform-component-module_content__FBWxo"};yy(gy);var by=function(i){var s=i.children,c=i.wrapperClass,f=c===void 0?"":c,m=i.contentClass,h=m===void 0?"":m,p=i.wrapperStyle,E=i.contentStyle,b=i.wrapperProps,g=b===void 0?{}:b,O=i.contentProps,j=O===void 0?{}:O,H=$.useContext(to),q=H.init,Q=H.cleanupWindowEvents,K=$.useRef(null),tt=$.useRef(null);return $.useEffect(function(){var nt=K.current,it=tt.current;return nt!==null&&it!==null&&q&&q?.(nt,it),function(){Q?.()}},[]),Ue.createElement("div",Rl({},g,{ref:K,className:"".concat(Jc.wrapperClass," ").concat(Cm.wrapper," ").concat(f),style:p}),Ue.createElement("div",Rl({},j,{ref:tt,className:"".concat(Jc.contentClass," ").concat(Cm.content," ").concat(h),style:E}),s))};const Sy=({folders:i,activeFolder:s,onFolderSelect:c})=>{const[f,m]=$.useState({}),p=(g=>{const O={};return g.forEach(j=>{const H=j.split("/");let q=O;H.forEach((Q,K)=>{q[Q]||(q[Q]={name:Q,path:H.slice(0,K+1).join("/"),children:{},isLeaf:K===H.length-1}),q=q[Q].children})}),O})(i),E=g=>{m(O=>({...O,[g]:!O[g]}))},b=(g,O=0)=>{const j=Object.keys(g.children).length>0,H=f[g.path],q=s===g.path;return T.jsxs("div",{children:[T.jsxs("button",{onClick:()=>{j&&E(g.path),c(g.path)},className:`w-full flex items-center gap-2 px-3 py-1.5 text-sm font-medium rounded-lg transition-all duration-200 group ${q?"bg-indigo-600/10 text-indigo-400 border border-indigo-500/20":"text-gray-400 hover:bg-gray-800/50 hover:text-white border border-transparent"}`,style:{paddingLeft:`${O*12+12}px`},children:[j&&T.jsx("span",{onClick:Q=>{Q.stopPropagation(),E(g.path)},className:"p-0.5 hover:bg-gray-700 rounded",children:H?T.jsx(B0,{className:"w-3 h-3"}):T.jsx(Om,{className:"w-3 h-3"})}),!j&&T.jsx("span",{className:"w-4"})," ",q?T.jsx(Mm,{className:"w-4 h-4 text-indigo-400 shrink-0"}):T.jsx(Vc,{className:"w-4 h-4 text-gray-500 group-hover:text-white shrink-0"}),T.jsx("span",{className:"truncate",title:g.name,children:g.name})]}),H&&j&&T.jsx("div",{className:"border-l border-gray-800 ml-4 mt-1",children:Object.values(g.children).map(Q=>b(Q,O+1))})]},g.path)};return T.jsxs("div",{className:"space-y-0.5",children:[T.jsxs("button",{onClick:()=>c(""),className:`w-full flex items-center gap-3 px-3 py-2.5 text-sm font-medium rounded-lg transition-all duration-200 group ${s===""?"bg-indigo-600/10 text-indigo-400 border border-indigo-500/20":"text-gray-400 hover:bg-gray-800/50 hover:text-white border border-transparent"}`,children:[T.jsx(Dm,{className:`w-4 h-4 ${s===""?"text-indigo-400":"text-gray-500 group-hover:text-white"}`}),"All Outputs"]}),Object.values(p).map(g=>b(g))]})};function Ey(){const[i,s]=$.useState([]),[c,f]=$.useState([]),[m,h]=$.useState(""),[p,E]=$.useState(!0),[b,g]=$.useState(null),[O,j]=$.useState(0),[H,q]=$.useState(!0),[Q,K]=$.useState("grid"),[tt,nt]=$.useState(""),[it,F]=$.useState(!1);$.useEffect(()=>{F(!1)},[b?.filename,b?.subfolder]);const ht=$.useRef(null),bt=async(v,A,z)=>{ht.current&&ht.current.abort();const U=new AbortController;ht.current=U;try{const B=`/web/gallery/list?skip=${v}&limit=${A}&folder=${encodeURIComponent(z)}`,Z=await fetch(B,{signal:U.signal});if(!Z.ok)throw new Error("Failed to fetch files");return await Z.json()}catch(B){return B.name==="AbortError"?(console.log("Fetch aborted"),null):(console.error("Error fetching files:",B),{files:[],total:0})}finally{ht.current===U&&(ht.current=null)}},St=$.useCallback(async()=>{if(!H){if(O>0&&i.length>=O){E(!1);return}q(!0);try{const A=i.length,z=await bt(A,50,m);if(!z)return;!z.files||z.files.length===0?E(!1):(s(U=>{const B=z.files.filter(Z=>!U.some(et=>et.filename===Z.filename&&et.subfolder===Z.subfolder));return[...U,...B]}),j(z.total),i.length+z.files.length>=z.total&&E(!1))}catch(v){console.error("Load more error:",v)}finally{q(!1)}}},[i.length,m,H,O]);$.useEffect(()=>{let v=!0;return s([]),E(!0),j(0),q(!0),(async()=>{try{const z=await bt(0,50,m);if(!v)return;z&&z.files&&(s(z.files),j(z.total),E(z.files.length<z.total))}catch(z){console.error("Initial load error:",z)}finally{v&&q(!1)}})(),()=>{v=!1,ht.current&&ht.current.abort()}},[m]),$.useEffect(()=>{fetch("/web/gallery/folders").then(v=>v.json()).then(v=>{v.folders&&f(v.folders)}).catch(console.error)},[]);const L=(v,A="original")=>{if(!v)return"";const z=new URLSearchParams;return z.append("filename",v.filename),v.subfolder&&z.append("subfolder",v.subfolder),z.append("type",v.type||"output"),A==="thumbnail"||A==="preview"?(v.format&&z.append("format",v.format),A==="preview"&&z.append("size","preview"),`/web/gallery/thumbnail?${z.toString()}`):`/view?${z.toString()}`},zt=(v,A)=>{v.stopPropagation();const z=document.createElement("a");z.href=L(A,"original"),z.download=A.filename,document.body.appendChild(z),z.click(),document.body.removeChild(z)},Ot=i.filter(v=>v.filename.toLowerCase().includes(tt.toLowerCase())),Vt=({src:v,alt:A,className:z,style:U,onLoad:B})=>{const[Z,et]=$.useState(!1);return $.useEffect(()=>{et(!1)},[v]),T.jsxs("div",{className:"w-full h-full flex items-center justify-center relative",children:[!Z&&T.jsxs("div",{className:"absolute inset-0 flex items-center justify-center pointer-events-none z-10",children:[T.jsx("div",{className:"w-full h-full bg-gray-900/50 animate-shimmer absolute inset-0 rounded-sm"}),T.jsx("div",{className:"w-16 h-16 bg-gray-900/80 backdrop-blur-md rounded-2xl flex items-center justify-center shadow-2xl border border-white/10 ring-1 ring-black/50 z-20",children:T.jsx(tp,{className:"w-8 h-8 text-indigo-400 animate-spin"})})]}),T.jsx("img",{src:v,alt:A,className:`${z} transition-opacity duration-300 ${Z?"opacity-100":"opacity-0"}`,style:U,onLoad:()=>{et(!0),B?.()}})]})},wt=({src:v,alt:A,aspectRatio:z,onClick:U,maxHeight:B})=>{const[Z,et]=$.useState(!1);return T.jsxs("div",{className:"relative w-full overflow-hidden bg-gray-900 cursor-pointer group",style:{aspectRatio:`${1/z}`,maxHeight:B!=="none"?B:void 0},onClick:U,children:[!Z&&T.jsx("div",{className:"absolute inset-0 bg-gray-800 animate-shimmer"}),T.jsx("img",{src:v,alt:A,className:`absolute inset-0 w-full h-full object-cover transition-opacity duration-500 ${Z?"opacity-100":"opacity-0"}`,loading:"lazy",onLoad:()=>et(!0)}),T.jsx("div",{className:"absolute inset-0 bg-black/0 group-hover:bg-black/10 transition-colors duration-200"})]})},[vt,Jt]=$.useState(()=>{const v=localStorage.getItem("gallery_column_count");return v?parseInt(v):6}),[Et,qt]=$.useState(()=>localStorage.getItem("gallery_max_image_height")||"none");$.useEffect(()=>{localStorage.setItem("gallery_column_count",vt)},[vt]),$.useEffect(()=>{localStorage.setItem("gallery_max_image_height",Et)},[Et]);const D={default:vt,1536:Math.min(vt,5),1280:Math.min(vt,4),1024:Math.min(vt,3),768:Math.min(vt,2)},X=$.useCallback(()=>{const v=Array.from({length:40}).map((A,z)=>{const U=[200,300,400,250,350,280,320,380,220,260];return{height:U[z%U.length]}});return T.jsx("div",{className:"w-full flex gap-1",children:T.jsx(Gc,{breakpointCols:D,className:"my-masonry-grid flex w-full gap-1",columnClassName:"my-masonry-grid_column flex flex-col gap-1",children:v.map((A,z)=>T.jsx("div",{className:"w-full bg-gray-800 rounded-sm animate-shimmer",style:{height:`${A.height}px`}},z))})})},[]),J=({scale:v,positionX:A,positionY:z,instance:U,resetTransform:B,mapBgUrl:Z})=>{const et=U?.contentComponent?.offsetWidth||1e3,lt=U?.contentComponent?.offsetHeight||1e3,le=U?.wrapperComponent?.offsetWidth||1e3,Qe=U?.wrapperComponent?.offsetHeight||1e3,cl=et*v,Xl=lt*v,Xe=Math.min(100,le/cl*100),na=Math.min(100,Qe/Xl*100),Ga=-A/cl*100,yi=-z/Xl*100,Jn=Math.max(0,Math.min(100-Xe,Ga)),Va=Math.max(0,Math.min(100-na,yi)),Ka=et/lt,ol=v>1.01;return T.jsxs("div",{className:"absolute bottom-6 right-6 z-[100] flex flex-col items-end gap-2 animate-in fade-in slide-in-from-bottom-4 duration-300 pointer-events-auto",children:[T.jsxs("div",{className:`bg-gray-900/90 backdrop-blur-md border border-white/10 p-1 rounded-lg shadow-2xl ring-1 ring-black/50 overflow-hidden w-40 relative group ${ol?"cursor-pointer":"cursor-default"}`,style:{aspectRatio:`${Ka}`},onClick:gi=>{gi.stopPropagation(),ol&&B()},children:[T.jsx("img",{src:Z,className:"w-full h-full object-cover opacity-60",alt:"Minimap"}),T.jsx("div",{className:"absolute border-2 border-indigo-400 bg-indigo-500/30 shadow-[0_0_10px_rgba(99,102,241,0.6)] pointer-events-none transition-all duration-75 ease-linear box-border z-10",style:{width:`${Xe}%`,height:`${na}%`,left:`${Jn}%`,top:`${Va}%`,opacity:ol?1:.5}}),ol&&T.jsx("div",{className:"absolute inset-0 flex items-center justify-center bg-black/60 opacity-0 group-hover:opacity-100 transition-opacity duration-200 text-white font-medium text-xs backdrop-blur-[1px] pointer-events-none z-20",children:"Click to Reset"})]}),T.jsxs("div",{className:"bg-gray-900/90 backdrop-blur-md border border-white/10 px-2 py-1 rounded text-[10px] text-gray-400 font-mono shadow-lg",children:[Math.round(v*100),"%"]})]})},ft=$.useCallback(v=>{v?.stopPropagation();const A=i.findIndex(z=>z.filename===b?.filename&&z.subfolder===b?.subfolder);A!==-1&&A<i.length-1&&g(i[A+1])},[i,b]),dt=$.useCallback(v=>{v?.stopPropagation();const A=i.findIndex(z=>z.filename===b?.filename&&z.subfolder===b?.subfolder);A>0&&g(i[A-1])},[i,b]);$.useEffect(()=>{const v=A=>{b&&(A.key==="ArrowRight"&&ft(A),A.key==="ArrowLeft"&&dt(A),A.key==="Escape"&&g(null))};return window.addEventListener("keydown",v),()=>window.removeEventListener("keydown",v)},[b,ft,dt]);const r=$.useCallback(()=>T.jsx("div",{className:"flex flex-col gap-3 max-w-5xl mx-auto w-full animate-pulse",children:Array.from({length:10}).map((v,A)=>T.jsxs("div",{className:"flex items-center gap-4 p-3 bg-gray-900/40 border border-gray-800/60 rounded-xl",children:[T.jsx("div",{className:"w-16 h-16 rounded-lg bg-gray-800 shrink-0"}),T.jsxs("div",{className:"flex-1 min-w-0 space-y-2",children:[T.jsx("div",{className:"h-4 bg-gray-800 rounded w-1/3"}),T.jsxs("div",{className:"flex items-center gap-3",children:[T.jsx("div",{className:"h-3 bg-gray-800 rounded w-16"}),T.jsx("div",{className:"h-3 bg-gray-800 rounded w-8"}),T.jsx("div",{className:"h-3 bg-gray-800 rounded w-20"})]})]})]},A))}),[]);return T.jsxs("div",{className:"flex h-screen bg-gray-950 text-white font-sans overflow-hidden selection:bg-indigo-500/30",children:[T.jsxs("div",{className:"w-72 bg-gray-900/50 border-r border-gray-800 hidden md:flex flex-col shrink-0 backdrop-blur-sm",children:[T.jsx("div",{className:"p-6 border-b border-gray-800/50",children:T.jsxs("h1",{className:"text-2xl font-bold flex items-center gap-3 tracking-tight bg-gradient-to-r from-blue-400 to-indigo-400 bg-clip-text text-transparent",children:[T.jsx(qc,{className:"w-6 h-6 text-indigo-400"}),"Gallery"]})}),T.jsxs("div",{className:"flex-1 overflow-y-auto custom-scrollbar p-4",children:[T.jsxs("div",{className:"relative mb-6",children:[T.jsx(lp,{className:"absolute left-3 top-1/2 -translate-y-1/2 w-4 h-4 text-gray-500"}),T.jsx("input",{type:"text",placeholder:"Search files...",className:"w-full bg-gray-800/50 border border-gray-700 rounded-lg pl-9 pr-3 py-2 text-sm focus:outline-none focus:border-indigo-500 focus:ring-1 focus:ring-indigo-500 transition-all",value:tt,onChange:v=>nt(v.target.value)})]}),T.jsxs("div",{className:"grid grid-cols-2 gap-3 mb-6",children:[T.jsxs("div",{className:"bg-gray-800/30 rounded-xl p-3 border border-gray-800",children:[T.jsx("div",{className:"text-[10px] font-medium text-gray-500 uppercase tracking-wider mb-1",children:"Total Files"}),T.jsx("div",{className:"text-xl font-bold text-white",children:O})]}),T.jsxs("div",{className:"bg-gray-800/30 rounded-xl p-3 border border-gray-800",children:[T.jsx("div",{className:"text-[10px] font-medium text-gray-500 uppercase tracking-wider mb-1",children:"Folders"}),T.jsx("div",{className:"text-xl font-bold text-white",children:c.length+1})]})]}),T.jsxs("div",{children:[T.jsxs("div",{className:"text-xs font-semibold text-gray-500 uppercase tracking-wider mb-3 px-1 flex items-center justify-between",children:[T.jsx("span",{children:"Navigation"}),T.jsx("span",{className:"text-[10px] bg-gray-800 px-1.5 py-0.5 rounded text-gray-400",children:c.length})]}),T.jsx("nav",{className:"space-y-1",children:T.jsx(Sy,{folders:c,activeFolder:m,onFolderSelect:h})})]})]}),T.jsx("div",{className:"p-4 border-t border-gray-800/50 text-xs text-gray-600 text-center font-medium",children:"ComfyUI Gallery Extension v1.0"})]}),T.jsxs("div",{className:"flex-1 flex flex-col h-full overflow-hidden relative bg-gray-950/50",children:[T.jsxs("div",{className:"h-16 border-b border-gray-800/50 bg-gray-900/30 backdrop-blur-md flex items-center px-6 justify-between shrink-0 z-10 sticky top-0",children:[T.jsxs("div",{className:"flex items-center gap-4",children:[T.jsx("h2",{className:"font-semibold text-lg flex items-center gap-2 text-white",children:m?T.jsxs(T.Fragment,{children:[T.jsx(Mm,{className:"w-5 h-5 text-indigo-400"}),T.jsx("span",{children:m})]}):T.jsxs(T.Fragment,{children:[T.jsx(Dm,{className:"w-5 h-5 text-indigo-400"}),T.jsx("span",{children:"Latest Outputs"})]})}),T.jsx("div",{className:"h-4 w-px bg-gray-700"}),T.jsxs("span",{className:"text-sm text-gray-400",children:[Ot.length," items"]})]}),T.jsxs("div",{className:"flex items-center gap-2 bg-gray-800/50 p-1 rounded-lg border border-gray-700/50",children:[Q==="grid"&&T.jsxs("div",{className:"flex items-center mr-2 border-r border-gray-700/50 pr-2",children:[T.jsx("button",{onClick:()=>Jt(Math.max(2,vt-1)),className:"p-1.5 text-gray-400 hover:text-white hover:bg-gray-700 rounded transition-all",title:"Decrease Columns",children:T.jsx("svg",{width:"16",height:"16",viewBox:"0 0 24 24",fill:"none",stroke:"currentColor",strokeWidth:"2",strokeLinecap:"round",strokeLinejoin:"round",children:T.jsx("path",{d:"M5 12h14"})})}),T.jsx("span",{className:"text-xs font-mono text-gray-500 w-6 text-center",children:vt}),T.jsx("button",{onClick:()=>Jt(Math.min(12,vt+1)),className:"p-1.5 text-gray-400 hover:text-white hover:bg-gray-700 rounded transition-all",title:"Increase Columns",children:T.jsxs("svg",{width:"16",height:"16",viewBox:"0 0 24 24",fill:"none",stroke:"currentColor",strokeWidth:"2",strokeLinecap:"round",strokeLinejoin:"round",children:[T.jsx("path",{d:"M5 12h14"}),T.jsx("path",{d:"M12 5v14"})]})})]}),T.jsx("div",{className:"flex items-center mr-2 border-r border-gray-700/50 pr-2",children:T.jsxs("select",{value:Et,onChange:v=>qt(v.target.value),className:"bg-transparent text-xs text-gray-400 font-medium focus:outline-none hover:text-white cursor-pointer border-none p-1 rounded hover:bg-gray-700",title:"Max Image Height",children:[T.jsx("option",{value:"none",className:"bg-gray-800",children:"Default"}),T.jsx("option",{value:"100vh",className:"bg-gray-800",children:"100% Screen"}),T.jsx("option",{value:"80vh",className:"bg-gray-800",children:"80% Screen"}),T.jsx("option",{value:"60vh",className:"bg-gray-800",children:"60% Screen"}),T.jsx("option",{value:"40vh",className:"bg-gray-800",children:"40% Screen"}),T.jsx("option",{value:"500px",className:"bg-gray-800",children:"500px"}),T.jsx("option",{value:"300px",className:"bg-gray-800",children:"300px"}),T.jsx("option",{value:"200px",className:"bg-gray-800",children:"200px"}),T.jsx("option",{value:"128px",className:"bg-gray-800",children:"128px"}),T.jsx("option",{value:"64px",className:"bg-gray-800",children:"64px"})]})}),T.jsx("button",{onClick:()=>K("grid"),className:`p-1.5 rounded transition-all ${Q==="grid"?"bg-gray-700 text-white shadow-sm":"text-gray-400 hover:text-white"}`,title:"Grid View",children:T.jsx(k0,{className:"w-4 h-4"})}),T.jsx("button",{onClick:()=>K("list"),className:`p-1.5 rounded transition-all ${Q==="list"?"bg-gray-700 text-white shadow-sm":"text-gray-400 hover:text-white"}`,title:"List View",children:T.jsx(P0,{className:"w-4 h-4"})})]})]}),T.jsxs("div",{id:"scrollableDiv",className:"flex-1 overflow-y-auto p-4 md:p-8 custom-scrollbar bg-gradient-to-br from-gray-950 to-gray-900",children:[T.jsx(A0,{dataLength:i.length,next:St,hasMore:p,scrollThreshold:.5,loader:T.jsx("div",{className:"w-full mt-1",children:Q==="grid"?T.jsx(X,{}):T.jsx(r,{})}),scrollableTarget:"scrollableDiv",className:"pb-20",children:Q==="grid"?T.jsxs("div",{className:"w-full flex flex-col gap-1",children:[i.length===0&&H&&T.jsx(X,{}),T.jsx(Gc,{breakpointCols:D,className:"my-masonry-grid flex w-full gap-1",columnClassName:"my-masonry-grid_column flex flex-col gap-1",children:i.map((v,A)=>{const z=v.filename.split(".").pop().toLowerCase(),U=(v.format||z).toLowerCase(),B=["png","jpg","jpeg","webp","gif","svg"].includes(U),Z=["mp4","webm","mov","avi","mkv"].includes(U),et=parseInt(v.width)||800,le=(parseInt(v.height)||600)/et;return B?T.jsx(wt,{src:L(v,"thumbnail"),alt:v.filename,aspectRatio:le,onClick:()=>g(v),maxHeight:Et},`${v.filename}-${A}`):T.jsx("div",{className:"relative group cursor-pointer bg-gray-900 overflow-hidden rounded-sm",style:{aspectRatio:`${1/le}`,maxHeight:Et!=="none"?Et:void 0},onClick:()=>g(v),children:T.jsxs("div",{className:"absolute inset-0 w-full h-full flex flex-col items-center justify-center text-gray-500 bg-gray-800 hover:bg-gray-700 transition-colors",children:[Z?T.jsx(gm,{className:"w-8 h-8 mb-2 opacity-50 group-hover:opacity-100 transition-opacity"}):T.jsx(qc,{className:"w-8 h-8 mb-2 opacity-50 group-hover:opacity-100 transition-opacity"}),T.jsx("span",{className:"text-[10px] font-mono uppercase opacity-50",children:U})]})},`${v.filename}-${A}`)})})]}):T.jsxs("div",{className:"flex flex-col gap-3 max-w-5xl mx-auto",children:[i.length===0&&H&&T.jsx(r,{}),Ot.map((v,A)=>{const z=["png","jpg","jpeg","webp","gif"].includes(v.format.toLowerCase());return T.jsxs("div",{className:"group flex items-center gap-4 p-3 bg-gray-900/40 border border-gray-800/60 rounded-xl hover:bg-gray-800/60 hover:border-indigo-500/30 transition-all cursor-pointer",onClick:()=>g(v),children:[T.jsx("div",{className:`rounded-lg overflow-hidden bg-gray-800 shrink-0 ${Et==="none"?"w-16 h-16":"flex items-center justify-center"}`,style:Et!=="none"?{height:Et}:{},children:z?T.jsx("img",{src:L(v,"thumbnail"),alt:v.filename,className:`object-cover ${Et==="none"?"w-full h-full":"h-full w-auto max-w-none"}`,loading:"lazy"}):T.jsx("div",{className:`flex items-center justify-center text-gray-500 ${Et==="none"?"w-full h-full":"h-full w-16"}`,children:T.jsx(gm,{className:"w-6 h-6"})})}),T.jsxs("div",{className:"flex-1 min-w-0",children:[T.jsx("h3",{className:"font-medium text-gray-200 truncate group-hover:text-indigo-300 transition-colors",children:v.filename}),T.jsxs("div",{className:"flex items-center gap-3 mt-1 text-xs text-gray-500",children:[T.jsxs("span",{className:"flex items-center gap-1",children:[T.jsx(Vc,{className:"w-3 h-3"})," ",v.subfolder||"Root"]}),T.jsx("span",{className:"uppercase bg-gray-800 px-1.5 py-0.5 rounded text-[10px] font-mono",children:v.format}),T.jsx("span",{children:new Date(v.date*1e3).toLocaleDateString()}),v.width>0&&T.jsxs("span",{className:"bg-gray-800 px-1.5 py-0.5 rounded text-[10px]",children:[v.width,"x",v.height]})]})]}),T.jsx("button",{onClick:U=>zt(U,v),className:"p-2 text-gray-400 hover:text-white hover:bg-gray-700 rounded-lg transition-colors opacity-0 group-hover:opacity-100",children:T.jsx(ym,{className:"w-5 h-5"})})]},`${v.filename}-${A}`)})]})}),!p&&i.length>0&&T.jsxs("div",{className:"flex flex-col items-center justify-center py-16 text-gray-600 gap-3",children:[T.jsx("div",{className:"w-12 h-1 bg-gray-800 rounded-full"}),T.jsx("span",{className:"text-xs uppercase tracking-widest font-medium",children:"End of gallery"})]}),i.length===0&&!H&&T.jsxs("div",{className:"flex flex-col items-center justify-center h-[60vh] text-gray-500 animate-in fade-in duration-700",children:[T.jsx("div",{className:"bg-gray-800/30 p-8 rounded-full mb-6 ring-1 ring-gray-700/50",children:T.jsx(qc,{className:"w-20 h-20 text-gray-700"})}),T.jsx("h3",{className:"text-2xl font-semibold text-gray-300 mb-2",children:"No content found"}),T.jsx("p",{className:"text-sm text-gray-500 max-w-xs text-center",children:m?`The folder "${m}" appears to be empty.`:"Your output directory is empty. Generate some images to see them here!"})]})]})]}),b&&T.jsxs("div",{className:"fixed inset-0 z-50 flex items-center justify-center bg-black/98 backdrop-blur-xl animate-in fade-in duration-300",onClick:()=>g(null),children:[T.jsx("button",{className:"absolute left-6 top-1/2 -translate-y-1/2 z-50 p-4 bg-white/5 hover:bg-white/10 rounded-full text-white/50 hover:text-white transition-all backdrop-blur-md border border-white/5",onClick:dt,children:T.jsx(L0,{className:"w-8 h-8"})}),T.jsx("button",{className:"absolute right-6 top-1/2 -translate-y-1/2 z-50 p-4 bg-white/5 hover:bg-white/10 rounded-full text-white/50 hover:text-white transition-all backdrop-blur-md border border-white/5",onClick:ft,children:T.jsx(Om,{className:"w-8 h-8"})}),T.jsxs("div",{className:"relative w-full h-full flex flex-col items-center justify-center",onClick:v=>v.stopPropagation(),children:[T.jsx("button",{className:"absolute top-6 right-6 z-50 p-3 bg-white/5 hover:bg-white/10 rounded-full text-white/70 hover:text-white transition-all hover:rotate-90 duration-300 backdrop-blur-md border border-white/5",onClick:()=>g(null),children:T.jsx(np,{className:"w-6 h-6"})}),T.jsx("div",{className:"flex-1 flex items-center justify-center w-full h-full overflow-hidden relative",children:["png","jpg","jpeg","webp","gif"].includes(b.format.toLowerCase())?T.jsx(py,{initialScale:1,minScale:.5,maxScale:8,centerOnInit:!0,disabled:!it,wheel:{disabled:!it},pinch:{disabled:!it},doubleClick:{disabled:!it},children:({state:v,instance:A,resetTransform:z})=>T.jsxs(T.Fragment,{children:[T.jsx(by,{wrapperStyle:{width:"100%",height:"100%"},contentStyle:{width:"100%",height:"100%",display:"flex",alignItems:"center",justifyContent:"center"},children:T.jsx(Vt,{src:it?L(b,"original"):L(b,"preview"),alt:b.filename,className:"w-full h-full object-contain shadow-2xl rounded-sm",style:{width:"100%",height:"100%"}})}),T.jsx(J,{scale:v?.scale??1,positionX:v?.positionX??0,positionY:v?.positionY??0,instance:A,resetTransform:z,mapBgUrl:b?L(b,"preview"):""})]})}):T.jsx("video",{src:L(b,"original"),controls:!0,autoPlay:!0,className:"max-w-full max-h-full shadow-2xl bg-black rounded-sm"})}),T.jsxs("div",{className:"mt-8 w-full max-w-3xl bg-gray-900/80 backdrop-blur-xl border border-white/10 rounded-2xl px-8 py-5 flex items-center justify-between shadow-2xl animate-in slide-in-from-bottom-8 duration-500 ring-1 ring-white/5 z-50",children:[T.jsxs("div",{className:"flex flex-col overflow-hidden mr-8",children:[T.jsx("span",{className:"font-semibold text-white truncate text-lg tracking-tight",children:b.filename}),T.jsxs("span",{className:"text-sm text-gray-400 truncate flex items-center gap-3 mt-1",children:[T.jsxs("span",{className:"flex items-center gap-1.5",children:[T.jsx(Vc,{className:"w-3.5 h-3.5"})," ",b.subfolder||"Output Root"]}),T.jsx("span",{className:"w-1 h-1 bg-gray-600 rounded-full"}),T.jsx("span",{className:"uppercase font-mono text-xs bg-gray-800 px-1.5 py-0.5 rounded text-gray-300",children:b.format}),b.width>0&&T.jsxs(T.Fragment,{children:[T.jsx("span",{className:"w-1 h-1 bg-gray-600 rounded-full"}),T.jsxs("span",{className:"font-mono text-xs text-gray-300",children:[b.width,"x",b.height]})]}),T.jsx("span",{className:"w-1 h-1 bg-gray-600 rounded-full"}),T.jsx("span",{children:new Date(b.date*1e3).toLocaleString()})]})]}),T.jsxs("div",{className:"flex items-center gap-4 shrink-0",children:[!it&&["png","jpg","jpeg","webp","gif"].includes(b.format.toLowerCase())&&T.jsxs("button",{onClick:()=>F(!0),className:"group flex items-center gap-2 px-4 py-2.5 bg-gray-800 hover:bg-gray-700 border border-gray-700 rounded-xl text-white font-medium transition-all",children:[T.jsx(ip,{className:"w-4 h-4"}),"Load Original"]}),T.jsx("div",{className:"h-10 w-px bg-gray-700/50 mx-2"}),T.jsxs("button",{onClick:v=>zt(v,b),className:"group flex items-center gap-2 px-5 py-2.5 bg-indigo-600 hover:bg-indigo-500 rounded-xl text-white font-medium transition-all active:scale-95 shadow-lg shadow-indigo-900/20 hover:shadow-indigo-900/40",children:[T.jsx(ym,{className:"w-4 h-4 group-hover:-translate-y-0.5 transition-transform"}),"Download"]})]})]})]})]})]})}T0.createRoot(document.getElementById("root")).render(T.jsx($.StrictMode,{children:T.jsx(Ey,{})}));
+`,Cm={wrapper:"transform-component-module_wrapper__SPB86",content:"transform-component-module_content__FBWxo"};yy(gy);var by=function(i){var s=i.children,c=i.wrapperClass,f=c===void 0?"":c,m=i.contentClass,h=m===void 0?"":m,p=i.wrapperStyle,E=i.contentStyle,b=i.wrapperProps,g=b===void 0?{}:b,O=i.contentProps,j=O===void 0?{}:O,H=$.useContext(to),q=H.init,Q=H.cleanupWindowEvents,K=$.useRef(null),tt=$.useRef(null);return $.useEffect(function(){var nt=K.current,it=tt.current;return nt!==null&&it!==null&&q&&q?.(nt,it),function(){Q?.()}},[]),Ue.createElement("div",Rl({},g,{ref:K,className:"".concat(Jc.wrapperClass," ").concat(Cm.wrapper," ").concat(f),style:p}),Ue.createElement("div",Rl({},j,{ref:tt,className:"".concat(Jc.contentClass," ").concat(Cm.content," ").concat(h),style:E}),s))};const Ty=i=>{if(!i||i.encoding!=="columnar")return i||[];const s=new Array(i.count),c=Object.keys(i.columns);for(let f=0;f<i.count;f++){const m={...i.constants};for(const h of c){const p=i.columns[h][f];m[h]=h==="subfolder"?i.subfolders[p]:p}s[f]=m}return s},Sy=({folders:i,activeFolder:s,onFolderSelect:c})=>{const[f,m]=$.useState({}),p=(g=>{const O={};return g.forEach(j=>{const H=j.split("/");let q=O;H.forEach((Q,K)=>{q[Q]||(q[Q]={name:Q,path:H.slice(0,K+1).join("/"),children:{},isLeaf:K===H.length-1}),q=q[Q].children})}),O})(i),E=g=>{m(O=>({...O,[g]:!O[g]}))},b=(g,O=0)=>{const j=Object.keys(g.children).length>0,H=f[g.path],q=s===g.path;return T.jsxs("div",{children:[T.jsxs("button",{onClick:()=>{j&&E(g.path),c(g.path)},className:`w-full flex items-center gap-2 px-3 py-1.5 text-sm font-medium rounded-lg transition-all duration-200 group ${q?"bg-indigo-600/10 text-indigo-400 border border-indigo-500/20":"text-gray-400 hover:bg-gray-800/50 hover:text-white border border-transparent"}`,style:{paddingLeft:`${O*12+12}px`},children:[j&&T.jsx("span",{onClick:Q=>{Q.stopPropagation(),E(g.path)},className:"p-0.5 hover:bg-gray-700 rounded",children:H?T.jsx(B0,{className:"w-3 h-3"}):T.jsx(Om,{className:"w-3 h-3"})}),!j&&T.jsx("span",{className:"w-4"})," ",q?T.jsx(Mm,{className:"w-4 h-4 text-indigo-400 shrink-0"}):T.jsx(Vc,{className:"w-4 h-4 text-gray-500 group-hover:text-white shrink-0"}),T.jsx("span",{className:"truncate",title:g.name,children:g.name})]}),H&&j&&T.jsx("div",{className:"border-l border-gray-800 ml-4 mt-1",children:Object.values(g.children).map(Q=>b(Q,O+1))})]},g.path)};return T.jsxs("div",{className:"space-y-0.5",children:[T.jsxs("button",{onClick:()=>c(""),className:`w-full flex items-center gap-3 px-3 py-2.5 text-sm font-medium rounded-lg transition-all duration-200 group ${s===""?"bg-indigo-600/10 text-indigo-400 border border-indigo-500/20":"text-gray-400 hover:bg-gray-800/50 hover:text-white border border-transparent"}`,children:[T.jsx(Dm,{className:`w-4 h-4 ${s===""?"text-indigo-400":"text-gray-500 group-hover:text-white"}`}),"All Outputs"]}),Object.values(p).map(g=>b(g))]})};function Ey(){const[i,s]=$.useState([]),[c,f]=$.useState([]),[m,h]=$.useState(""),[p,E]=$.useState(!0),[b,g]=$.useState(null),[O,j]=$.useState(0),[H,q]=$.useState(!0),[Q,K]=$.useState("grid"),[tt,nt]=$.useState(""),[it,F]=$.useState(!1);$.useEffect(()=>{F(!1)},[b?.filename,b?.subfolder]);const ht=$.useRef(null),bt=async(v,A,z)=>{ht.current&&ht.current.abort();const U=new AbortController;ht.current=U;try{const B=`/web/gallery/list?skip=${v}&limit=${A}&folder=${encodeURIComponent(z)}&format=compact`,Z=await fetch(B,{signal:U.signal});if(!Z.ok)throw new Error("Failed to fetch files");const et=await Z.json();return et.files=Ty(et.files),et}catch(B){return B.name==="AbortError"?(console.log("Fetch aborted"),null):(console.error("Error fetching files:",B),{files:[],total:0})}finally{ht.current===U&&(ht.current=null)}},St=$.useCallback(async()=>{if(!H){if(O>0&&i.length>=O){E(!1);return}q(!0);try{const A=i.length,z=await bt(A,50,m);if(!z)return;!z.files||z.files.length===0?E(!1):(s(U=>{const B=z.files.filter(Z=>!U.some(et=>et.filename===Z.filename&&et.subfolder===Z.subfolder));return[...U,...B]}),j(z.total),i.length+z.files.length>=z.total&&E(!1))}catch(v){console.error("Load more error:",v)}finally{q(!1)}}},[i.length,m,H,O]);$.useEffect(()=>{let v=!0;return s([]),E(!0),j(0),q(!0),(async()=>{try{const z=await bt(0,50,m);if(!v)return;z&&z.files&&(s(z.files),j(z.total),E(z.files.length<z.total))}catch(z){console.error("Initial load error:",z)}finally{v&&q(!1)}})(),()=>{v=!1,ht.current&&ht.current.abort()}},[m]);const Ab=$.useRef(`gallery-${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`),Ag=$.useRef(m),Ax=$.useRef(i),[Aj,Ak]=$.useState(!1);$.useEffect(()=>{Ag.current=m},[m]),$.useEffect(()=>{Ax.current=i},[i]);const Aq=$.useCallback(v=>{if(!v||v.folder!==Ag.current)return;const A=B=>`${B.subfolder}/${B.filename}`,z=new Set(v.removed.map(A)),U=new Map(v.modified.map(B=>[A(B),B])),Ay=new Set(Ax.current.map(A)),Aw=new Set(v.added.map(A).filter(B=>!Ay.has(B)||z.has(B))).size;s(B=>{const Z=B.filter(et=>!z.has(A(et))).map(et=>U.get(A(et))||et),et=new Set(Z.map(A));return[...v.added.filter(lt=>!et.has(A(lt))).sort((lt,le)=>le.date-lt.date),...Z]}),j(B=>Math.max(0,B+Aw-v.removed.length))},[]);$.useEffect(()=>{let v=null,A=!1,z=null;const U=()=>{const B=window.location.protocol==="https:"?"wss":"ws";v=new WebSocket(`${B}://${window.location.host}/ws?clientId=${Ab.current}`),v.onopen=()=>Ak(!0),v.onclose=()=>{Ak(!1),A||(z=setTimeout(U,3e3))},v.onmessage=Z=>{if(typeof Z.data=="string")try{const et=JSON.parse(Z.data);et.type==="web_gallery.changes"&&Aq(et.data)}catch(et){console.error("Bad websocket message:",et)}}};return U(),()=>{A=!0,clearTimeout(z),v&&v.close()}},[Aq]),$.useEffect(()=>{Aj&&fetch("/web/gallery/subscribe",{method:"POST",headers:{"Content-Type":"application/json"},body:JSON.stringify({client_id:Ab.current,folder:m})}).catch(console.error)},[Aj,m]),$.useEffect(()=>{fetch("/web/gallery/folders").then(v=>v.json()).then(v=>{v.folders&&f(v.folders)}).catch(console.error)},[]);const L=(v,A="original")=>{if(!v)return"";const z=new URLSearchParams;return z.append("filename",v.filename),v.subfolder&&z.append("subfolder",v.subfolder),z.append("type",v.type||"output"),A==="thumbnail"||A==="preview"?(v.format&&z.append("format",v.format),A==="preview"&&z.append("size","preview"),`/web/gallery/thumbnail?${z.toString()}`):`/view?${z.toString()}`},Tz=v=>[200,400,800].map(A=>`${L(v,"thumbnail")}&w=${A} ${A}w`).join(", "),zt=(v,A)=>{v.stopPropagation();const z=document.createElement("a");z.href=L(A,"original"),z.download=A.filename,document.body.appendChild(z),z.click(),document.body.removeChild(z)},Ot=i.filter(v=>v.filename.toLowerCase().includes(tt.toLowerCase())),Vt=({src:v,alt:A,className:z,style:U,onLoad:B})=>{const[Z,et]=$.useState(!1);return $.useEffect(()=>{et(!1)},[v]),T.jsxs("div",{className:"w-full h-full flex items-center justify-center relative",children:[!Z&&T.jsxs("div",{className:"absolute inset-0 flex items-center justify-center pointer-events-none z-10",children:[T.jsx("div",{className:"w-full h-full bg-gray-900/50 animate-shimmer absolute inset-0 rounded-sm"}),T.jsx("div",{className:"w-16 h-16 bg-gray-900/80 backdrop-blur-md rounded-2xl flex items-center justify-center shadow-2xl border border-white/10 ring-1 ring-black/50 z-20",children:T.jsx(tp,{className:"w-8 h-8 text-indigo-400 animate-spin"})})]}),T.jsx("img",{src:v,alt:A,className:`${z} transition-opacity duration-300 ${Z?"opacity-100":"opacity-0"}`,style:U,onLoad:()=>{et(!0),B?.()}})]})},wt=({src:v,srcSet:ut,sizes:ht,alt:A,aspectRatio:z,onClick:U,maxHeight:B,placeholder:lt,color:le})=>{const[Z,et]=$.useState(!1);return T.jsxs("div",{className:"relative w-full overflow-hidden bg-gray-900 cursor-pointer group",style:{aspectRatio:`${1/z}`,maxHeight:B!=="none"?B:void 0,backgroundColor:le||void 0},onClick:U,children:[!Z&&(lt?T.jsx("img",{src:lt,alt:"","aria-hidden":"true",className:"absolute inset-0 w-full h-full object-cover blur-md scale-110"}):T.jsx("div",{className:"absolute inset-0 bg-gray-800 animate-shimmer"})),T.jsx("img",{src:v,srcSet:ut,sizes:ht,alt:A,className:`absolute inset-0 w-full h-full object-cover transition-opacity duration-500 ${Z?"opacity-100":"opacity-0"}`,loading:"lazy",onLoad:()=>et(!0)}),T.jsx("div",{className:"absolute inset-0 bg-black/0 group-hover:bg-black/10 transition-colors duration-200"})]})},[vt,Jt]=$.useState(()=>{const v=localStorage.getItem("gallery_column_count");return v?parseInt(v):6}),[Et,qt]=$.useState(()=>localStorage.getItem("gallery_max_image_height")||"none");$.useEffect(()=>{localStorage.setItem("gallery_column_count",vt)},[vt]),$.useEffect(()=>{localStorage.setItem("gallery_max_image_height",Et)},[Et]);const D={default:vt,1536:Math.min(vt,5),1280:Math.min(vt,4),1024:Math.min(vt,3),768:Math.min(vt,2)},X=$.useCallback(()=>{const v=Array.from({length:40}).map((A,z)=>{const U=[200,300,400,250,350,280,320,380,220,260];return{height:U[z%U.length]}});return T.jsx("div",{className:"w-full flex gap-1",children:T.jsx(Gc,{breakpointCols:D,className:"my-masonry-grid flex w-full gap-1",columnClassName:"my-masonry-grid_column flex flex-col gap-1",children:v.map((A,z)=>T.jsx("div",{className:"w-full bg-gray-800 rounded-sm animate-shimmer",style:{height:`${A.height}px`}},z))})})},[]),J=({scale:v,positionX:A,positionY:z,instance:U,resetTransform:B,mapBgUrl:Z})=>{const et=U?.contentComponent?.offsetWidth||1e3,lt=U?.contentComponent?.offsetHeight||1e3,le=U?.wrapperComponent?.offsetWidth||1e3,Qe=U?.wrapperComponent?.offsetHeight||1e3,cl=et*v,Xl=lt*v,Xe=Math.min(100,le/cl*100),na=Math.min(100,Qe/Xl*100),Ga=-A/cl*100,yi=-z/Xl*100,Jn=Math.max(0,Math.min(100-Xe,Ga)),Va=Math.max(0,Math.min(100-na,yi)),Ka=et/lt,ol=v>1.01;return T.jsxs("div",{className:"absolute bottom-6 right-6 z-[100] flex flex-col items-end gap-2 animate-in fade-in slide-in-from-bottom-4 duration-300 pointer-events-auto",children:[T.jsxs("div",{className:`bg-gray-900/90 backdrop-blur-md border border-white/10 p-1 rounded-lg shadow-2xl ring-1 ring-black/50 overflow-hidden w-40 relative group ${ol?"cursor-pointer":"cursor-default"}`,style:{aspectRatio:`${Ka}`},onClick:gi=>{gi.stopPropagation(),ol&&B()},children:[T.jsx("img",{src:Z,className:"w-full h-full object-cover opacity-60",alt:"Minimap"}),T.jsx("div",{className:"absolute border-2 border-indigo-400 bg-indigo-500/30 shadow-[0_0_10px_rgba(99,102,241,0.6)] pointer-events-none transition-all duration-75 ease-linear box-border z-10",style:{width:`${Xe}%`,height:`${na}%`,left:`${Jn}%`,top:`${Va}%`,opacity:ol?1:.5}}),ol&&T.jsx("div",{className:"absolute inset-0 flex items-center justify-center bg-black/60 opacity-0 group-hover:opacity-100 transition-opacity duration-200 text-white font-medium text-xs backdrop-blur-[1px] pointer-events-none z-20",children:"Click to Reset"})]}),T.jsxs("div",{className:"bg-gray-900/90 backdrop-blur-md border border-white/10 px-2 py-1 rounded text-[10px] text-gray-400 font-mono shadow-lg",children:[Math.round(v*100),"%"]})]})},ft=$.useCallback(v=>{v?.stopPropagation();const A=i.findIndex(z=>z.filename===b?.filename&&z.subfolder===b?.subfolder);A!==-1&&A<i.length-1&&g(i[A+1])},[i,b]),dt=$.useCallback(v=>{v?.stopPropagation();const A=i.findIndex(z=>z.filename===b?.filename&&z.subfolder===b?.subfolder);A>0&&g(i[A-1])},[i,b]);$.useEffect(()=>{const v=A=>{b&&(A.key==="ArrowRight"&&ft(A),A.key==="ArrowLeft"&&dt(A),A.key==="Escape"&&g(null))};return window.addEventListener("keydown",v),()=>window.removeEventListener("keydown",v)},[b,ft,dt]),$.useEffect(()=>{if(!b)return;const v=i.findIndex(z=>z.filename===b.filename&&z.subfolder===b.subfolder),A=[i[v+1],i[v-1]].filter(z=>z&&["png","jpg","jpeg","webp","gif"].includes((z.format||"").toLowerCase())).map(z=>{const U=new Image;return U.src=`${L(z,"preview")}&priority=prefetch`,U});return()=>A.forEach(z=>{z.src=""})},[b,i]);const r=$.useCallback(()=>T.jsx("div",{className:"flex flex-col gap-3 max-w-5xl mx-auto w-full animate-pulse",children:Array.from({length:10}).map((v,A)=>T.jsxs("div",{className:"flex items-center gap-4 p-3 bg-gray-900/40 border border-gray-800/60 rounded-xl",children:[T.jsx("div",{className:"w-16 h-16 rounded-lg bg-gray-800 shrink-0"}),T.jsxs("div",{className:"flex-1 min-w-0 space-y-2",children:[T.jsx("div",{className:"h-4 bg-gray-800 rounded w-1/3"}),T.jsxs("div",{className:"flex items-center gap-3",children:[T.jsx("div",{className:"h-3 bg-gray-800 rounded w-16"}),T.jsx("div",{className:"h-3 bg-gray-800 rounded w-8"}),T.jsx("div",{className:"h-3 bg-gray-800 rounded w-20"})]})]})]},A))}),[]);return T.jsxs("div",{className:"flex h-screen bg-gray-950 text-white font-sans overflow-hidden selection:bg-indigo-500/30",children:[T.jsxs("div",{className:"w-72 bg-gray-900/50 border-r border-gray-800 hidden md:flex flex-col shrink-0 backdrop-blur-sm",children:[T.jsx("div",{className:"p-6 border-b border-gray-800/50",children:T.jsxs("h1",{className:"text-2xl font-bold flex items-center gap-3 tracking-tight bg-gradient-to-r from-blue-400 to-indigo-400 bg-clip-text text-transparent",children:[T.jsx(qc,{className:"w-6 h-6 text-indigo-400"}),"Gallery"]})}),T.jsxs("div",{className:"flex-1 overflow-y-auto custom-scrollbar p-4",children:[T.jsxs("div",{className:"relative mb-6",children:[T.jsx(lp,{className:"absolute left-3 top-1/2 -translate-y-1/2 w-4 h-4 text-gray-500"}),T.jsx("input",{type:"text",placeholder:"Search files...",className:"w-full bg-gray-800/50 border border-gray-700 rounded-lg pl-9 pr-3 py-2 text-sm focus:outline-none focus:border-indigo-500 focus:ring-1 focus:ring-indigo-500 transition-all",value:tt,onChange:v=>nt(v.target.value)})]}),T.jsxs("div",{className:"grid grid-cols-2 gap-3 mb-6",children:[T.jsxs("div",{className:"bg-gray-800/30 rounded-xl p-3 border border-gray-800",children:[T.jsx("div",{className:"text-[10px] font-medium text-gray-500 uppercase tracking-wider mb-1",children:"Total Files"}),T.jsx("div",{className:"text-xl font-bold text-white",children:O})]}),T.jsxs("div",{className:"bg-gray-800/30 rounded-xl p-3 border border-gray-800",children:[T.jsx("div",{className:"text-[10px] font-medium text-gray-500 uppercase tracking-wider mb-1",children:"Folders"}),T.jsx("div",{className:"text-xl font-bold text-white",children:c.length+1})]})]}),T.jsxs("div",{children:[T.jsxs("div",{className:"text-xs font-semibold text-gray-500 uppercase tracking-wider mb-3 px-1 flex items-center justify-between",children:[T.jsx("span",{children:"Navigation"}),T.jsx("span",{className:"text-[10px] bg-gray-800 px-1.5 py-0.5 rounded text-gray-400",children:c.length})]}),T.jsx("nav",{className:"space-y-1",children:T.jsx(Sy,{folders:c,activeFolder:m,onFolderSelect:h})})]})]}),T.jsx("div",{className:"p-4 border-t border-gray-800/50 text-xs text-gray-600 text-center font-medium",children:"ComfyUI Gallery Extension v1.0"})]}),T.jsxs("div",{className:"flex-1 flex flex-col h-full overflow-hidden relative bg-gray-950/50",children:[T.jsxs("div",{className:"h-16 border-b border-gray-800/50 bg-gray-900/30 backdrop-blur-md flex items-center px-6 justify-between shrink-0 z-10 sticky top-0",children:[T.jsxs("div",{className:"flex items-center gap-4",children:[T.jsx("h2",{className:"font-semibold text-lg flex items-center gap-2 text-white",children:m?T.jsxs(T.Fragment,{children:[T.jsx(Mm,{className:"w-5 h-5 text-indigo-400"}),T.jsx("span",{children:m})]}):T.jsxs(T.Fragment,{children:[T.jsx(Dm,{className:"w-5 h-5 text-indigo-400"}),T.jsx("span",{children:"Latest Outputs"})]})}),T.jsx("div",{className:"h-4 w-px bg-gray-700"}),T.jsxs("span",{className:"text-sm text-gray-400",children:[Ot.length," items"]})]}),T.jsxs("div",{className:"flex items-center gap-2 bg-gray-800/50 p-1 rounded-lg border border-gray-700/50",children:[Q==="grid"&&T.jsxs("div",{className:"flex items-center mr-2 border-r border-gray-700/50 pr-2",children:[T.jsx("button",{onClick:()=>Jt(Math.max(2,vt-1)),className:"p-1.5 text-gray-400 hover:text-white hover:bg-gray-700 rounded transition-all",title:"Decrease Columns",children:T.jsx("svg",{width:"16",height:"16",viewBox:"0 0 24 24",fill:"none",stroke:"currentColor",strokeWidth:"2",strokeLinecap:"round",strokeLinejoin:"round",children:T.jsx("path",{d:"M5 12h14"})})}),T.jsx("span",{className:"text-xs font-mono text-gray-500 w-6 text-center",children:vt}),T.jsx("button",{onClick:()=>Jt(Math.min(12,vt+1)),className:"p-1.5 text-gray-400 hover:text-white hover:bg-gray-700 rounded transition-all",title:"Increase Columns",children:T.jsxs("svg",{width:"16",height:"16",viewBox:"0 0 24 24",fill:"none",stroke:"currentColor",strokeWidth:"2",strokeLinecap:"round",strokeLinejoin:"round",children:[T.jsx("path",{d:"M5 12h14"}),T.jsx("path",{d:"M12 5v14"})]})})]}),T.jsx("div",{className:"flex items-center mr-2 border-r border-gray-700/50 pr-2",children:T.jsxs("select",{value:Et,onChange:v=>qt(v.target.value),className:"bg-transparent text-xs text-gray-400 font-medium focus:outline-none hover:text-white cursor-pointer border-none p-1 rounded hover:bg-gray-700",title:"Max Image Height",children:[T.jsx("option",{value:"none",className:"bg-gray-800",children:"Default"}),T.jsx("option",{value:"100vh",className:"bg-gray-800",children:"100% Screen"}),T.jsx("option",{value:"80vh",className:"bg-gray-800",children:"80% Screen"}),T.jsx("option",{value:"60vh",className:"bg-gray-800",children:"60% Screen"}),T.jsx("option",{value:"40vh",className:"bg-gray-800",children:"40% Screen"}),T.jsx("option",{value:"500px",className:"bg-gray-800",children:"500px"}),T.jsx("option",{value:"300px",className:"bg-gray-800",children:"300px"}),T.jsx("option",{value:"200px",className:"bg-gray-800",children:"200px"}),T.jsx("option",{value:"128px",className:"bg-gray-800",children:"128px"}),T.jsx("option",{value:"64px",className:"bg-gray-800",children:"64px"})]})}),T.jsx("button",{onClick:()=>K("grid"),className:`p-1.5 rounded transition-all ${Q==="grid"?"bg-gray-700 text-white shadow-sm":"text-gray-400 hover:text-white"}`,title:"Grid View",children:T.jsx(k0,{className:"w-4 h-4"})}),T.jsx("button",{onClick:()=>K("list"),className:`p-1.5 rounded transition-all ${Q==="list"?"bg-gray-700 text-white shadow-sm":"text-gray-400 hover:text-white"}`,title:"List View",children:T.jsx(P0,{className:"w-4 h-4"})})]})]}),T.jsxs("div",{id:"scrollableDiv",className:"flex-1 overflow-y-auto p-4 md:p-8 custom-scrollbar bg-gradient-to-br from-gray-950 to-gray-900",children:[T.jsx(A0,{dataLength:i.length,next:St,hasMore:p,scrollThreshold:.5,loader:T.jsx("div",{className:"w-full mt-1",children:Q==="grid"?T.jsx(X,{}):T.jsx(r,{})}),scrollableTarget:"scrollableDiv",className:"pb-20",children:Q==="grid"?T.jsxs("div",{className:"w-full flex flex-col gap-1",children:[i.length===0&&H&&T.jsx(X,{}),T.jsx(Gc,{breakpointCols:D,className:"my-masonry-grid flex w-full gap-1",columnClassName:"my-masonry-grid_column flex flex-col gap-1",children:i.map((v,A)=>{const z=v.filename.split(".").pop().toLowerCase(),U=(v.format||z).toLowerCase(),B=["png","jpg","jpeg","webp","gif","svg"].includes(U),Z=["mp4","webm","mov","avi","mkv"].includes(U),et=parseInt(v.width)||800,le=(parseInt(v.height)||600)/et;return B?T.jsx(wt,{src:L(v,"thumbnail"),srcSet:Tz(v),sizes:`${Math.ceil(100/vt)}vw`,alt:v.filename,placeholder:v.placeholder,color:v.color,aspectRatio:le,onClick:()=>g(v),maxHeight:Et},`${v.filename}-${A}`):T.jsx("div",{className:"relative group cursor-pointer bg-gray-900 overflow-hidden rounded-sm",style:{aspectRatio:`${1/le}`,maxHeight:Et!=="none"?Et:void 0},onClick:()=>g(v),children:T.jsxs("div",{className:"absolute inset-0 w-full h-full flex flex-col items-center justify-center text-gray-500 bg-gray-800 hover:bg-gray-700 transition-colors",children:[Z?T.jsx(gm,{className:"w-8 h-8 mb-2 opacity-50 group-hover:opacity-100 transition-opacity"}):T.jsx(qc,{className:"w-8 h-8 mb-2 opacity-50 group-hover:opacity-100 transition-opacity"}),T.jsx("span",{className:"text-[10px] font-mono uppercase opacity-50",children:U})]})},`${v.filename}-${A}`)})})]}):T.jsxs("div",{className:"flex flex-col gap-3 max-w-5xl mx-auto",children:[i.length===0&&H&&T.jsx(r,{}),Ot.map((v,A)=>{const z=["png","jpg","jpeg","webp","gif"].includes(v.format.toLowerCase());return T.jsxs("div",{className:"group flex items-center gap-4 p-3 bg-gray-900/40 border border-gray-800/60 rounded-xl hover:bg-gray-800/60 hover:border-indigo-500/30 transition-all cursor-pointer",onClick:()=>g(v),children:[T.jsx("div",{className:`rounded-lg overflow-hidden bg-gray-800 shrink-0 ${Et==="none"?"w-16 h-16":"flex items-center justify-center"}`,style:Et!=="none"?{height:Et}:{},children:z?T.jsx("img",{src:L(v,"thumbnail"),alt:v.filename,className:`object-cover ${Et==="none"?"w-full h-full":"h-full w-auto max-w-none"}`,loading:"lazy"}):T.jsx("div",{className:`flex items-center justify-center text-gray-500 ${Et==="none"?"w-full h-full":"h-full w-16"}`,children:T.jsx(gm,{className:"w-6 h-6"})})}),T.jsxs("div",{className:"flex-1 min-w-0",children:[T.jsx("h3",{className:"font-medium text-gray-200 truncate group-hover:text-indigo-300 transition-colors",children:v.filename}),T.jsxs("div",{className:"flex items-center gap-3 mt-1 text-xs text-gray-500",children:[T.jsxs("span",{className:"flex items-center gap-1",children:[T.jsx(Vc,{className:"w-3 h-3"})," ",v.subfolder||"Root"]}),T.jsx("span",{className:"uppercase bg-gray-800 px-1.5 py-0.5 rounded text-[10px] font-mono",children:v.format}),T.jsx("span",{children:new Date(v.date*1e3).toLocaleDateString()}),v.width>0&&T.jsxs("span",{className:"bg-gray-800 px-1.5 py-0.5 rounded text-[10px]",children:[v.width,"x",v.height]})]})]}),T.jsx("button",{onClick:U=>zt(U,v),className:"p-2 text-gray-400 hover:text-white hover:bg-gray-700 rounded-lg transition-colors opacity-0 group-hover:opacity-100",children:T.jsx(ym,{className:"w-5 h-5"})})]},`${v.filename}-${A}`)})]})}),!p&&i.length>0&&T.jsxs("div",{className:"flex flex-col items-center justify-center py-16 text-gray-600 gap-3",children:[T.jsx("div",{className:"w-12 h-1 bg-gray-800 rounded-full"}),T.jsx("span",{className:"text-xs uppercase tracking-widest font-medium",children:"End of gallery"})]}),i.length===0&&!H&&T.jsxs("div",{className:"flex flex-col items-center justify-center h-[60vh] text-gray-500 animate-in fade-in duration-700",children:[T.jsx("div",{className:"bg-gray-800/30 p-8 rounded-full mb-6 ring-1 ring-gray-700/50",children:T.jsx(qc,{className:"w-20 h-20 text-gray-700"})}),T.jsx("h3",{className:"text-2xl font-semibold text-gray-300 mb-2",children:"No content found"}),T.jsx("p",{className:"text-sm text-gray-500 max-w-xs text-center",children:m?`The folder "${m}" appears to be empty.`:"Your output directory is empty. Generate some images to see them here!"})]})]})]}),b&&T.jsxs("div",{className:"fixed inset-0 z-50 flex items-center justify-center bg-black/98 backdrop-blur-xl animate-in fade-in duration-300",onClick:()=>g(null),children:[T.jsx("button",{className:"absolute left-6 top-1/2 -translate-y-1/2 z-50 p-4 bg-white/5 hover:bg-white/10 rounded-full text-white/50 hover:text-white transition-all backdrop-blur-md border border-white/5",onClick:dt,children:T.jsx(L0,{className:"w-8 h-8"})}),T.jsx("button",{className:"absolute right-6 top-1/2 -translate-y-1/2 z-50 p-4 bg-white/5 hover:bg-white/10 rounded-full text-white/50 hover:text-white transition-all backdrop-blur-md border border-white/5",onClick:ft,children:T.jsx(Om,{className:"w-8 h-8"})}),T.jsxs("div",{className:"relative w-full h-full flex flex-col items-center justify-center",onClick:v=>v.stopPropagation(),children:[T.jsx("button",{className:"absolute top-6 right-6 z-50 p-3 bg-white/5 hover:bg-white/10 rounded-full text-white/70 hover:text-white transition-all hover:rotate-90 duration-300 backdrop-blur-md border border-white/5",onClick:()=>g(null),children:T.jsx(np,{className:"w-6 h-6"})}),T.jsx("div",{className:"flex-1 flex items-center justify-center w-full h-full overflow-hidden relative",children:["png","jpg","jpeg","webp","gif"].includes(b.format.toLowerCase())?T.jsx(py,{initialScale:1,minScale:.5,maxScale:8,centerOnInit:!0,disabled:!it,wheel:{disabled:!it},pinch:{disabled:!it},doubleClick:{disabled:!it},children:({state:v,instance:A,resetTransform:z})=>T.jsxs(T.Fragment,{children:[T.jsx(by,{wrapperStyle:{width:"100%",height:"100%"},contentStyle:{width:"100%",height:"100%",display:"flex",alignItems:"center",justifyContent:"center"},children:T.jsx(Vt,{src:it?L(b,"original"):L(b,"preview"),alt:b.filename,className:"w-full h-full object-contain shadow-2xl rounded-sm",style:{width:"100%",height:"100%"}})}),T.jsx(J,{scale:v?.scale??1,positionX:v?.positionX??0,positionY:v?.positionY??0,instance:A,resetTransform:z,mapBgUrl:b?L(b,"preview"):""})]})}):T.jsx("video",{src:L(b,"original"),controls:!0,autoPlay:!0,className:"max-w-full max-h-full shadow-2xl bg-black rounded-sm"})}),T.jsxs("div",{className:"mt-8 w-full max-w-3xl bg-gray-900/80 backdrop-blur-xl border border-white/10 rounded-2xl px-8 py-5 flex items-center justify-between shadow-2xl animate-in slide-in-from-bottom-8 duration-500 ring-1 ring-white/5 z-50",children:[T.jsxs("div",{className:"flex flex-col overflow-hidden mr-8",children:[T.jsx("span",{className:"font-semibold text-white truncate text-lg tracking-tight",children:b.filename}),T.jsxs("span",{className:"text-sm text-gray-400 truncate flex items-center gap-3 mt-1",children:[T.jsxs("span",{className:"flex items-center gap-1.5",children:[T.jsx(Vc,{className:"w-3.5 h-3.5"})," ",b.subfolder||"Output Root"]}),T.jsx("span",{className:"w-1 h-1 bg-gray-600 rounded-full"}),T.jsx("span",{className:"uppercase font-mono text-xs bg-gray-800 px-1.5 py-0.5 rounded text-gray-300",children:b.format}),b.width>0&&T.jsxs(T.Fragment,{children:[T.jsx("span",{className:"w-1 h-1 bg-gray-600 rounded-full"}),T.jsxs("span",{className:"font-mono text-xs text-gray-300",children:[b.width,"x",b.height]})]}),T.jsx("span",{className:"w-1 h-1 bg-gray-600 rounded-full"}),T.jsx("span",{children:new Date(b.date*1e3).toLocaleString()})]})]}),T.jsxs("div",{className:"flex items-center gap-4 shrink-0",children:[!it&&["png","jpg","jpeg","webp","gif"].includes(b.format.toLowerCase())&&T.jsxs("button",{onClick:()=>F(!0),className:"group flex items-center gap-2 px-4 py-2.5 bg-gray-800 hover:bg-gray-700 border border-gray-700 rounded-xl text-white font-medium transition-all",children:[T.jsx(ip,{className:"w-4 h-4"}),"Load Original"]}),T.jsx("div",{className:"h-10 w-px bg-gray-700/50 mx-2"}),T.jsxs("button",{onClick:v=>zt(v,b),className:"group flex items-center gap-2 px-5 py-2.5 bg-indigo-600 hover:bg-indigo-500 rounded-xl text-white font-medium transition-all active:scale-95 shadow-lg shadow-indigo-900/20 hover:shadow-indigo-900/40",children:[T.jsx(ym,{className:"w-4 h-4 group-hover:-translate-y-0.5 transition-transform"}),"Download"]})]})]})]})]})]})}T0.createRoot(document.getElementById("root")).render(T.jsx($.StrictMode,{children:T.jsx(Ey,{})}));
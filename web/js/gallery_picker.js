@@ -1,6 +1,23 @@
 import { app } from "/scripts/app.js";
 import { api } from "/scripts/api.js";
 
+// Expand a /web/gallery/list?format=compact "files" object (one array per key,
+// subfolders as indexes into a string table, shared values in "constants") back into rows
+function expandCompactFiles(files) {
+    if (!files || files.encoding !== "columnar") return files || [];
+    const rows = new Array(files.count);
+    const keys = Object.keys(files.columns);
+    for (let i = 0; i < files.count; i++) {
+        const row = { ...files.constants };
+        for (const key of keys) {
+            const value = files.columns[key][i];
+            row[key] = key === "subfolder" ? files.subfolders[value] : value;
+        }
+        rows[i] = row;
+    }
+    return rows;
+}
+
 app.registerExtension({
     name: "web_gallery.GalleryPicker",
     async beforeRegisterNodeDef(nodeType, nodeData, app) {
@@ -21,7 +38,19 @@ app.registerExtension({
                         node.onExecuted = function(message) {
                             if (origOnExecuted) origOnExecuted.apply(this, arguments);
                             
-                            if (message && message.images) {
+                            if (message && message.gallery_previews) {
+                                // Previews served from the gallery thumbnail cache
+                                node.imgs = [];
+                                message.gallery_previews.forEach(imgData => {
+                                    const img = new Image();
+                                    img.src = `/web/gallery/thumbnail?filename=${encodeURIComponent(imgData.filename)}&path=${encodeURIComponent(imgData.path)}&size=preview`;
+                                    img.filename = imgData.filename;
+                                    img.onload = () => { app.graph.setDirtyCanvas(true); };
+                                    node.imgs.push(img);
+                                });
+                                node.imageIndex = 0;
+                                node.setDirtyCanvas(true);
+                            } else if (message && message.images) {
                                 // Clear existing previews (from initial load)
                                 node.imgs = [];
                                 message.images.forEach(imgData => {
@@ -551,6 +580,54 @@ function showGallery(node, searchPath, excludePattern, onExcludeChange) {
     selectBtn.onmouseover = () => selectBtn.style.backgroundColor = "#388e3c";
     selectBtn.onmouseout = () => selectBtn.style.backgroundColor = "#2e7d32";
     
+    // Streams the selected files (those under the current root) as one ZIP. A form post
+    // lets the browser save the response as it arrives instead of buffering a blob.
+    const zipBtn = document.createElement("button");
+    zipBtn.textContent = "Download ZIP";
+    zipBtn.title = "Download the selected images as a ZIP";
+    Object.assign(zipBtn.style, {
+        padding: "6px 12px",
+        backgroundColor: "#444",
+        color: "white",
+        border: "none",
+        borderRadius: "4px",
+        cursor: "pointer",
+        fontSize: "12px"
+    });
+    zipBtn.onmouseover = () => zipBtn.style.backgroundColor = "#555";
+    zipBtn.onmouseout = () => zipBtn.style.backgroundColor = "#444";
+    zipBtn.onclick = () => {
+        const prefix = (rootPath + "/").replace(/\\/g, "/").replace(/\/+/g, "/");
+        const files = [];
+        selectedFiles.forEach(fullPath => {
+            if (!fullPath.startsWith(prefix)) return;
+            const relative = fullPath.slice(prefix.length);
+            const slash = relative.lastIndexOf("/");
+            files.push({
+                subfolder: slash >= 0 ? relative.slice(0, slash) : "",
+                filename: relative.slice(slash + 1)
+            });
+        });
+        if (!files.length) {
+            alert("Select images in this gallery to download.");
+            return;
+        }
+        const form = document.createElement("form");
+        form.method = "POST";
+        form.action = "/web/gallery/zip";
+        form.style.display = "none";
+        for (const [name, value] of [["path", currentSearchPath || ""], ["files", JSON.stringify(files)]]) {
+            const input = document.createElement("input");
+            input.type = "hidden";
+            input.name = name;
+            input.value = value;
+            form.appendChild(input);
+        }
+        document.body.appendChild(form);
+        form.submit();
+        document.body.removeChild(form);
+    };
+
     const closeBtn = document.createElement("button");
     closeBtn.textContent = "Close";
     Object.assign(closeBtn.style, {
@@ -567,6 +644,7 @@ function showGallery(node, searchPath, excludePattern, onExcludeChange) {
     closeBtn.onclick = () => document.body.removeChild(modal);
 
     controls.appendChild(showLatestBtn);
+    controls.appendChild(zipBtn);
     controls.appendChild(selectBtn);
     controls.appendChild(closeBtn);
     topBar.appendChild(title);
@@ -1434,6 +1512,67 @@ function showGallery(node, searchPath, excludePattern, onExcludeChange) {
         }
     };
 
+    // "Find similar": images whose perceptual hash is closest to this one, nearest first
+    const appendSimilarSection = (fileData, requestId) => {
+        const section = document.createElement("div");
+        section.style.borderTop = "1px solid #333";
+        section.style.paddingTop = "10px";
+
+        const button = document.createElement("button");
+        button.textContent = "Find similar";
+        Object.assign(button.style, {
+            background: "#333", color: "#fff", border: "1px solid #555",
+            borderRadius: "4px", padding: "4px 10px", cursor: "pointer", fontSize: "12px"
+        });
+
+        const results = document.createElement("div");
+        Object.assign(results.style, {
+            display: "grid", gridTemplateColumns: "repeat(auto-fill, minmax(70px, 1fr))",
+            gap: "6px", marginTop: "8px"
+        });
+
+        button.onclick = async () => {
+            button.disabled = true;
+            results.innerHTML = "<div style='color:#888;font-style:italic;grid-column:1/-1'>Searching...</div>";
+            const encodedPath = encodeURIComponent(currentSearchPath || "");
+            try {
+                const response = await fetch(`/web/gallery/similar?path=${encodedPath}&subfolder=${encodeURIComponent(fileData.subfolder || "")}&filename=${encodeURIComponent(fileData.filename)}&k=12`);
+                const data = await response.json();
+                if (requestId !== currentInfoRequestId) return;
+                if (data.error) throw new Error(data.error);
+
+                results.innerHTML = "";
+                if (data.pending) {
+                    // Answered from the hashes computed so far; the rest are hashed in the background
+                    results.innerHTML = `<div style='color:#888;font-style:italic;grid-column:1/-1'>Still hashing (${data.hashed}/${data.hashable}), results may be incomplete</div>`;
+                } else if (!data.files.length) {
+                    results.innerHTML = "<div style='color:#666;grid-column:1/-1'>No similar images found</div>";
+                }
+                data.files.forEach(similar => {
+                    const item = document.createElement("div");
+                    item.title = `${similar.subfolder ? similar.subfolder + "/" : ""}${similar.filename} (distance ${similar.distance})`;
+                    Object.assign(item.style, { cursor: "pointer", textAlign: "center", fontSize: "10px", color: "#888" });
+                    const thumb = document.createElement("img");
+                    thumb.src = `/web/gallery/thumbnail?filename=${encodeURIComponent(similar.filename)}&subfolder=${encodeURIComponent(similar.subfolder)}&path=${encodedPath}&size=small`;
+                    Object.assign(thumb.style, { width: "100%", aspectRatio: "1", objectFit: "cover", backgroundColor: "#000", borderRadius: "3px" });
+                    item.appendChild(thumb);
+                    item.appendChild(document.createTextNode(`d=${similar.distance}`));
+                    item.onclick = () => updateInfoPanel(similar);
+                    results.appendChild(item);
+                });
+            } catch (e) {
+                if (requestId !== currentInfoRequestId) return;
+                console.error("Error finding similar images:", e);
+                results.innerHTML = "<div style='color:red;font-size:12px;grid-column:1/-1'>Failed to find similar images</div>";
+            }
+            button.disabled = false;
+        };
+
+        section.appendChild(button);
+        section.appendChild(results);
+        infoContent.appendChild(section);
+    };
+
     let currentInfoRequestId = 0;
     const updateInfoPanel = async (fileData) => {
         if (!fileData) {
@@ -1507,6 +1646,7 @@ function showGallery(node, searchPath, excludePattern, onExcludeChange) {
             }
             
             infoContent.innerHTML = html;
+            appendSimilarSection(fileData, requestId);
             
         } catch (e) {
             if (requestId !== currentInfoRequestId) return;
@@ -1592,7 +1732,7 @@ function showGallery(node, searchPath, excludePattern, onExcludeChange) {
             const searchVal = document.querySelector("#gallery-search-input")?.value || ""; // We need to access search input value
             const encodedSearch = encodeURIComponent(searchVal);
             
-            const url = `/web/gallery/list?path=${encodedPath}&folder=${encodedFolder}&exclude=${encodedExclude}&search=${encodedSearch}&skip=${skip}&limit=${limit}&recursive=${recursiveLoad}`;
+            const url = `/web/gallery/list?path=${encodedPath}&folder=${encodedFolder}&exclude=${encodedExclude}&search=${encodedSearch}&skip=${skip}&limit=${limit}&recursive=${recursiveLoad}&format=compact`;
             const response = await fetch(url);
             
             if (!response.ok) {
@@ -1610,6 +1750,7 @@ function showGallery(node, searchPath, excludePattern, onExcludeChange) {
             }
             
             const data = await response.json();
+            data.files = expandCompactFiles(data.files);
             rootPath = data.root_path;
             
             // If it's a new search (skip=0), we should check for matching subfolders if we are in search mode
@@ -1879,18 +2020,26 @@ function showGallery(node, searchPath, excludePattern, onExcludeChange) {
                     card.appendChild(checkmark);
                     
                     // Image Container
+                    // Painted with the row's inline placeholder and average color until the thumbnail loads
                     const imgContainer = document.createElement("div");
                     Object.assign(imgContainer.style, {
                         width: "100%",
                         paddingTop: "100%", // 1:1 Aspect Ratio
                         position: "relative",
-                        backgroundColor: "#000"
+                        backgroundColor: file.color || "#000",
+                        backgroundImage: file.placeholder ? `url("${file.placeholder}")` : "none",
+                        backgroundSize: "contain",
+                        backgroundPosition: "center",
+                        backgroundRepeat: "no-repeat"
                     });
                     
                     const img = document.createElement("img");
                     const thumbUrl = `/web/gallery/thumbnail?filename=${encodeURIComponent(file.filename)}&subfolder=${encodeURIComponent(file.subfolder)}&path=${encodedPath}&size=small`;
                     
                     img.src = thumbUrl;
+                    // Ladder rungs; high-DPI screens pick a larger one (all rendered from one decode)
+                    img.srcset = [200, 400, 800].map(w => `${thumbUrl}&w=${w} ${w}w`).join(", ");
+                    img.sizes = "(min-width: 1200px) 240px, 180px";
                     Object.assign(img.style, {
                         position: "absolute",
                         top: "0",
@@ -13,19 +13,53 @@ app.registerExtension({
                 
                 // --- Folder Suggestion Logic ---
                 const folderWidget = this.widgets.find(w => w.name === "folder");
-                // Access input options from nodeData
-                const folderOptions = nodeData.input.required.folder[1];
+                const placeholder = "Select folder to add...";
                 
-                if (folderWidget && folderOptions && folderOptions.folder_suggestions) {
-                    const suggestions = ["Select folder to add...", ...folderOptions.folder_suggestions];
+                // Suggestions are fetched lazily from the checkpoint catalog endpoint
+                // (no longer embedded in the node definition). At most one request is in
+                // flight, and a fresh list is reused for FOLDER_SUGGESTIONS_TTL_MS.
+                const FOLDER_SUGGESTIONS_TTL_MS = 30000;
+                node.folderSuggestions = [];
+                let suggestionsFetchedAt = 0;
+                let suggestionsRequest = null;
+                const refreshFolderSuggestions = () => {
+                    if (suggestionsRequest || Date.now() - suggestionsFetchedAt < FOLDER_SUGGESTIONS_TTL_MS) {
+                        return suggestionsRequest;
+                    }
+                    suggestionsRequest = (async () => {
+                        try {
+                            const response = await api.fetchApi("/web/gallery/checkpoints/folders");
+                            const data = await response.json();
+                            if (data.folders) node.folderSuggestions = data.folders;
+                        } catch (e) {
+                            console.error("Failed to fetch checkpoint folders:", e);
+                        } finally {
+                            suggestionsFetchedAt = Date.now();
+                            suggestionsRequest = null;
+                        }
+                    })();
+                    return suggestionsRequest;
+                };
+                
+                if (folderWidget) {
+                    refreshFolderSuggestions();
+                    
+                    // Clicking the node (e.g. to open the menu below) refreshes a stale list,
+                    // so folders added since the node was created show up
+                    const onMouseDown = node.onMouseDown;
+                    node.onMouseDown = function () {
+                        refreshFolderSuggestions();
+                        return onMouseDown ? onMouseDown.apply(this, arguments) : undefined;
+                    };
                     
                     // Add a combo widget helper
                     this.addWidget(
                         "combo", 
                         "Add Folder", 
-                        suggestions[0], 
+                        placeholder, 
                         (value, canvas, node, pos, event) => {
-                            if (value && value !== "Select folder to add...") {
+                            refreshFolderSuggestions();
+                            if (value && value !== placeholder) {
                                 const currentVal = folderWidget.value;
                                 let newVal = "";
                                 
@@ -49,11 +83,14 @@ app.registerExtension({
                                 // Reset the combo value back to prompt visually if possible
                                 setTimeout(() => {
                                     const w = this.widgets.find(w => w.name === "Add Folder");
-                                    if (w) w.value = suggestions[0];
+                                    if (w) w.value = placeholder;
                                 }, 100);
                             }
                         }, 
-                        { values: suggestions }
+                        {
+                            // LiteGraph evaluates this on every redraw: cached list only
+                            values: () => [placeholder, ...node.folderSuggestions]
+                        }
                     );
                 }
                 
@@ -67,43 +104,33 @@ app.registerExtension({
                 const displayWidget = this.addWidget("text", "Last Loaded", "None", () => {}, { serialize: false });
                 
                 // Helper: Pick random checkpoint from current configuration
-                function getRandomCheckpoint() {
-                    const allCheckpoints = folderOptions.all_checkpoints || [];
-                    const folderVal = folderWidget.value;
-                    let folders = folderVal.split(',').map(f => f.trim()).filter(f => f);
-                    if (folders.length === 0) folders = ["All"];
-                    
-                    let candidates = [];
-                    
-                    for (const f of folders) {
-                        if (f === "All") {
-                            candidates = [...candidates, ...allCheckpoints];
-                        } else if (f === "Root") {
-                            candidates = [...candidates, ...allCheckpoints.filter(c => !c.includes("/") && !c.includes("\\"))];
-                        } else {
-                            candidates = [...candidates, ...allCheckpoints.filter(c => {
-                                // Normalize separators
-                                const normC = c.replace(/\\/g, "/");
-                                const lastSlash = normC.lastIndexOf("/");
-                                const dir = lastSlash === -1 ? "" : normC.substring(0, lastSlash);
-                                return dir === f || dir.startsWith(f + "/");
-                            })];
-                        }
+                // Candidates come from the server-side catalog (same folder/exclude filtering as the node)
+                async function getRandomCheckpoint() {
+                    const excludeWidget = node.widgets.find(w => w.name === "exclude_names");
+                    const architectureWidget = node.widgets.find(w => w.name === "architecture");
+                    const params = new URLSearchParams({
+                        folder: folderWidget ? folderWidget.value : "All",
+                        exclude: excludeWidget ? excludeWidget.value : "",
+                        architecture: architectureWidget ? architectureWidget.value : "Any"
+                    });
+                    try {
+                        const response = await api.fetchApi(`/web/gallery/checkpoints?${params.toString()}`);
+                        const data = await response.json();
+                        const candidates = data.checkpoints || [];
+                        if (candidates.length === 0) return null;
+                        const idx = Math.floor(Math.random() * candidates.length);
+                        return candidates[idx];
+                    } catch (e) {
+                        console.error("Failed to fetch checkpoints:", e);
+                        return null;
                     }
-                    
-                    // Unique
-                    candidates = [...new Set(candidates)];
-                    
-                    if (candidates.length === 0) return null;
-                    const idx = Math.floor(Math.random() * candidates.length);
-                    return candidates[idx];
                 }
 
                 // 2. Buttons
                 
                 // "Generate Fixed" (Fix Current)
-                this.addWidget("button", "Generate Fixed", null, () => {
-                    const val = getRandomCheckpoint();
+                this.addWidget("button", "Generate Fixed", null, async () => {
+                    const val = await getRandomCheckpoint();
                     if (val) {
                         const forceWidget = node.widgets.find(w => w.name === "force_checkpoint");
                         if (forceWidget) {
@@ -176,7 +203,25 @@ app.registerExtension({
                         if (ckpt) {
                             // Update Display
                             if (displayWidget) {
-                                displayWidget.value = ckpt + (mode === "fixed" ? " (Fixed)" : "");
+                                let text = ckpt + (mode === "fixed" ? " (Fixed)" : "");
+                                // Follow-up event once the background page-cache warmup finishes
+                                const prefetch = event.detail.prefetch;
+                                if (prefetch) {
+                                    if (prefetch.already_cached) {
+                                        text += " [already cached]";
+                                    } else if (prefetch.status === "advised") {
+                                        // fadvise only times a sample; the kernel reads the rest in the background
+                                        const mb = Math.round(prefetch.bytes / 1048576);
+                                        text += ` [advised, first ${mb} MB cold ${prefetch.cold_seconds}s]`;
+                                    } else if (prefetch.status === "warm") {
+                                        // "~" marks a warm time extrapolated from a partial re-read
+                                        const warm = prefetch.warm_seconds == null ? "?" : (prefetch.warm_estimated ? "~" : "") + prefetch.warm_seconds;
+                                        text += ` [cold ${prefetch.cold_seconds}s, warm ${warm}s]`;
+                                    } else if (prefetch.status === "error") {
+                                        text += " [prefetch failed]";
+                                    }
+                                }
+                                displayWidget.value = text;
                             }
                             
                             // Update History